@@ -4,103 +4,318 @@ Hoplite game AI
 """
 
 import os
+import sys
+import glob
+import json
+import time
+import threading
+import concurrent.futures
 os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "hide"
 import argparse
 import logging
+import numpy
 import hoplite
 import hoplite.utils
 import hoplite.game.terrain
 import hoplite.game.moves
 import hoplite.game.state
 import hoplite.vision.observer
+import hoplite.vision.batch
+import hoplite.vision.compiler
 import hoplite.controller
-import hoplite.monkey_runner
+import hoplite.ppadb_runner
+import hoplite.fake_adb
 import hoplite.actuator
 import hoplite.brain
+import hoplite.brain_service
+import hoplite.recording
+import hoplite.checker
+import hoplite.dataset
 
 
-def check(path):
-    """Check a game log for errors in predicted state.
+LOGGER = logging.getLogger(__name__)
+
+
+def print_error_rates(summary, category):
+    """Print a table of error rates per key of a category.
     """
-    print("Checking %s\n" % os.path.realpath(path))
-    with open(path, "r") as file:
-        lines = file.readlines()
-    total, errors = 0, 0
-    for prev_line, next_line in zip(lines[:-1], lines[1:]):
-        if prev_line.split("\t")[1] != "move":
-            continue
-        if next_line.split("\t")[1] != "move":
-            continue
-        prev_state = hoplite.game.state.GameState.from_string(prev_line.split("\t")[2])
-        groundtruth = hoplite.game.state.GameState.from_string(next_line.split("\t")[2])
-        if prev_state.depth != groundtruth.depth:
-            continue
-        total += 1
-        move = hoplite.game.moves.PlayerMove.from_string(prev_line.split("\t")[3])
-        prediction = move.apply(prev_state)
-        prediction.status.cooldown = max(0, prediction.status.cooldown - 1)
-        prediction_errors = list()
-        if prediction.status != groundtruth.status:
-            prediction_errors.append(
-                ("Status", prediction.status, groundtruth.status))
-        if prediction.terrain.player != groundtruth.terrain.player:
-            prediction_errors.append(
-                ("Player position", prediction.terrain.player, groundtruth.terrain.player))
-        if len(prediction_errors) > 0:
-            print("-" * 120)
-            print("Found error(s) from turn %d to %d" %
-                  (int(prev_line.split("\t")[0]), int(next_line.split("\t")[0])))
-            print("State:", repr(prev_state))
-            print("Move:", move)
-            for error_name, predicted, expected in prediction_errors:
-                print("%s expected %s but got %s" % (
-                    error_name,
-                    repr(expected),
-                    repr(predicted)
-                ))
-            print("-" * 120 + "\n")
-            errors += 1
-    print("Check run found %d errors out of %d predictions." % (errors, total))
-
-
-def play(serial: str, prayers, record):
-    """Play with the monkey runner interface.
+    print("%-24s%12s%12s%12s" % (category, "predictions", "errors", "rate"))
+    for key, rates in summary.rates(category).items():
+        print("%-24s%12d%12d%11.1f%%" % (key, rates["predictions"], rates["errors"],
+                                         100 * rates["rate"]))
+    print()
+
+
+def print_mismatches(result):
+    """Print the wrong predictions of a checked recording.
+    """
+    for mismatch in result.mismatches:
+        print("-" * 120)
+        print("Found error(s) from turn %d to %d in %s" %
+              (mismatch.prev_turn, mismatch.next_turn, result.path))
+        print("State:", mismatch.state)
+        print("Move:", hoplite.game.moves.PlayerMove.from_string(mismatch.move))
+        for field, expected, predicted in mismatch.fields:
+            print("%s expected %s but got %s" % (field, expected, predicted))
+        print("-" * 120 + "\n")
+
+
+def check(args):
+    """Check game logs, binary containers or recording folders for errors in
+    predicted state. With a report folder, only recordings missing from its
+    index are checked, and mismatches are written as JSON lines.
+    """
+    paths = hoplite.recording.find_recordings(args.input)
+    print("Checking %d recording(s) from %s\n" % (len(paths), os.path.realpath(args.input)))
+    if args.report is None:
+        summary = hoplite.checker.CheckResult()
+        for result in hoplite.checker.check_recordings(paths, args.workers):
+            print_mismatches(result)
+            summary.merge(result)
+    else:
+        report = hoplite.checker.Report(args.report)
+        pending = report.pending(paths)
+        print("Skipping %d recording(s) already in the report\n" % (len(paths) - len(pending)))
+        results = hoplite.checker.check_recordings([path for path, _ in pending], args.workers)
+        for result, (_, digest) in zip(results, pending):
+            report.add(result, digest)
+        report.save()
+        summary = report.summary()
+        print("Report written to %s\n" % os.path.realpath(args.report))
+    if summary.predictions > 0:
+        print_error_rates(summary, "move")
+        print_error_rates(summary, "prayer")
+    print("Check run found %d errors out of %d predictions." % (
+        summary.errors, summary.predictions))
+
+
+def export_dataset(args):
+    """Export recordings into a columnar dataset.
+    """
+    paths = hoplite.recording.find_recordings(args.input)
+    time_start = time.time()
+    rows = hoplite.dataset.export(paths, args.output)
+    print("Exported %d rows from %d recording(s) to %s in %.1f seconds" % (
+        rows, len(paths), os.path.realpath(args.output), time.time() - time_start))
+
+
+def convert_recording(args):
+    """Convert a recording folder into a binary container.
+    """
+    sampler, shape = None, (1920, 1080, 3)
+    if args.probes_only:
+        parser = hoplite.vision.observer.ScreenParser()
+        sampler = parser.sample_screen_probes
+        shape = sampler(numpy.zeros(shape, dtype=numpy.float32)).shape
+    original, converted = hoplite.recording.convert(
+        args.input, sampler, shape, args.delta, args.keyframe_interval)
+    print("Converted %s: %.1f MB to %.1f MB (%.1f%%)" % (
+        os.path.realpath(args.input),
+        original / 1e6,
+        converted / 1e6,
+        100 * converted / max(1, original)
+    ))
+
+
+def create_controller(args, serial, pool=None, service=None):
+    """Create a controller for a device, with the play options.
+
+    Parameters
+    ----------
+    args : argparse.Namespace
+        Parsed play options.
+    serial : str
+        adb serial of the device.
+    pool : concurrent.futures.ProcessPoolExecutor
+        Worker processes for the brain, see `hoplite.brain.Brain`.
+    service : hoplite.brain_service.BrainService
+        Shared brain service, see `hoplite.brain.Brain`.
+
+    Returns
+    -------
+    hoplite.controller.Controller
+        Controller for the device, whose interface is not opened yet.
+
     """
-    mr_if = hoplite.ppadb_runner.PurePythonAdbInterface(serial)
-    observer = hoplite.vision.observer.Observer(mr_if)
-    actuator = hoplite.actuator.Actuator(mr_if)
-    brain = hoplite.brain.Brain()
+    mr_if = hoplite.ppadb_runner.PurePythonAdbInterface(
+        serial, persistent_touch=args.persistent_touch)
+    terrain_table = None
+    if args.terrain_table is not None:
+        terrain_table = hoplite.vision.compiler.TableClassifier.load(
+            args.terrain_table,
+            hoplite.game.terrain.SurfaceElement.__getitem__
+        )
+    observer = hoplite.vision.observer.Observer(
+        mr_if,
+        cache=hoplite.vision.observer.ParseCache(directory=args.cache),
+        terrain_table=terrain_table,
+        partial_capture=args.partial_capture,
+        stream=mr_if.open_frame_stream() if args.stream else None
+    )
+    actuator = hoplite.actuator.Actuator(mr_if, batch=args.batch_taps, tap_delay=args.tap_delay)
+    brain = hoplite.brain.Brain(pool=pool, service=service)
     starting_prayers = list()
-    for prayer in prayers.strip().split(","):
+    for prayer in args.prayers.strip().split(","):
         if prayer == "":
             continue
         starting_prayers.append(hoplite.game.status.Prayer(int(prayer)))
     recorder = None
-    if record:
-        recorder = hoplite.controller.Recorder(observer)
+    if args.record:
+        recorder = hoplite.controller.Recorder(
+            observer,
+            binary=args.binary_record or args.probes_only or args.delta_record,
+            probes_only=args.probes_only,
+            delta=args.delta_record
+        )
         recorder.start()
-    controller = hoplite.controller.Controller(observer, actuator, brain,
-                                               starting_prayers,
-                                               recorder=recorder)
-    mr_if.open()
+    controller_class = hoplite.controller.Controller
+    if args.pipeline:
+        controller_class = hoplite.controller.PipelinedController
+    return controller_class(observer, actuator, brain,
+                            starting_prayers,
+                            recorder=recorder,
+                            stable_frames=args.stable_frames,
+                            pacing_timeout=args.pacing_timeout,
+                            ponder=args.ponder or args.pipeline,
+                            verify=args.verify)
+
+
+def release(controller):
+    """Stop the recorder and the frame stream, and close the interface of a
+    controller.
+    """
+    if controller.recorder is not None:
+        controller.recorder.stop()
+    if controller.observer.stream is not None:
+        controller.observer.stream.stop()
+    controller.actuator.monkey.close()
+
+
+def play(args):
+    """Play with the monkey runner interface.
+    """
+    controller = create_controller(args, args.serial)
+    controller.actuator.monkey.open()
     try:
         controller.run()
     except KeyboardInterrupt:
         logging.warning("Interrupting with keyboard")
     finally:
         try:
-            mr_if.close()
+            release(controller)
         except KeyboardInterrupt:
             pass
 
 
+def play_many(args):
+    """Play on several devices at once, one controller per device, with a
+    shared pool of brain worker processes or a shared brain service.
+    """
+    pool, service = None, None
+    if args.brain_service:
+        service = hoplite.brain_service.BrainService(max_delay=args.max_batch_delay)
+        service.start()
+    else:
+        pool = concurrent.futures.ProcessPoolExecutor(max_workers=args.workers)
+    controllers = [create_controller(args, serial, pool, service) for serial in args.serials]
+    threads = list()
+    for controller in controllers:
+        controller.actuator.monkey.open()
+        threads.append(threading.Thread(target=controller.run, daemon=True))
+    time_start = time.time()
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(timeout=.5)
+    except KeyboardInterrupt:
+        logging.warning("Interrupting with keyboard")
+        for controller in controllers:
+            controller.stop = True
+        for thread in threads:
+            thread.join()
+    finally:
+        elapsed = time.time() - time_start
+        for controller in controllers:
+            release(controller)
+        if service is not None:
+            service.stop()
+        else:
+            pool.shutdown()
+    print("%-24s%12s%12s" % ("device", "turns", "turns/min"))
+    for serial, controller in zip(args.serials, controllers):
+        turns = controller.turn - 1
+        print("%-24s%12d%12.1f" % (serial, turns, 60 * turns / elapsed))
+    if service is not None:
+        print_service_metrics(service)
+
+
+def print_service_metrics(service):
+    """Print the metrics of a brain service.
+    """
+    for name, value in service.metrics().items():
+        print("%-24s%12.1f" % (name, value))
+
+
+def benchmark_brain(args):
+    """Compare the move throughput of simulated controllers searching with
+    their own brains and with a shared brain service.
+    """
+    print("%-24s%12s" % ("method", "moves/s"))
+    print("%-24s%12.1f" % ("local", hoplite.brain_service.simulate(
+        hoplite.brain.Brain().search, args.controllers, args.turns, args.think)))
+    service = hoplite.brain_service.BrainService(max_delay=args.max_batch_delay)
+    service.start()
+    brain = hoplite.brain.Brain(service=service)
+    print("%-24s%12.1f" % ("service", hoplite.brain_service.simulate(
+        brain.search, args.controllers, args.turns, args.think)))
+    service.stop()
+    print_service_metrics(service)
+
+
+def parse_batch(args):
+    """Parse many screenshots and write one JSON line per screenshot.
+    """
+    paths = hoplite.vision.batch.list_screenshots(args.input)
+    terrain_table = None
+    if args.terrain_table is not None:
+        terrain_table = hoplite.vision.compiler.TableClassifier.load(
+            args.terrain_table,
+            hoplite.game.terrain.SurfaceElement.__getitem__
+        )
+    output = sys.stdout if args.output is None else open(args.output, "w")
+    LOGGER.info("Parsing %d screenshots", len(paths))
+    time_start = time.time()
+    records = hoplite.vision.batch.parse_screenshots(
+        paths,
+        workers=args.workers,
+        chunksize=args.chunksize,
+        cache_directory=args.cache,
+        terrain_table=terrain_table
+    )
+    for record in records:
+        output.write(json.dumps(record) + "\n")
+    if args.output is not None:
+        output.close()
+    LOGGER.info("Parsed %d screenshots in %.1f seconds", len(paths), time.time() - time_start)
+
+
 def parse(args):
     """Parse a game state to perform some analysis.
     """
+    if os.path.isdir(args.input) or glob.has_magic(args.input) or (
+            os.path.isfile(args.input)
+            and not args.input.lower().endswith(hoplite.vision.batch.IMAGE_EXTENSIONS)):
+        parse_batch(args)
+        return
     if os.path.isfile(args.input):
-        parser = hoplite.vision.observer.ScreenParser(save_parts=args.save_parts)
+        cache = None
+        if args.cache is not None:
+            cache = hoplite.vision.observer.ParseCache(directory=args.cache)
+        parser = hoplite.vision.observer.ScreenParser(save_parts=args.save_parts, cache=cache)
         stream = parser.read_stream(args.input)
-        interface = hoplite.vision.classifiers.interface(stream)
+        interface = parser.observe_interface(stream)
         if interface == hoplite.game.state.Interface.ALTAR:
             altar = parser.observe_altar(stream)
             print("Found an altar with the following prayers:", altar)
@@ -129,6 +344,189 @@ def parse(args):
         game.terrain.render(show_ranges=args.show_ranges)
 
 
+def benchmark_capture(args):
+    """Compare the latency and amount of data transferred by screen capture
+    methods.
+    """
+    mr_if = hoplite.ppadb_runner.PurePythonAdbInterface(args.serial)
+    parser = hoplite.vision.observer.ScreenParser()
+    height = mr_if.framebuffer_format()[1]
+    methods = [
+        ("png", lambda: parser.read_stream(mr_if.snapshot(as_stream=True))),
+        ("raw", lambda: mr_if.snapshot_rows([(0, height)])),
+        ("interface", lambda: mr_if.snapshot_rows(parser.bands["interface"])),
+        ("interface+game", lambda: (
+            mr_if.snapshot_rows(parser.bands["interface"]),
+            mr_if.snapshot_rows(parser.bands["game"])
+        )),
+    ]
+    print("%-16s%16s%16s" % ("method", "ms/turn", "kB/turn"))
+    for name, capture in methods:
+        bytes_start = mr_if.bytes_received
+        time_start = time.time()
+        for _ in range(args.turns):
+            capture()
+        print("%-16s%16.1f%16.1f" % (
+            name,
+            1000 * (time.time() - time_start) / args.turns,
+            (mr_if.bytes_received - bytes_start) / 1000 / args.turns
+        ))
+
+
+def benchmark_taps(args):
+    """Compare the latency of performing moves with one command per touch,
+    with a single batched command, and through a persistent shell session.
+    Every method is timed until the touches have been performed.
+    """
+    server = None
+    port = None
+    if args.fake:
+        server = hoplite.fake_adb.FakeAdbServer()
+        server.start()
+        port = server.port
+    move = hoplite.game.moves.LeapMove(hoplite.utils.HexagonalCoordinates(0, 1))
+    print("%-16s%16s" % ("method", "ms/move"))
+    for name, batch, persistent in [
+            ("sequential", False, False),
+            ("batched", True, False),
+            ("persistent", True, True)]:
+        mr_if = hoplite.ppadb_runner.PurePythonAdbInterface(
+            args.serial, port=port, persistent_touch=persistent)
+        mr_if.open()
+        actuator = hoplite.actuator.Actuator(mr_if, batch=batch, tap_delay=args.tap_delay)
+        time_start = time.time()
+        for _ in range(args.turns):
+            actuator.make_move(move)
+        print("%-16s%16.1f" % (name, 1000 * (time.time() - time_start) / args.turns))
+        mr_if.close()
+    if server is not None:
+        server.stop()
+
+
+def compile_classifier(args):
+    """Compile a table-driven classifier from labeled parts, and compare it
+    against the hand-written one.
+    """
+    parts, labels = hoplite.vision.compiler.load_parts(args.input)
+    candidates = None
+    if args.kind == "interface":
+        # Parts are whole screenshots, too large for searching every pixel
+        candidates = hoplite.vision.classifiers.PROBES["interface"]
+    classifier = hoplite.vision.compiler.TableClassifier.compile(
+        parts, labels, args.max_pixels, candidates)
+    mismatches = hoplite.vision.compiler.regression(
+        classifier,
+        getattr(hoplite.vision.classifiers, args.kind),
+        parts,
+        labels
+    )
+    for index, predicted, expected in mismatches:
+        print("Part %d labeled %s: compiled %s, hand-written %s" % (
+            index, labels[index], predicted, expected))
+    print("Compiled classifier reads pixels %s and has %d entries." % (
+        classifier.pixels, len(classifier.table)))
+    if args.output is not None:
+        classifier.save(args.output)
+        print("Saved classifier to %s" % os.path.realpath(args.output))
+
+
+def add_play_arguments(play_parser):
+    """Add the options of the play actions to a parser.
+    """
+    play_parser.add_argument(
+        "--prayers",
+        type=str,
+        help="comma separated prayer index",
+        default="",
+    )
+    play_parser.add_argument(
+        "-r", "--record",
+        action="store_true",
+        help="record the game"
+    )
+    play_parser.add_argument(
+        "-rb", "--binary-record",
+        action="store_true",
+        help="record into a compact binary container instead of PNG files"
+    )
+    play_parser.add_argument(
+        "-rp", "--probes-only",
+        action="store_true",
+        help="record only the probe pixels of screenshots, in a binary container"
+    )
+    play_parser.add_argument(
+        "-rd", "--delta-record",
+        action="store_true",
+        help="record keyframes and changed blocks of screenshots, in a binary container"
+    )
+    play_parser.add_argument(
+        "-c", "--cache",
+        type=str,
+        help="path to a folder for caching parsed screenshots on disk",
+        default=None
+    )
+    play_parser.add_argument(
+        "-t", "--terrain-table",
+        type=str,
+        help="path to a compiled terrain classifier",
+        default=None
+    )
+    play_parser.add_argument(
+        "-pc", "--partial-capture",
+        action="store_true",
+        help="only transfer the screen rows needed for parsing"
+    )
+    play_parser.add_argument(
+        "-st", "--stream",
+        action="store_true",
+        help="continuously capture the screen in the background"
+    )
+    play_parser.add_argument(
+        "-sf", "--stable-frames",
+        type=int,
+        help="after an action, wait for the screen to be stable over this many samples"
+             " instead of waiting one second",
+        default=None
+    )
+    play_parser.add_argument(
+        "-pt", "--pacing-timeout",
+        type=float,
+        help="maximum waiting time after an action with --stable-frames, in seconds",
+        default=1.
+    )
+    play_parser.add_argument(
+        "-pl", "--pipeline",
+        action="store_true",
+        help="act asynchronously and search from the predicted next state meanwhile"
+    )
+    play_parser.add_argument(
+        "-po", "--ponder",
+        action="store_true",
+        help="search from the predicted next state while the game animates"
+    )
+    play_parser.add_argument(
+        "-ve", "--verify",
+        action="store_true",
+        help="parse screenshots by verifying the predicted state"
+    )
+    play_parser.add_argument(
+        "-bt", "--batch-taps",
+        action="store_true",
+        help="send all the touches of a move in a single command"
+    )
+    play_parser.add_argument(
+        "-td", "--tap-delay",
+        type=float,
+        help="delay between batched touches, in seconds",
+        default=0.
+    )
+    play_parser.add_argument(
+        "-ps", "--persistent-touch",
+        action="store_true",
+        help="send touches through a long-lived shell session"
+    )
+
+
 def main():
     """Argument parsing and action taking.
     """
@@ -160,22 +558,38 @@ def main():
     )
     subparsers = parser.add_subparsers(dest="action", required=True)
     play_parser = subparsers.add_parser("play")
-    play_parser.add_argument(
-        "--prayers",
+    add_play_arguments(play_parser)
+    play_many_parser = subparsers.add_parser("play-many")
+    play_many_parser.add_argument(
+        "serials",
         type=str,
-        help="comma separated prayer index",
-        default="",
+        nargs="+",
+        help="adb serials of the devices"
     )
-    play_parser.add_argument(
-        "-r", "--record",
+    play_many_parser.add_argument(
+        "-w", "--workers",
+        type=int,
+        help="number of brain worker processes",
+        default=None
+    )
+    play_many_parser.add_argument(
+        "-bs", "--brain-service",
         action="store_true",
-        help="record the game"
+        help="batch the searches of all devices in a shared brain service"
     )
+    play_many_parser.add_argument(
+        "-bd", "--max-batch-delay",
+        type=float,
+        help="maximum time the brain service waits for more requests, in seconds",
+        default=.005
+    )
+    add_play_arguments(play_many_parser)
     parse_parser = subparsers.add_parser("parse")
     parse_parser.add_argument(
         "-i", "--input",
         type=str,
-        help="game state notation or path to a screenshot"
+        help="game state notation, path to a screenshot, or folder, glob pattern or"
+             " text file listing screenshots for batch parsing"
     )
     parse_subparsers = parse_parser.add_subparsers()
     parse_parser.add_argument(
@@ -194,6 +608,37 @@ def main():
         action="store_true",
         help="save parts extracted during the screenshot observation to the disk"
     )
+    parse_parser.add_argument(
+        "-c", "--cache",
+        type=str,
+        help="path to a folder for caching parsed screenshots on disk",
+        default=None
+    )
+    parse_parser.add_argument(
+        "-t", "--terrain-table",
+        type=str,
+        help="path to a compiled terrain classifier, for batch parsing",
+        default=None
+    )
+    parse_parser.add_argument(
+        "-o", "--output",
+        type=str,
+        help="path to the JSON lines output of batch parsing, default is stdout",
+        default=None
+    )
+    parse_parser.add_argument(
+        "-w", "--workers",
+        type=int,
+        help="number of worker processes for batch parsing, default is the number"
+             " of processors",
+        default=None
+    )
+    parse_parser.add_argument(
+        "-cs", "--chunksize",
+        type=int,
+        help="number of screenshots sent to a worker at once, for batch parsing",
+        default=16
+    )
     parse_parser.add_argument(
         "-sr", "--show-ranges",
         action="store_true",
@@ -222,7 +667,130 @@ def main():
         help="move target y"
     )
     check_parser = subparsers.add_parser("check")
-    check_parser.add_argument("-i", "--input", type=str, help="path to the log file to check")
+    check_parser.add_argument(
+        "-i", "--input",
+        type=str,
+        help="path to a log file, binary container, recording folder or folder of"
+             " recordings to check, or glob pattern matching some"
+    )
+    check_parser.add_argument(
+        "-w", "--workers",
+        type=int,
+        help="number of worker processes, default is the number of processors",
+        default=None
+    )
+    check_parser.add_argument(
+        "-r", "--report",
+        type=str,
+        help="path to a report folder, to write mismatches and error rates as JSON"
+             " and skip recordings already checked",
+        default=None
+    )
+    export_parser = subparsers.add_parser("export")
+    export_parser.add_argument(
+        "-i", "--input",
+        type=str,
+        help="path to a log file, binary container, recording folder or folder of"
+             " recordings to export, or glob pattern matching some"
+    )
+    export_parser.add_argument(
+        "-o", "--output",
+        type=str,
+        help="path to the dataset folder"
+    )
+    convert_parser = subparsers.add_parser("convert")
+    convert_parser.add_argument("-i", "--input", type=str, help="path to the recording folder")
+    convert_parser.add_argument(
+        "-rp", "--probes-only",
+        action="store_true",
+        help="only store the probe pixels of screenshots"
+    )
+    convert_parser.add_argument(
+        "-d", "--delta",
+        action="store_true",
+        help="store keyframes and changed blocks of screenshots"
+    )
+    convert_parser.add_argument(
+        "-k", "--keyframe-interval",
+        type=int,
+        help="number of stored screenshots between two keyframes, with --delta",
+        default=10
+    )
+    benchmark_parser = subparsers.add_parser("benchmark-capture")
+    benchmark_parser.add_argument(
+        "-n", "--turns",
+        type=int,
+        help="number of captures per method",
+        default=20
+    )
+    taps_parser = subparsers.add_parser("benchmark-taps")
+    taps_parser.add_argument(
+        "-n", "--turns",
+        type=int,
+        help="number of moves per method",
+        default=20
+    )
+    taps_parser.add_argument(
+        "-td", "--tap-delay",
+        type=float,
+        help="delay between batched touches, in seconds",
+        default=0.
+    )
+    taps_parser.add_argument(
+        "-f", "--fake",
+        action="store_true",
+        help="connect to a local fake adb server instead of a device"
+    )
+    brain_parser = subparsers.add_parser("benchmark-brain")
+    brain_parser.add_argument(
+        "-c", "--controllers",
+        type=int,
+        help="number of simulated controllers",
+        default=4
+    )
+    brain_parser.add_argument(
+        "-n", "--turns",
+        type=int,
+        help="number of moves per controller",
+        default=20
+    )
+    brain_parser.add_argument(
+        "-th", "--think",
+        type=float,
+        help="time each controller spends between requests, in seconds",
+        default=.05
+    )
+    brain_parser.add_argument(
+        "-bd", "--max-batch-delay",
+        type=float,
+        help="maximum time the brain service waits for more requests, in seconds",
+        default=.005
+    )
+    compile_parser = subparsers.add_parser("compile")
+    compile_parser.add_argument(
+        "-i", "--input",
+        type=str,
+        help="path to a folder with one subfolder of parts per label"
+    )
+    compile_parser.add_argument(
+        "-k", "--kind",
+        type=str,
+        choices=["terrain", "prayer", "interface"],
+        default="terrain",
+        help="hand-written classifier to compare against"
+    )
+    compile_parser.add_argument(
+        "-o", "--output",
+        type=str,
+        help="path to the compiled classifier JSON file",
+        default=None
+    )
+    compile_parser.add_argument(
+        "-m", "--max-pixels",
+        type=int,
+        help="maximum number of pixels read by the compiled classifier",
+        default=16
+    )
     args = parser.parse_args()
     log_level = logging.INFO
     if args.verbose:
@@ -233,11 +801,27 @@ def main():
         log_level = logging.CRITICAL
     logging.basicConfig(level=log_level)
     if args.action == "play":
-        play(args.serial, args.prayers, args.record)
+        play(args)
+    elif args.action == "play-many":
+        play_many(args)
     elif args.action == "parse":
         parse(args)
     elif args.action == "check":
-        check(args.input)
+        check(args)
+    elif args.action == "export":
+        export_dataset(args)
+    elif args.action == "convert":
+        convert_recording(args)
+    elif args.action == "compile":
+        compile_classifier(args)
+    elif args.action == "benchmark-capture":
+        benchmark_capture(args)
+    elif args.action == "benchmark-taps":
+        benchmark_taps(args)
+    elif args.action == "benchmark-brain":
+        benchmark_brain(args)
 
 
-main()
+# Worker processes started by spawning import this module as `__mp_main__`
+if __name__ in ("__main__", "hoplite.__main__"):
+    main()
@@ -37,11 +37,18 @@ class Actuator:
     ----------
     monkey_runner_interface : hoplite.monkey_runner.MonkeyRunnerInterface.
         MonkeyRunner client.
+    batch : bool
+        Whether to send all the touches of a move in a single command, with
+        `hoplite.ppadb_runner.PurePythonAdbInterface.touch_many`.
+    tap_delay : float
+        Time to wait between two touches of a batch, in seconds.
 
     Attributes
     ----------
     monkey : hoplite.monkey_runner.MonkeyRunnerInterface
         MonkeyRunner client
+    batch
+    tap_delay
     BUTTON_BASH : tuple[int, int]
         Screen position of the bash button.
     BUTTON_LEAP : tuple[int, int]
@@ -67,8 +74,25 @@ class Actuator:
     EMBARK_EMBARK = 540, 710
     DEATH_OK = 540, 1616
 
-    def __init__(self, monkey_runner_interface):
+    def __init__(self, monkey_runner_interface, batch=False, tap_delay=0.):
         self.monkey = monkey_runner_interface
+        self.batch = batch
+        self.tap_delay = tap_delay
+
+    def touch(self, *points):
+        """Touch the screen at one or several points.
+
+        Parameters
+        ----------
+        *points : tuple[int, int]
+            Coordinates of the points to touch, in order.
+
+        """
+        if self.batch:
+            self.monkey.touch_many(points, self.tap_delay)
+            return
+        for point in points:
+            self.monkey.touch(*point)
 
     def walk(self, target):
         """Perform a simple walking move.
@@ -79,7 +103,7 @@ class Actuator:
             Tile to walk to.
 
         """
-        self.monkey.touch(*hexagonal_to_pixels(target))
+        self.touch(hexagonal_to_pixels(target))
 
     def button_move(self, target, button):
         """First touch a button, then touch another tile.
@@ -92,8 +116,7 @@ class Actuator:
             Screen position of the button to touch.
 
         """
-        self.monkey.touch(*button)
-        self.monkey.touch(*hexagonal_to_pixels(target))
+        self.touch(button, hexagonal_to_pixels(target))
 
     def leap(self, target):
         """Perform a leap move.
@@ -120,7 +143,7 @@ class Actuator:
 
         """
         if spinning:
-            self.monkey.touch(*Actuator.BUTTON_BASH)
+            self.touch(Actuator.BUTTON_BASH)
         else:
             self.button_move(target, Actuator.BUTTON_BASH)
 
@@ -156,9 +179,9 @@ class Actuator:
         elif isinstance(player_move, hoplite.game.moves.ThrowMove):
             self.throw(player_move.target)
         elif isinstance(player_move, hoplite.game.moves.AltarMove):
-            self.monkey.touch(*hexagonal_to_pixels(player_move.target))
+            self.touch(hexagonal_to_pixels(player_move.target))
         elif isinstance(player_move, hoplite.game.moves.IdleMove):
-            self.monkey.touch(*hexagonal_to_pixels(player_move.target))
+            self.touch(hexagonal_to_pixels(player_move.target))
 
     def close_interface(self, interface):
         """Take the required action to close an interface, meaning touching
@@ -173,13 +196,13 @@ class Actuator:
         LOGGER.debug("Closing interface %s", interface)
         if interface == hoplite.game.state.Interface.EMBARK:
             LOGGER.info("Embarking!")
-            self.monkey.touch(*self.EMBARK_EMBARK)
+            self.touch(self.EMBARK_EMBARK)
         elif interface == hoplite.game.state.Interface.FLEECE:
-            self.monkey.touch(*self.FLEECE_PICK_UP)
+            self.touch(self.FLEECE_PICK_UP)
         elif interface == hoplite.game.state.Interface.DEATH:
-            self.monkey.touch(*self.DEATH_OK)
+            self.touch(self.DEATH_OK)
         elif interface == hoplite.game.state.Interface.VICTORY:
-            self.monkey.touch(*self.VICTORY_OK)
+            self.touch(self.VICTORY_OK)
 
     def choose_prayer(self, altar, prayer):
         """Click on a prayer at the altar.
@@ -193,4 +216,4 @@ class Actuator:
 
         """
         observed_height = altar.prayers[prayer]
-        self.monkey.touch(540, observed_height + 50)
+        self.touch((540, observed_height + 50))
@@ -1,10 +1,14 @@
 """Game AI components.
 """
 
+import time
 import logging
+import threading
+import concurrent.futures
 import numpy
 import hoplite.game.demons
 import hoplite.game.status
+import hoplite.game.state
 
 
 LOGGER = logging.getLogger(__name__)
@@ -37,9 +41,22 @@ def extract_distance_feature(game_state, target):
     return len(path)
 
 
+def _pool_search(brain, data, excluded):
+    return brain.search_excluding(hoplite.game.state.GameState.from_bytes(data), excluded)
+
+
 class Brain:
     """Brain central unit: makes decisions.
 
+    Parameters
+    ----------
+    pool : concurrent.futures.ProcessPoolExecutor
+        If not `None`, worker processes where searches are run. A pool may be
+        shared by the brains of several controllers.
+    service : hoplite.brain_service.BrainService
+        If not `None`, shared service batching the searches of several
+        controllers. Takes precedence over `pool`.
+
     Attributes
     ----------
     demon_weights : dict[hoplite.game.demons.DemonSkill, float]
@@ -48,10 +65,27 @@ class Brain:
         Vector with the weights for the game state features.
     loops : dict[hoplite.game.state.GameState, list[hoplite.game.moves.PlayerMove]]
         Memory of already played moves, enabling loops avoidance.
+    ponder_hits : int
+        Number of moves picked from a pondering result.
+    ponder_misses : int
+        Number of pondering searches cancelled because the observed state
+        differed from the predicted one.
+    ponder_time_saved : float
+        Search time, in seconds, spent while pondering instead of while
+        picking moves.
+    pool
+    service
+    _ponder_executor : concurrent.futures.ThreadPoolExecutor
+        Worker for pondering searches, created when first needed.
+    _ponder : tuple[str, concurrent.futures.Future, threading.Event]
+        Representation of the predicted state, pending search, and event for
+        cancelling it, if pondering.
 
     """
 
-    def __init__(self):
+    def __init__(self, pool=None, service=None):
+        self.pool = pool
+        self.service = service
         self.demon_weights = {
             hoplite.game.demons.DemonSkill.FOOTMAN: 1,
             hoplite.game.demons.DemonSkill.DEMOLITIONIST: 2,
@@ -90,6 +124,11 @@ class Brain:
             hoplite.game.status.Prayer.STAGGERING_LEAP: -1,
         }
         self.loops = dict()
+        self.ponder_hits = 0
+        self.ponder_misses = 0
+        self.ponder_time_saved = 0
+        self._ponder_executor = None
+        self._ponder = None
 
     def extract(self, game_state):
         """Extract features of a game state. Values are manually scaled to
@@ -145,33 +184,196 @@ class Brain:
         """
         return self._evaluate(self.extract(game_state))
 
-    def pick_move(self, game_state):
-        """Pick the best move for the player to perform.
+    def __getstate__(self):
+        # Workers of the pool only need the weights
+        state = self.__dict__.copy()
+        state.update(pool=None, service=None, loops=dict(), _ponder_executor=None, _ponder=None)
+        return state
+
+    def search_excluding(self, game_state, excluded, cancel=None):
+        """Find the best move for the player to perform among the legal moves
+        that are not excluded.
 
         Parameters
         ----------
         game_state : hoplite.game.state.GameState
             Current game state.
+        excluded : set[hoplite.game.moves.PlayerMove]
+            Moves to ignore.
+        cancel : threading.Event
+            If given and set during the search, the search is aborted.
 
         Returns
         -------
         hoplite.game.moves.PlayerMove
-            Best legal move to perform according the the model.
+            Best legal move to perform according the the model, or `None` if
+            the search was cancelled.
 
         """
         outcomes = dict()
         for move in game_state.possible_moves():
+            if cancel is not None and cancel.is_set():
+                return None
             LOGGER.debug("Checking move: %s", move)
-            if move in self.loops.get(game_state, []):
+            if move in excluded:
                 LOGGER.debug("Ignoring move %s to avoid loops", move)
                 continue
             next_state = move.apply(game_state)
             evaluation = self.evaluate(next_state)
             outcomes[move] = evaluation
             LOGGER.debug("Evaluation of %s: %f", move, evaluation)
-        best_move = max(outcomes.items(), key=lambda x: x[1])[0]
+        return max(outcomes.items(), key=lambda x: x[1])[0]
+
+    def search_batch(self, game_states, excluded):
+        """Find the best moves for several game states at once, evaluating
+        all their outcomes as a single feature matrix.
+
+        Parameters
+        ----------
+        game_states : list[hoplite.game.state.GameState]
+            Game states to search moves for.
+        excluded : list[set[hoplite.game.moves.PlayerMove]]
+            Moves to ignore in each state.
+
+        Returns
+        -------
+        list[hoplite.game.moves.PlayerMove]
+            Best legal move for each state, or `None` for states without
+            legal moves.
+
+        """
+        moves, features, sizes = list(), list(), list()
+        for game_state, ignored in zip(game_states, excluded):
+            candidates = [move for move in game_state.possible_moves() if move not in ignored]
+            moves.append(candidates)
+            features += [self.extract(move.apply(game_state)) for move in candidates]
+            sizes.append(len(candidates))
+        evaluations = self._evaluate(numpy.array(features)) if features else None
+        best_moves = list()
+        offset = 0
+        for candidates, size in zip(moves, sizes):
+            if size == 0:
+                best_moves.append(None)
+                continue
+            best_moves.append(candidates[numpy.argmax(evaluations[offset:offset + size])])
+            offset += size
+        return best_moves
+
+    def search(self, game_state, cancel=None):
+        """Find the best move for the player to perform, without remembering
+        it for loops avoidance. If the brain has a `service` or a `pool`, the
+        search is run there, and cannot be cancelled once started.
+
+        Parameters
+        ----------
+        game_state : hoplite.game.state.GameState
+            Current game state.
+        cancel : threading.Event
+            If given and set during the search, the search is aborted.
+
+        Returns
+        -------
+        hoplite.game.moves.PlayerMove
+            Best legal move to perform according the the model, or `None` if
+            the search was cancelled.
+
+        """
+        excluded = set(self.loops.get(game_state, set()))
+        if self.service is not None:
+            return self.service.submit(game_state, excluded).result(self.service.timeout)
+        if self.pool is not None:
+            return self.pool.submit(_pool_search, self, game_state.to_bytes(), excluded).result()
+        return self.search_excluding(game_state, excluded, cancel)
+
+    def remember(self, game_state, move):
+        """Remember a move played in a game state, for loops avoidance.
+
+        Parameters
+        ----------
+        game_state : hoplite.game.state.GameState
+            Current game state.
+        move : hoplite.game.moves.PlayerMove
+            Move picked in that state.
+
+        """
         self.loops.setdefault(game_state, set())
-        self.loops[game_state].add(best_move)
+        self.loops[game_state].add(move)
+
+    def _timed_search(self, game_state, cancel):
+        time_start = time.time()
+        return self.search(game_state, cancel), time.time() - time_start
+
+    def ponder(self, game_state):
+        """Start searching the best move from a predicted state in a worker
+        thread, while the game animates. The result is used by the next call
+        to `pick_move` if its state has the same representation.
+
+        Parameters
+        ----------
+        game_state : hoplite.game.state.GameState
+            Predicted next state of the game.
+
+        """
+        self.stop_pondering()
+        if self._ponder_executor is None:
+            self._ponder_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        cancel = threading.Event()
+        self._ponder = (
+            repr(game_state),
+            self._ponder_executor.submit(self._timed_search, game_state, cancel),
+            cancel
+        )
+
+    def stop_pondering(self):
+        """Cancel the pending pondering search, if any.
+        """
+        if self._ponder is not None:
+            _, future, cancel = self._ponder
+            cancel.set()
+            future.cancel()
+            self._ponder = None
+
+    def _pondered_move(self, game_state):
+        if self._ponder is None:
+            return None
+        predicted, future, _ = self._ponder
+        if predicted != repr(game_state):
+            LOGGER.debug("Cancelling pondering, predicted %s", predicted)
+            self.stop_pondering()
+            self.ponder_misses += 1
+            return None
+        self._ponder = None
+        time_start = time.time()
+        move, duration = future.result()
+        self.ponder_hits += 1
+        self.ponder_time_saved += max(0, duration - (time.time() - time_start))
+        LOGGER.info(
+            "Ponder hit rate %d/%d, saved %.0f ms in total",
+            self.ponder_hits,
+            self.ponder_hits + self.ponder_misses,
+            1000 * self.ponder_time_saved
+        )
+        return move
+
+    def pick_move(self, game_state):
+        """Pick the best move for the player to perform. If the brain was
+        pondering on this state, the result of that search is used.
+
+        Parameters
+        ----------
+        game_state : hoplite.game.state.GameState
+            Current game state.
+
+        Returns
+        -------
+        hoplite.game.moves.PlayerMove
+            Best legal move to perform according the the model.
+
+        """
+        best_move = self._pondered_move(game_state)
+        if best_move is None:
+            best_move = self.search(game_state)
+        self.remember(game_state, best_move)
         LOGGER.info("Best move found: %s", best_move)
         return best_move
 
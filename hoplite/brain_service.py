@@ -0,0 +1,278 @@
+"""Brain shared by several controllers. Searches requested by all the
+controllers are gathered in a separate process, and each batch of requests
+is evaluated as a single feature matrix.
+"""
+
+import time
+import queue
+import logging
+import threading
+import multiprocessing
+import concurrent.futures
+import numpy
+import hoplite.brain
+import hoplite.game.state
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+def _serve(brain, requests, responses, max_delay, max_batch):
+    while True:
+        request = requests.get()
+        if request is None:
+            return
+        batch = [request]
+        deadline = time.time() + max_delay
+        while len(batch) < max_batch:
+            try:
+                request = requests.get(timeout=max(0, deadline - time.time()))
+            except queue.Empty:
+                break
+            if request is None:
+                requests.put(None)
+                break
+            batch.append(request)
+        try:
+            depth = requests.qsize()
+        except NotImplementedError:  # Not available on macOS
+            depth = -1
+        time_start = time.time()
+        try:
+            results = brain.search_batch(
+                [hoplite.game.state.GameState.from_bytes(data) for _, data, _ in batch],
+                [excluded for _, _, excluded in batch]
+            )
+        except Exception as error:  # pylint: disable=W0703
+            # Failing the requests of the batch is better than leaving the
+            # controllers waiting forever
+            LOGGER.exception("Search of a batch of %d requests failed", len(batch))
+            results = [error] * len(batch)
+        duration = time.time() - time_start
+        for (request_id, _, _), result in zip(batch, results):
+            if result is None:
+                result = ValueError("No legal move in this game state")
+            responses.put((request_id, result, len(batch), depth, duration))
+
+
+class BrainService:  # pylint: disable=R0902
+    """Process batching the searches of several brains.
+
+    Parameters
+    ----------
+    brain : hoplite.brain.Brain
+        Brain whose weights are used for evaluating states. Default weights
+        if `None`.
+    max_delay : float
+        Maximum time to wait for more requests once a first one is received,
+        in seconds.
+    max_batch : int
+        Maximum number of requests in a batch.
+    timeout : float
+        Maximum time, in seconds, a brain waits for the result of a request.
+
+    Attributes
+    ----------
+    batch_sizes : list[int]
+        Size of the batch each request was evaluated in.
+    queue_depths : list[int]
+        Number of requests still waiting when each batch was formed.
+    latencies : list[float]
+        Time between the submission and the result of each request, in
+        seconds.
+    evaluation_times : list[float]
+        Time spent evaluating the batch of each request, in seconds.
+    max_delay
+    max_batch
+    timeout
+    _requests : multiprocessing.Queue
+        Requests sent to the service process, with game states packed by
+        `hoplite.game.state.GameState.to_bytes`.
+    _responses : multiprocessing.Queue
+        Results sent back by the service process.
+    _pending : dict[int, tuple[concurrent.futures.Future, float]]
+        Future and submission time of requests waiting for a result.
+    _lock : threading.Lock
+        Lock for `_pending` and request identifiers.
+    _next_id : int
+        Identifier of the next request.
+    _process : multiprocessing.Process
+        Service process.
+    _dispatcher : threading.Thread
+        Thread resolving futures from the results.
+
+    """
+
+    def __init__(self, brain=None, max_delay=.005, max_batch=64, timeout=60.):
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self.batch_sizes = list()
+        self.queue_depths = list()
+        self.latencies = list()
+        self.evaluation_times = list()
+        self._requests = multiprocessing.Queue()
+        self._responses = multiprocessing.Queue()
+        self._pending = dict()
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._process = multiprocessing.Process(
+            target=_serve,
+            args=(
+                brain or hoplite.brain.Brain(),
+                self._requests,
+                self._responses,
+                max_delay,
+                max_batch
+            ),
+            daemon=True
+        )
+        self._dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+
+    def start(self):
+        """Start the service process.
+        """
+        self._process.start()
+        self._dispatcher.start()
+
+    def stop(self):
+        """Stop the service process, once the submitted requests are done.
+        """
+        self._requests.put(None)
+        self._process.join()
+        self._responses.put(None)
+        self._dispatcher.join()
+
+    def _dispatch(self):
+        while True:
+            response = self._responses.get()
+            if response is None:
+                return
+            request_id, result, batch_size, depth, duration = response
+            with self._lock:
+                future, time_submitted = self._pending.pop(request_id)
+            self.batch_sizes.append(batch_size)
+            self.queue_depths.append(depth)
+            self.evaluation_times.append(duration)
+            self.latencies.append(time.time() - time_submitted)
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def submit(self, game_state, excluded):
+        """Request the best move for a game state.
+
+        Parameters
+        ----------
+        game_state : hoplite.game.state.GameState
+            Current game state.
+        excluded : set[hoplite.game.moves.PlayerMove]
+            Moves to ignore.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Future best move. It raises the error of the search if it failed,
+            and `ValueError` if the state has no legal move.
+
+        """
+        future = concurrent.futures.Future()
+        with self._lock:
+            request_id = self._next_id
+            self._next_id += 1
+            self._pending[request_id] = future, time.time()
+        self._requests.put((request_id, game_state.to_bytes(), excluded))
+        return future
+
+    def metrics(self):
+        """Summarize the service activity.
+
+        Returns
+        -------
+        dict[str, float]
+            Number of requests, average and maximum batch size, average and
+            maximum queue depth, average evaluation time and average and 95th
+            percentile request latency in milliseconds.
+
+        """
+        if not self.latencies:
+            return {"requests": 0}
+        return {
+            "requests": len(self.latencies),
+            "batch_size": numpy.mean(self.batch_sizes),
+            "max_batch_size": max(self.batch_sizes),
+            "queue_depth": numpy.mean(self.queue_depths),
+            "max_queue_depth": max(self.queue_depths),
+            "evaluation_ms": 1000 * numpy.mean(self.evaluation_times),
+            "latency_ms": 1000 * numpy.mean(self.latencies),
+            "latency_p95_ms": 1000 * numpy.percentile(self.latencies, 95),
+        }
+
+
+def random_state(rng, demons=6):
+    """Generate a random game state, for simulating controllers.
+
+    Parameters
+    ----------
+    rng : numpy.random.Generator
+        Random generator.
+    demons : int
+        Number of demons on the terrain.
+
+    Returns
+    -------
+    hoplite.game.state.GameState
+        Game state with a player, stairs, demons and a few magma tiles.
+
+    """
+    tiles = ["0"] * 79
+    indices = rng.choice(79, demons + 6, replace=False)
+    tiles[indices[0]] = "a"
+    tiles[indices[1]] = "b"
+    for index in indices[2:demons + 2]:
+        tiles[index] = rng.choice(["2", "3", "4", "6"])
+    for index in indices[demons + 2:]:
+        tiles[index] = "1"
+    return hoplite.game.state.GameState.from_string(
+        "1;%s;0/100/1/3/0/-" % "".join(tiles))
+
+
+def simulate(search, controllers=4, turns=20, think=.05, seed=0):
+    """Simulate controllers requesting moves concurrently.
+
+    Parameters
+    ----------
+    search : Callable[[hoplite.game.state.GameState], hoplite.game.moves.PlayerMove]
+        Search function, e.g. `hoplite.brain.Brain.search`.
+    controllers : int
+        Number of simulated controllers, each in its own thread.
+    turns : int
+        Number of moves requested by each controller.
+    think : float
+        Time each controller spends between requests, simulating capture,
+        parsing and acting, in seconds.
+    seed : int
+        Seed of the random states.
+
+    Returns
+    -------
+    float
+        Total number of moves found per second.
+
+    """
+    rng = numpy.random.default_rng(seed)
+    states = [[random_state(rng) for _ in range(turns)] for _ in range(controllers)]
+
+    def run(game_states):
+        for game_state in game_states:
+            time.sleep(think)
+            search(game_state)
+
+    threads = [threading.Thread(target=run, args=(game_states,)) for game_states in states]
+    time_start = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return controllers * turns / (time.time() - time_start)
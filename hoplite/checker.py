@@ -0,0 +1,511 @@
+"""Check recordings for errors in the states predicted by the game engine.
+Each recording is streamed line by line, and each recorded state is parsed
+once. Several recordings are checked in parallel by a process pool, and
+results can be accumulated into a machine-readable `Report`.
+"""
+
+import os
+import json
+import hashlib
+import collections
+import concurrent.futures
+import logging
+import hoplite.recording
+import hoplite.game.state
+import hoplite.game.moves
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Mismatch:  # pylint: disable=R0903
+    """Difference between a predicted state and the recorded one.
+
+    Parameters
+    ----------
+    prev_turn : int
+        Turn the move was picked at.
+    next_turn : int
+        Turn the next state was recorded at.
+    state : str
+        Representation of the state the move was picked in.
+    move : str
+        Representation of the move.
+    fields : list[tuple[str, str, str]]
+        Name, expected and predicted representation of each wrong field.
+
+    Attributes
+    ----------
+    prev_turn
+    next_turn
+    state
+    move
+    fields
+
+    """
+
+    def __init__(self, prev_turn, next_turn, state, move, fields):  # pylint: disable=R0913
+        self.prev_turn = prev_turn
+        self.next_turn = next_turn
+        self.state = state
+        self.move = move
+        self.fields = fields
+
+
+class CheckResult:
+    """Outcome of checking one or several recordings.
+
+    Parameters
+    ----------
+    path : str
+        Path to the checked recording.
+
+    Attributes
+    ----------
+    CATEGORIES : tuple[str]
+        Categories predictions are counted by: move type (e.g. `"bash"`),
+        each prayer the player had, depth, and whole prayer set (e.g.
+        `"FORTITUDE,MIGHTY_BASH"`, or `"-"` for none).
+    predictions : int
+        Number of checked predictions.
+    mismatches : list[Mismatch]
+        Wrong predictions.
+    totals : dict[str, collections.Counter]
+        Number of predictions per key, for each category.
+    failures : dict[str, collections.Counter]
+        Number of wrong predictions per key, for each category.
+    path
+
+    """
+
+    CATEGORIES = ("move", "prayer", "depth", "prayers")
+
+    def __init__(self, path=None):
+        self.path = path
+        self.predictions = 0
+        self.mismatches = list()
+        self.totals = {category: collections.Counter() for category in CheckResult.CATEGORIES}
+        self.failures = {category: collections.Counter() for category in CheckResult.CATEGORIES}
+
+    def add(self, prev_state, move, mismatch):
+        """Count a prediction.
+
+        Parameters
+        ----------
+        prev_state : hoplite.game.state.GameState
+            State the move was picked in.
+        move : hoplite.game.moves.PlayerMove
+            Checked move.
+        mismatch : Mismatch
+            Difference with the recorded state, `None` if the prediction was
+            right.
+
+        """
+        prayers = sorted({prayer.name for prayer in prev_state.status.prayers})
+        keys = {
+            "move": [repr(move).split("/")[0]],
+            "prayer": prayers,
+            "depth": [str(prev_state.depth)],
+            "prayers": [",".join(prayers) or "-"],
+        }
+        self.predictions += 1
+        for category in CheckResult.CATEGORIES:
+            self.totals[category].update(keys[category])
+        if mismatch is not None:
+            self.mismatches.append(mismatch)
+            for category in CheckResult.CATEGORIES:
+                self.failures[category].update(keys[category])
+
+    def merge(self, other):
+        """Add the counts of another result to this one, without its
+        mismatches.
+
+        Parameters
+        ----------
+        other : CheckResult
+            Result to merge.
+
+        """
+        self.predictions += other.predictions
+        for category in CheckResult.CATEGORIES:
+            self.totals[category].update(other.totals[category])
+            self.failures[category].update(other.failures[category])
+
+    @property
+    def errors(self):
+        """Number of wrong predictions.
+        """
+        return sum(self.failures["move"].values())
+
+    def rates(self, category):
+        """Compute the error rates of a category.
+
+        Parameters
+        ----------
+        category : str
+            One of `CATEGORIES`.
+
+        Returns
+        -------
+        dict[str, dict[str, float]]
+            Number of predictions, errors and error rate per key, by
+            decreasing number of predictions.
+
+        """
+        return {
+            key: {
+                "predictions": total,
+                "errors": self.failures[category][key],
+                "rate": self.failures[category][key] / total,
+            }
+            for key, total in self.totals[category].most_common()
+        }
+
+    def to_dict(self):
+        """Serialize the counts, without the mismatches.
+
+        Returns
+        -------
+        dict
+            JSON serializable counts.
+
+        """
+        return {
+            "predictions": self.predictions,
+            "totals": {category: dict(counter) for category, counter in self.totals.items()},
+            "failures": {category: dict(counter) for category, counter in self.failures.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data, path=None):
+        """Deserialize counts written by `to_dict`.
+
+        Parameters
+        ----------
+        data : dict
+            Serialized counts.
+        path : str
+            Path to the checked recording.
+
+        Returns
+        -------
+        CheckResult
+            Result without mismatches.
+
+        """
+        result = cls(path)
+        result.predictions = data["predictions"]
+        for category in CheckResult.CATEGORIES:
+            result.totals[category].update(data["totals"][category])
+            result.failures[category].update(data["failures"][category])
+        return result
+
+
+def parse_record(line):
+    """Split a log line and parse the state of move records.
+
+    Parameters
+    ----------
+    line : str
+        Log line.
+
+    Returns
+    -------
+    tuple[int, hoplite.game.state.GameState, str]
+        Turn, game state and move representation of a move record, or turn,
+        `None` and `None` for other records.
+
+    """
+    fields = line.rstrip("\n").split("\t")
+    if fields[1] != "move":
+        return int(fields[0]), None, None
+    return int(fields[0]), hoplite.game.state.GameState.from_string(fields[2]), fields[3]
+
+
+def compare(prev_state, move, groundtruth):
+    """Compare the predicted outcome of a move with the recorded one.
+
+    Parameters
+    ----------
+    prev_state : hoplite.game.state.GameState
+        State the move was picked in.
+    move : hoplite.game.moves.PlayerMove
+        Move picked.
+    groundtruth : hoplite.game.state.GameState
+        Next recorded state.
+
+    Returns
+    -------
+    list[tuple[str, str, str]]
+        Name, expected and predicted representation of each wrong field.
+
+    """
+    prediction = move.apply(prev_state)
+    prediction.status.cooldown = max(0, prediction.status.cooldown - 1)
+    fields = list()
+    if prediction.status != groundtruth.status:
+        fields.append(("Status", repr(groundtruth.status), repr(prediction.status)))
+    if prediction.terrain.player != groundtruth.terrain.player:
+        fields.append((
+            "Player position",
+            repr(groundtruth.terrain.player),
+            repr(prediction.terrain.player)
+        ))
+    return fields
+
+
+def check_recording(path):
+    """Check the predictions between consecutive move records of a recording.
+
+    Parameters
+    ----------
+    path : str
+        Path to a log file, a container or a recording folder.
+
+    Returns
+    -------
+    CheckResult
+        Outcome of the check.
+
+    """
+    result = CheckResult(path)
+    previous = None, None, None
+    for line in hoplite.recording.iter_lines(path):
+        current = parse_record(line)
+        prev_turn, prev_state, prev_move = previous
+        next_turn, groundtruth, _ = current
+        previous = current
+        if prev_state is None or groundtruth is None:
+            continue
+        if prev_state.depth != groundtruth.depth:
+            continue
+        move = hoplite.game.moves.PlayerMove.from_string(prev_move)
+        fields = compare(prev_state, move, groundtruth)
+        mismatch = None
+        if fields:
+            mismatch = Mismatch(prev_turn, next_turn, repr(prev_state), prev_move, fields)
+        result.add(prev_state, move, mismatch)
+    return result
+
+
+def check_recordings(paths, workers=None):
+    """Check several recordings in parallel.
+
+    Parameters
+    ----------
+    paths : list[str]
+        Paths to log files, containers or recording folders.
+    workers : int
+        Number of worker processes, default is the number of processors. With
+        1, recordings are checked in the current process.
+
+    Returns
+    -------
+    Iterator[CheckResult]
+        Outcome of the check of each recording, in the order of `paths`.
+
+    """
+    if workers == 1 or len(paths) <= 1:
+        yield from map(check_recording, paths)
+        return
+    workers = workers or os.cpu_count()
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        chunksize = max(1, len(paths) // (4 * workers))
+        yield from executor.map(check_recording, paths, chunksize=chunksize)
+
+
+def fingerprint(path):
+    """Hash the log of a recording.
+
+    Parameters
+    ----------
+    path : str
+        Path to a log file, a container or a recording folder.
+
+    Returns
+    -------
+    str
+        Hexadecimal digest of the file holding the log lines.
+
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(hoplite.recording.log_path(path), "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _rewrite(path, lines):
+    """Atomically replace the content of a file with some of its lines.
+    """
+    with open(path + ".tmp", "w") as file:
+        file.writelines(lines)
+    os.replace(path + ".tmp", path)
+
+
+class Report:
+    """Machine-readable accuracy report, updated incrementally. A report
+    folder holds:
+
+    - `mismatches.jsonl`, one record per wrong field of a prediction, with
+      the hash of the log of its recording;
+    - `index.jsonl`, one record per checked recording, with the hash of its
+      log and its counts, so that recordings are only checked once;
+    - `summary.json`, error rates over all checked recordings, by move type,
+      depth, prayer and prayer set.
+
+    Parameters
+    ----------
+    directory : str
+        Path to the report folder, created if missing. Mismatches of
+        recordings missing from the index, e.g. left by an interrupted run,
+        are discarded, as these recordings will be checked again, and so are
+        truncated index entries.
+
+    Attributes
+    ----------
+    MISMATCHES_FILENAME : str
+        Basename of the mismatch records.
+    INDEX_FILENAME : str
+        Basename of the index.
+    SUMMARY_FILENAME : str
+        Basename of the summary.
+    directory
+    index : dict[str, CheckResult]
+        Counts of the checked recordings, by log hash.
+
+    """
+
+    MISMATCHES_FILENAME = "mismatches.jsonl"
+    INDEX_FILENAME = "index.jsonl"
+    SUMMARY_FILENAME = "summary.json"
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.index = dict()
+        path = os.path.join(directory, Report.INDEX_FILENAME)
+        if os.path.isfile(path):
+            kept, discarded = list(), 0
+            with open(path, "r") as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        discarded += 1
+                        continue
+                    kept.append(line)
+                    self.index[entry["hash"]] = CheckResult.from_dict(
+                        entry["result"], entry["path"])
+            if discarded > 0:
+                # Later entries would otherwise be appended to the truncated line
+                LOGGER.warning("Discarding %d truncated index entries in %s", discarded, path)
+                _rewrite(path, kept)
+        self._discard_orphans()
+
+    def _discard_orphans(self):
+        path = os.path.join(self.directory, Report.MISMATCHES_FILENAME)
+        if not os.path.isfile(path):
+            return
+        kept, discarded = list(), 0
+        with open(path, "r") as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    indexed = False
+                else:
+                    # Records of older reports have no hash and are kept
+                    indexed = "hash" not in record or record["hash"] in self.index
+                if indexed:
+                    kept.append(line)
+                else:
+                    discarded += 1
+        if discarded == 0:
+            return
+        LOGGER.warning("Discarding %d mismatches of recordings missing from the index", discarded)
+        _rewrite(path, kept)
+
+    def pending(self, paths):
+        """Filter out recordings that were already checked.
+
+        Parameters
+        ----------
+        paths : list[str]
+            Paths to log files, containers or recording folders.
+
+        Returns
+        -------
+        list[tuple[str, str]]
+            Path and log hash of the recordings left to check.
+
+        """
+        pending = list()
+        for path in paths:
+            digest = fingerprint(path)
+            if digest not in self.index:
+                pending.append((path, digest))
+        return pending
+
+    def add(self, result, digest):
+        """Write the mismatches of a recording and add it to the index. The
+        recording only counts as checked once its index entry is written.
+
+        Parameters
+        ----------
+        result : CheckResult
+            Outcome of the check of the recording.
+        digest : str
+            Hash of its log, from `fingerprint`.
+
+        """
+        with open(os.path.join(self.directory, Report.MISMATCHES_FILENAME), "a") as file:
+            for mismatch in result.mismatches:
+                for field, expected, predicted in mismatch.fields:
+                    file.write(json.dumps({
+                        "recording": result.path,
+                        "hash": digest,
+                        "turn": mismatch.prev_turn,
+                        "next_turn": mismatch.next_turn,
+                        "state": mismatch.state,
+                        "move": mismatch.move,
+                        "field": field,
+                        "expected": expected,
+                        "predicted": predicted,
+                    }) + "\n")
+        with open(os.path.join(self.directory, Report.INDEX_FILENAME), "a") as file:
+            file.write(json.dumps({
+                "hash": digest,
+                "path": result.path,
+                "result": result.to_dict(),
+            }) + "\n")
+        self.index[digest] = result
+
+    def summary(self):
+        """Merge the counts of all the checked recordings.
+
+        Returns
+        -------
+        CheckResult
+            Merged counts.
+
+        """
+        summary = CheckResult()
+        for result in self.index.values():
+            summary.merge(result)
+        return summary
+
+    def save(self):
+        """Write the summary of all the checked recordings.
+        """
+        summary = self.summary()
+        data = {
+            "recordings": len(self.index),
+            "predictions": summary.predictions,
+            "errors": summary.errors,
+            "rate": summary.errors / max(1, summary.predictions),
+        }
+        for category in CheckResult.CATEGORIES:
+            data[category] = summary.rates(category)
+        with open(os.path.join(self.directory, Report.SUMMARY_FILENAME), "w") as file:
+            json.dump(data, file, indent=4)
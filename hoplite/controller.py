@@ -4,22 +4,40 @@ the `hoplite.brain.Brain` the `hoplite.actuator.Actuator`. Plays the game.
 
 import os
 import time
+import queue
 import logging
+import threading
+import concurrent.futures
+import numpy
 import hoplite
+import hoplite.recording
 import hoplite.game.state
 
 
 LOGGER = logging.getLogger(__name__)
 
 
-class Recorder:
+class Recorder:  # pylint: disable=R0902
     """Game recorder. Records states and screenshots encountered while playing
-    the game.
+    the game. Records are written by a background thread, so that saving
+    screenshots does not slow the controller down.
 
     Parameters
     ----------
     observer : hoplite.vision.observer.Observer
         Reference to an observer to save the screenshots from.
+    capacity : int
+        Maximum number of records waiting to be written. When full, the
+        screenshots of new records are dropped, and the controller waits for
+        their log line to be queued.
+    binary : bool
+        Write records into a binary container (see `hoplite.recording`)
+        instead of a log file and PNG screenshots.
+    probes_only : bool
+        With `binary`, only store the probe pixels of the screenshots.
+    delta : bool
+        With `binary`, store a keyframe every few turns and only the changed
+        blocks of pixels in between.
 
     Attributes
     ----------
@@ -29,15 +47,33 @@ class Recorder:
         Path to the folder containing all recordings.
     FILENAME : str
         Basename of the file containing the state logs.
+    dropped : int
+        Number of screenshots dropped because the writer was late.
     observer
+    binary
+    probes_only
+    delta
+    _queue : queue.Queue
+        Records waiting to be written, as (turn, screenshot, line), or `None`
+        to stop the writer.
+    _file : io.TextIOWrapper
+        Buffered log file, open while recording.
+    _writer : hoplite.recording.RecordingWriter
+        Binary container, open while recording with `binary`.
+    _thread : threading.Thread
+        Writer thread.
 
     """
 
     DIRECTORY = "recordings"
     FILENAME = "game.log"
 
-    def __init__(self, observer):
+    def __init__(self, observer, capacity=16, binary=False, probes_only=False,  # pylint: disable=R0913
+                 delta=False):
         self.observer = observer
+        self.binary = binary
+        self.probes_only = probes_only
+        self.delta = delta
         if not os.path.isdir(Recorder.DIRECTORY):
             LOGGER.info(
                 "Creating recordings directory at '%s'",
@@ -45,24 +81,85 @@ class Recorder:
             )
             os.mkdir(Recorder.DIRECTORY)
         self.folder = None
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=capacity)
+        self._file = None
+        self._writer = None
+        self._thread = None
+
+    def _open_writer(self, folder):
+        if self.delta and not self.probes_only:
+            return hoplite.recording.RecordingWriter(folder, hoplite.recording.FrameMode.DELTA)
+        if not self.probes_only:
+            return hoplite.recording.RecordingWriter(folder)
+        sampler = self.observer.parser.sample_screen_probes
+        return hoplite.recording.RecordingWriter(
+            folder,
+            hoplite.recording.FrameMode.PROBES,
+            sampler(numpy.zeros((1920, 1080, 3), dtype=numpy.float32)).shape,
+            sampler
+        )
 
     def start(self):
-        """Create the folder structure for the recording.
+        """Create the folder structure for the recording, and start the
+        writer thread.
         """
         index = len(next(os.walk(Recorder.DIRECTORY))[1]) + 1
         self.folder = str(index).rjust(3, "0")
         os.mkdir(os.path.join(Recorder.DIRECTORY, self.folder))
         LOGGER.info("Initializing recording at %s", os.path.realpath(self.folder))
-        open(os.path.join(Recorder.DIRECTORY, self.folder, Recorder.FILENAME), "w").close()
+        if self.binary:
+            self._writer = self._open_writer(os.path.join(Recorder.DIRECTORY, self.folder))
+        else:
+            self._file = open(os.path.join(Recorder.DIRECTORY, self.folder, Recorder.FILENAME), "w")
+        self._thread = threading.Thread(target=self._write, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Write the pending records and close the log file.
+        """
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        else:
+            self._file.close()
+        LOGGER.info("Recording closed, %d screenshots dropped", self.dropped)
+
+    def _write(self):
+        while True:
+            record = self._queue.get()
+            if record is None:
+                if self._writer is None:
+                    self._file.flush()
+                return
+            turn, screenshot, line = record
+            if self._writer is not None:
+                self._writer.append(turn, line, screenshot)
+                if self._queue.empty():
+                    self._writer.flush()
+                continue
+            if screenshot is not None:
+                self.observer.save_screenshot(os.path.join(
+                    Recorder.DIRECTORY,
+                    self.folder,
+                    str(turn).rjust(3, "0") + ".png"
+                ), screenshot)
+            self._file.write("%s\t%s\n" % (str(turn).rjust(3, "0"), line))
+            if self._queue.empty():
+                self._file.flush()
 
     def _record(self, turn, line):
-        self.observer.save_screenshot(os.path.join(
-            Recorder.DIRECTORY,
-            self.folder,
-            str(turn).rjust(3, "0") + ".png"
-        ))
-        with open(os.path.join(Recorder.DIRECTORY, self.folder, Recorder.FILENAME), "a") as file:
-            file.write("%s\t%s\n" % (str(turn).rjust(3, "0"), line))
+        try:
+            self._queue.put_nowait((turn, self.observer.screenshot, line))
+        except queue.Full:
+            self.dropped += 1
+            LOGGER.warning("Recorder is late, dropping screenshot of turn %d", turn)
+            self._queue.put((turn, None, line))
 
     def record_move(self, turn, game_state, move):
         """Append a move record.
@@ -110,6 +207,18 @@ class Controller:  # pylint: disable=R0902
         Prayers to artificially add to the first encountered game status.
     recorder : Recorder
         Game recorder.
+    stable_frames : int
+        If not `None`, after each action, wait for the screen to be the same
+        over this many consecutive samples instead of waiting one second.
+    pacing_timeout : float
+        Maximum waiting time after an action when `stable_frames` is set,
+        in seconds.
+    ponder : bool
+        Whether the brain should search from the predicted next state while
+        the game animates, see `hoplite.brain.Brain.ponder`.
+    verify : bool
+        Whether to parse the next screenshot by verifying the predicted next
+        state, see `hoplite.vision.observer.Observer.parse_game`.
 
     Attributes
     ----------
@@ -120,45 +229,137 @@ class Controller:  # pylint: disable=R0902
     turn : int
         Current controller turn; may differ from internal game's turn count,
         as interface here count as full turns.
+    expected : hoplite.game.state.GameState
+        Predicted state of the game, to verify at the next turn.
+    wait_times : list[float]
+        Time spent waiting after each action, in seconds.
     observer
     actuator
     brain
     starting_prayers
+    stable_frames
+    pacing_timeout
+    ponder
+    verify
 
     """
 
-    def __init__(self, observer, actuator, brain, starting_prayers=None, recorder=None):  # pylint: disable=R0913
+    def __init__(self, observer, actuator, brain, starting_prayers=None, recorder=None,  # pylint: disable=R0913
+                 stable_frames=None, pacing_timeout=1., ponder=False, verify=False):
         self.observer = observer
         self.actuator = actuator
         self.brain = brain
         self.starting_prayers = starting_prayers
         self.recorder = recorder
+        self.stable_frames = stable_frames
+        self.pacing_timeout = pacing_timeout
+        self.ponder = ponder
+        self.verify = verify
         self.stop = False
         self.memory = None
+        self.expected = None
         self.turn = 1
+        self.wait_times = list()
+
+    def wait(self):
+        """Wait for the game to be ready for the next turn.
+        """
+        if self.stable_frames is None:
+            time.sleep(1)
+            return
+        waited, stable = self.observer.wait_stable(self.stable_frames, self.pacing_timeout)
+        self.wait_times.append(waited)
+        LOGGER.info(
+            "Turn %d: waited %.0f ms%s (average %.0f ms)",
+            self.turn,
+            1000 * waited,
+            "" if stable else ", screen still changing",
+            1000 * sum(self.wait_times) / len(self.wait_times)
+        )
+
+    def capture(self):
+        """Take a screenshot and check the currently displayed interface.
+
+        Returns
+        -------
+        hoplite.game.state.Interface
+            Interface recognized by the game.
+
+        """
+        return self.observer.fetch_screenshot()
+
+    def observe_game(self):
+        """Parse the game screenshot and update the memory with it.
+        """
+        game = self.observer.parse_game(self.expected)
+        self.expected = None
+        if self.memory is None:
+            self.memory = game
+            if self.starting_prayers:
+                for prayer in self.starting_prayers:
+                    self.memory.status.add_prayer(prayer, False)
+        else:
+            self.memory.update(game)
+
+    def predict(self, move):
+        """Predict the next game state, once the move is performed.
+
+        Parameters
+        ----------
+        move : hoplite.game.moves.PlayerMove
+            Move performed in the current state.
+
+        Returns
+        -------
+        hoplite.game.state.GameState
+            Predicted state of the game at the next turn.
+
+        """
+        prediction = move.apply(self.memory)
+        prediction.status.cooldown = max(0, prediction.status.cooldown - 1)
+        return prediction
+
+    def anticipate(self, move):
+        """Predict the next state after performing a move, to ponder on it
+        and to verify it, depending on the `ponder` and `verify` settings.
+
+        Parameters
+        ----------
+        move : hoplite.game.moves.PlayerMove
+            Move being performed in the current state.
+
+        """
+        if not self.ponder and not self.verify:
+            return
+        prediction = self.predict(move)
+        if self.ponder:
+            self.brain.ponder(prediction)
+        if self.verify:
+            self.expected = prediction
+
+    def play_turn(self):
+        """Recognize the game state, pick a move and perform it.
+        """
+        self.observe_game()
+        LOGGER.info("Current evaluation: %.2f", self.brain.evaluate(self.memory))
+        move = self.brain.pick_move(self.memory)
+        self.actuator.make_move(
+            move,
+            spinning=hoplite.game.status.Prayer.SPINNING_BASH in self.memory.status.prayers
+        )
+        self.anticipate(move)
+        if self.recorder is not None:
+            self.recorder.record_move(self.turn, self.memory, move)
 
     def step(self):  # pylint: disable=R0912
         """One step of the game: recognition, decision and action.
         """
-        interface = self.observer.fetch_screenshot()
+        interface = self.capture()
         LOGGER.debug("Interface: %s", interface)
+        if interface != hoplite.game.state.Interface.PLAYING:
+            self.expected = None
         if interface == hoplite.game.state.Interface.PLAYING:
-            game = self.observer.parse_game()
-            if self.memory is None:
-                self.memory = game
-                if self.starting_prayers:
-                    for prayer in self.starting_prayers:
-                        self.memory.status.add_prayer(prayer, False)
-            else:
-                self.memory.update(game)
-            LOGGER.info("Current evaluation: %.2f", self.brain.evaluate(self.memory))
-            move = self.brain.pick_move(self.memory)
-            self.actuator.make_move(
-                move,
-                spinning=hoplite.game.status.Prayer.SPINNING_BASH in self.memory.status.prayers
-            )
-            if self.recorder is not None:
-                self.recorder.record_move(self.turn, self.memory, move)
+            self.play_turn()
         elif interface == hoplite.game.state.Interface.EMBARK:
             self.actuator.close_interface(interface)
         elif interface == hoplite.game.state.Interface.DEATH:
@@ -182,7 +383,8 @@ class Controller:  # pylint: disable=R0902
             self.stop = True
             LOGGER.info("Reached the stairs!")
         self.turn += 1
-        time.sleep(1)
+        if not self.stop:
+            self.wait()
 
     def run(self):
         """Main loop. Stops when the `stop` attribute is `False`.
@@ -193,3 +395,95 @@ class Controller:  # pylint: disable=R0902
             except KeyboardInterrupt:
                 LOGGER.warning("Interrupting the controller.")
                 self.stop = True
+
+
+class PipelinedController(Controller):
+    """Game controller overlapping the stages of a turn. Taps are dispatched
+    to a worker thread, and while the device performs and animates the move,
+    the brain ponders on the predicted next state (see
+    `hoplite.brain.Brain.ponder`). With `hoplite.vision.observer.Observer`
+    streaming frames, captures are read in the background as well, but the
+    frame used is decoded when it is fetched, on the controller thread.
+
+    Parameters
+    ----------
+    *args
+        Arguments for the `Controller` constructor.
+    ponder : bool
+        Whether to ponder on the predicted next state while the move is
+        performed, enabled by default.
+    **kwargs
+        Keyword arguments for the `Controller` constructor.
+
+    Attributes
+    ----------
+    STAGES : tuple[str]
+        Names of the stages of a turn.
+    stage_times : dict[str, list[float]]
+        Durations of each stage, in seconds.
+    _actions : concurrent.futures.ThreadPoolExecutor
+        Worker performing taps.
+    _action : concurrent.futures.Future
+        Pending action, if any.
+
+    """
+
+    STAGES = ("capture", "parse", "brain", "act", "wait")
+
+    def __init__(self, *args, ponder=True, **kwargs):
+        super().__init__(*args, ponder=ponder, **kwargs)
+        self.stage_times = {stage: list() for stage in self.STAGES}
+        self._actions = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self._action = None
+
+    def _timed(self, stage, function, *args, **kwargs):
+        time_start = time.time()
+        result = function(*args, **kwargs)
+        self.stage_times[stage].append(time.time() - time_start)
+        return result
+
+    def capture(self):
+        return self._timed("capture", super().capture)
+
+    def play_turn(self):
+        self._timed("parse", self.observe_game)
+        LOGGER.info("Current evaluation: %.2f", self.brain.evaluate(self.memory))
+        move = self._timed("brain", self.brain.pick_move, self.memory)
+        self._action = self._actions.submit(
+            self._timed,
+            "act",
+            self.actuator.make_move,
+            move,
+            spinning=hoplite.game.status.Prayer.SPINNING_BASH in self.memory.status.prayers
+        )
+        self.anticipate(move)
+        if self.recorder is not None:
+            self.recorder.record_move(self.turn, self.memory, move)
+
+    def wait(self):
+        if self._action is not None:
+            self._action.result()
+            self._action = None
+        self._timed("wait", super().wait)
+        self.report()
+
+    def report(self):
+        """Log the average latency of each stage of a turn.
+        """
+        latencies = {
+            stage: 1000 * sum(times) / len(times)
+            for stage, times in self.stage_times.items()
+            if len(times) > 0
+        }
+        LOGGER.info(
+            "Turn %d latency: %s, total %.0f ms",
+            self.turn,
+            ", ".join("%s %.0f ms" % item for item in latencies.items()),
+            sum(latencies.values())
+        )
+
+    def run(self):
+        try:
+            super().run()
+        finally:
+            self._actions.shutdown(wait=True)
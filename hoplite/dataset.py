@@ -0,0 +1,179 @@
+"""Columnar dataset of recorded moves, for vectorized analysis of the states
+and of the engine predictions. A dataset is a folder with one `.npy` file per
+column, every column having one row per move record:
+
+- `terrain`, `next_terrain`: `(N, 79)` `uint8` arrays of
+  `hoplite.game.terrain.SurfaceElement` values, in the order of
+  `hoplite.utils.SURFACE_COORDINATES`;
+- `depth`, `cooldown`, `energy`, `spear`, `health`, `spree`, and their
+  `next_` counterparts: `(N,)` `int16` arrays of the depth and status fields;
+- `prayers`, `next_prayers`: `(N,)` `uint32` arrays, with bit `i` set if the
+  player has prayer `hoplite.game.status.Prayer(i)`;
+- `move`: `(N,)` `uint8` array of indices in `MOVE_TYPES`;
+- `move_target`: `(N, 2)` `int8` array of target coordinates, `NO_TARGET` for
+  moves without target;
+- `has_next`: `(N,)` `bool` array, `True` if the next record of the recording
+  is a move record, i.e. if the `next_` columns are filled;
+- `recording`, `turn`: `(N,)` `uint32` arrays of the index of the recording in
+  `recordings.json` and of the turn of the record.
+
+Next columns hold the state recorded after the move, i.e. the outcome the
+engine predictions can be compared to. States are decoded in bulk by
+`hoplite.game.codec`.
+"""
+
+import os
+import json
+import logging
+import numpy
+import hoplite.recording
+import hoplite.game.codec
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+MOVE_TYPES = ("move", "walk", "leap", "bash", "throw", "altar", "idle")
+NO_TARGET = -128
+RECORDINGS_FILENAME = "recordings.json"
+
+
+def parse_move(string):
+    """Split a move string into dataset values.
+
+    Parameters
+    ----------
+    string : str
+        Representation of a `hoplite.game.moves.PlayerMove`.
+
+    Returns
+    -------
+    tuple[int, int, int]
+        Index in `MOVE_TYPES` and target coordinates.
+
+    """
+    kind, *target = string.split("/")
+    if not target:
+        return MOVE_TYPES.index(kind), NO_TARGET, NO_TARGET
+    x, y = target[0].split(",")  # pylint: disable=C0103
+    return MOVE_TYPES.index(kind), int(x), int(y)
+
+
+def state_columns(arrays, prefix=""):
+    """Split decoded states into dataset columns.
+
+    Parameters
+    ----------
+    arrays : hoplite.game.codec.StateArrays
+        Decoded states.
+    prefix : str
+        Prefix of the column names.
+
+    Returns
+    -------
+    dict[str, numpy.ndarray]
+        Terrain, depth, status fields and prayers columns.
+
+    """
+    columns = {
+        prefix + "terrain": arrays.terrain,
+        prefix + "depth": arrays.depth.astype(numpy.int16),
+        prefix + "prayers": arrays.prayers,
+    }
+    for name in hoplite.game.codec.STATUS_FIELDS:
+        columns[prefix + name] = arrays.field(name).astype(numpy.int16)
+    return columns
+
+
+def export(paths, directory):
+    """Export the move records of recordings into a columnar dataset.
+
+    Parameters
+    ----------
+    paths : list[str]
+        Paths to log files, containers or recording folders.
+    directory : str
+        Path to the dataset folder, created if missing.
+
+    Returns
+    -------
+    int
+        Number of exported rows.
+
+    """
+    os.makedirs(directory, exist_ok=True)
+    rows = list()
+    for recording, path in enumerate(paths):
+        previous = None
+        for line in hoplite.recording.iter_lines(path):
+            fields = line.rstrip("\n").split("\t")
+            current = (int(fields[0]), fields[2], fields[3]) if fields[1] == "move" else None
+            if previous is not None:
+                rows.append((recording, *previous, None if current is None else current[1]))
+            previous = current
+        if previous is not None:
+            rows.append((recording, *previous, None))
+    recordings, turns, states, moves, next_states = zip(*rows) if rows else [()] * 5
+    has_next = numpy.array([state is not None for state in next_states], dtype=bool)
+    next_states = [
+        state if next_state is None else next_state
+        for state, next_state in zip(states, next_states)
+    ]
+    moves = numpy.array([parse_move(move) for move in moves], dtype=numpy.int16).reshape(-1, 3)
+    columns = {
+        "move": moves[:, 0].astype(numpy.uint8),
+        "move_target": moves[:, 1:].astype(numpy.int8),
+        "has_next": has_next,
+        "recording": numpy.array(recordings, dtype=numpy.uint32),
+        "turn": numpy.array(turns, dtype=numpy.uint32),
+    }
+    columns.update(state_columns(hoplite.game.codec.decode_states(states)))
+    for name, column in state_columns(
+            hoplite.game.codec.decode_states(next_states), "next_").items():
+        column[~has_next] = 0
+        columns[name] = column
+    for name, array in columns.items():
+        numpy.save(os.path.join(directory, name + ".npy"), array)
+    with open(os.path.join(directory, RECORDINGS_FILENAME), "w") as file:
+        json.dump(list(paths), file, indent=4)
+    LOGGER.info("Exported %d rows from %d recordings to %s", len(rows), len(paths), directory)
+    return len(rows)
+
+
+def load(directory):
+    """Load a columnar dataset, without reading the arrays into memory.
+
+    Parameters
+    ----------
+    directory : str
+        Path to the dataset folder.
+
+    Returns
+    -------
+    dict[str, numpy.ndarray]
+        Memory mapped arrays, by column name.
+
+    """
+    return {
+        filename[:-4]: numpy.load(os.path.join(directory, filename), mmap_mode="r")
+        for filename in sorted(os.listdir(directory))
+        if filename.endswith(".npy")
+    }
+
+
+def load_recordings(directory):
+    """Load the paths of the recordings a dataset was exported from.
+
+    Parameters
+    ----------
+    directory : str
+        Path to the dataset folder.
+
+    Returns
+    -------
+    list[str]
+        Paths to the recordings, indexed by the `recording` column.
+
+    """
+    with open(os.path.join(directory, RECORDINGS_FILENAME), "r") as file:
+        return json.load(file)
@@ -0,0 +1,237 @@
+"""Local stand-in for an adb server and its device, for measuring the
+communication overhead without a device. It speaks enough of the adb host
+protocol for `ppadb`, including interactive shell sessions, simulates the
+latency of connections and of `input` and `sendevent` commands, and records
+the taps it receives.
+"""
+
+import re
+import time
+import shlex
+import socket
+import logging
+import threading
+import socketserver
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+class FakeAdbHandler(socketserver.BaseRequestHandler):
+    """Handle one client connection to the `FakeAdbServer`.
+    """
+
+    def _receive(self):
+        header = self._read(4)
+        if header is None:
+            return None
+        return self._read(int(header, 16)).decode("utf8")
+
+    def _read(self, size):
+        data = b""
+        while len(data) < size:
+            chunk = self.request.recv(size - len(data))
+            if not chunk:
+                return None
+            data += chunk
+        return data
+
+    def _okay(self, payload=None):
+        self.request.sendall(b"OKAY")
+        if payload is not None:
+            data = payload.encode("utf8")
+            self.request.sendall(b"%04x" % len(data) + data)
+
+    def _session(self):
+        # Interactive shell: every received line is a command
+        self.server.sessions.add(self.request)
+        buffer = b""
+        try:
+            while True:
+                chunk = self.request.recv(4096)
+                if not chunk:
+                    break
+                buffer += chunk
+                while b"\n" in buffer:
+                    line, buffer = buffer.split(b"\n", 1)
+                    output = self.server.run(line.decode("utf8"))
+                    if output:
+                        self.request.sendall(output.encode("utf8"))
+        except OSError:
+            pass
+        finally:
+            self.server.sessions.discard(self.request)
+
+    def handle(self):
+        while True:
+            service = self._receive()
+            if service is None:
+                return
+            self.server.services.append(service)
+            if service == "host:devices":
+                self._okay("%s\tdevice\n" % self.server.serial)
+                return
+            if service.startswith("host:transport:"):
+                self._okay()
+                continue
+            if service == "shell:":
+                self._okay()
+                self._session()
+                return
+            if service.startswith("shell:") or service.startswith("exec:"):
+                self._okay()
+                time.sleep(self.server.latency)
+                output = self.server.run(service.split(":", 1)[1])
+                if output:
+                    self.request.sendall(output.encode("utf8"))
+                return
+            self.request.sendall(b"FAIL")
+            return
+
+
+class FakeAdbServer(socketserver.ThreadingTCPServer):
+    """Fake adb server with a single fake device.
+
+    Parameters
+    ----------
+    port : int
+        Port to listen to on localhost, 0 for any free port.
+    serial : str
+        Serial of the fake device.
+    latency : float
+        Delay, in seconds, before a shell command starts, simulating the
+        round trip to the device.
+    tap_cost : float
+        Duration, in seconds, of an `input tap` command on the device.
+    event_cost : float
+        Duration, in seconds, of a `sendevent` command on the device.
+
+    Attributes
+    ----------
+    services : list[str]
+        Services requested by clients, e.g. `"shell:input tap 540 903"`.
+    taps : list[tuple[float, int, int]]
+        Time and coordinates of the received taps, either from `input tap`
+        commands or from `sendevent` writes to the touch device.
+    events : list[tuple[int, int, int]]
+        Type, code and value of the events written to the touch device.
+    sessions : set[socket.socket]
+        Open interactive shell sessions.
+    port : int
+        Port the server listens to.
+    serial
+    latency
+    tap_cost
+    event_cost
+    TOUCH_DEVICE : str
+        Path of the fake touch device.
+    SCREEN_SIZE : tuple[int, int]
+        Width and height of the fake screen, also the range of the touch
+        device coordinates.
+    _contact : dict[int, int]
+        Current values of the touch device axes, by event code.
+    _thread : threading.Thread
+        Thread serving requests.
+
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+    TOUCH_DEVICE = "/dev/input/event1"
+    SCREEN_SIZE = 1080, 1920
+
+    def __init__(self, port=0, serial="emulator-5554", latency=.02, tap_cost=.05,  # pylint: disable=R0913
+                 event_cost=.001):
+        super().__init__(("localhost", port), FakeAdbHandler)
+        self.port = self.server_address[1]
+        self.serial = serial
+        self.latency = latency
+        self.tap_cost = tap_cost
+        self.event_cost = event_cost
+        self.services = list()
+        self.taps = list()
+        self.events = list()
+        self.sessions = set()
+        self._contact = dict()
+        self._thread = None
+
+    def _device_description(self):
+        width, height = self.SCREEN_SIZE
+        return "\n".join([
+            "add device 1: %s" % self.TOUCH_DEVICE,
+            "  name:     \"fake_multi_touch\"",
+            "  events:",
+            "    KEY (0001): BTN_TOUCH",
+            "    ABS (0003): ABS_MT_TRACKING_ID    : value 0, min 0, max 65535, fuzz 0, flat 0",
+            "                ABS_MT_POSITION_X     : value 0, min 0, max %d, fuzz 0, flat 0" % (
+                width - 1),
+            "                ABS_MT_POSITION_Y     : value 0, min 0, max %d, fuzz 0, flat 0" % (
+                height - 1),
+            "",
+        ])
+
+    def _send_event(self, event_type, code, value):
+        time.sleep(self.event_cost)
+        self.events.append((event_type, code, value))
+        if event_type == 0:  # SYN_REPORT
+            if self._contact.pop(330, 0) == 1:  # BTN_TOUCH pressed
+                self.taps.append((time.time(), self._contact[53], self._contact[54]))
+        else:
+            self._contact[code] = value
+
+    def run(self, command):
+        """Simulate a shell command. Only `input tap`, `sendevent`, `sleep`,
+        `echo`, `getevent -pl` and `wm size` commands are understood, other
+        ones are ignored.
+
+        Parameters
+        ----------
+        command : str
+            Shell command, possibly chained with `&&` or `;`.
+
+        Returns
+        -------
+        str
+            Output of the command.
+
+        """
+        output = ""
+        for part in re.split(r"&&|;", command):
+            words = shlex.split(part)
+            if words[:2] == ["input", "tap"]:
+                time.sleep(self.tap_cost)
+                self.taps.append((time.time(), int(words[2]), int(words[3])))
+            elif words[:1] == ["sendevent"] and words[1] == self.TOUCH_DEVICE:
+                self._send_event(*map(int, words[2:5]))
+            elif words[:1] == ["sleep"]:
+                time.sleep(float(words[1]))
+            elif words[:1] == ["echo"]:
+                output += " ".join(words[1:]) + "\n"
+            elif words == ["getevent", "-pl"]:
+                output += self._device_description()
+            elif words == ["wm", "size"]:
+                output += "Physical size: %dx%d\n" % self.SCREEN_SIZE
+        return output
+
+    def drop_sessions(self):
+        """Close the open interactive shell sessions, as a device would when
+        disconnected.
+        """
+        for session in list(self.sessions):
+            try:
+                session.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def start(self):
+        """Serve requests in a background thread.
+        """
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        LOGGER.info("Fake adb server listening on port %d", self.port)
+
+    def stop(self):
+        """Stop serving requests.
+        """
+        self.shutdown()
+        self.server_close()
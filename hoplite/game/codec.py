@@ -0,0 +1,253 @@
+"""Bulk conversion between game state strings and arrays. Instead of building
+a `hoplite.game.state.GameState` per string, many strings are decoded at once
+into parallel arrays: terrains become rows of `SurfaceElement` values through
+a byte lookup table, and depth and status fields become integer columns.
+Single states can still be materialized on demand.
+"""
+
+import numpy
+import hoplite.game.state
+import hoplite.game.terrain
+
+
+TERRAIN_SIZE = 79
+STATUS_FIELDS = ("cooldown", "energy", "spear", "health", "spree")
+ENCODING = "0123456789abcdef"
+
+DECODING_TABLE = numpy.full(256, 255, dtype=numpy.uint8)
+DECODING_TABLE[numpy.frombuffer(ENCODING.encode("ascii"), dtype=numpy.uint8)] = [
+    hoplite.game.terrain.SURFACE_ELEMENT_DECODER[char].value for char in ENCODING
+]
+ENCODING_TABLE = numpy.zeros(16, dtype=numpy.uint8)
+ENCODING_TABLE[[element.value for element in hoplite.game.terrain.SurfaceElement]] = [
+    ord(hoplite.game.terrain.SURFACE_ELEMENT_ENCODER[element])
+    for element in hoplite.game.terrain.SurfaceElement
+]
+
+
+def prayer_mask(prayers):
+    """Compute the bitmask of a prayer field.
+
+    Parameters
+    ----------
+    prayers : str
+        Prayer field of a status string, e.g. `"7,4,1,1"`, or `"-"`.
+
+    Returns
+    -------
+    int
+        Bitmask with bit `i` set if prayer `hoplite.game.status.Prayer(i)` is
+        in the field.
+
+    """
+    mask = 0
+    if prayers != "-":
+        for prayer in prayers.split(","):
+            mask |= 1 << int(prayer)
+    return mask
+
+
+def mask_prayers(mask):
+    """Write a prayer field from a bitmask, with prayers in increasing order.
+
+    Parameters
+    ----------
+    mask : int
+        Prayer bitmask.
+
+    Returns
+    -------
+    str
+        Prayer field of a status string.
+
+    """
+    prayers = [str(value) for value in range(int(mask).bit_length()) if mask >> value & 1]
+    return ",".join(prayers) or "-"
+
+
+class StateArrays:
+    """Parallel arrays describing many game states.
+
+    Parameters
+    ----------
+    terrain : numpy.ndarray
+        `(N, 79)` `uint8` array of `hoplite.game.terrain.SurfaceElement`
+        values, in the order of `hoplite.utils.SURFACE_COORDINATES`.
+    depth : numpy.ndarray
+        `(N,)` integer array of depths.
+    status : numpy.ndarray
+        `(N, 5)` integer array of the `STATUS_FIELDS`.
+    prayers : numpy.ndarray
+        `(N,)` `uint32` array of prayer bitmasks.
+    prayer_fields : numpy.ndarray
+        `(N,)` array of the original prayer fields, which keep the order and
+        repetitions of prayers. If `None`, they are written from `prayers`.
+
+    Attributes
+    ----------
+    terrain
+    depth
+    status
+    prayers
+    prayer_fields
+
+    """
+
+    def __init__(self, terrain, depth, status, prayers, prayer_fields=None):  # pylint: disable=R0913
+        self.terrain = terrain
+        self.depth = depth
+        self.status = status
+        self.prayers = prayers
+        self.prayer_fields = prayer_fields
+
+    def __len__(self):
+        return len(self.depth)
+
+    def field(self, name):
+        """Get a status field column.
+
+        Parameters
+        ----------
+        name : str
+            One of `STATUS_FIELDS`.
+
+        Returns
+        -------
+        numpy.ndarray
+            `(N,)` view of the column.
+
+        """
+        return self.status[:, STATUS_FIELDS.index(name)]
+
+    def state(self, index):
+        """Materialize one of the states.
+
+        Parameters
+        ----------
+        index : int
+            Index of the state.
+
+        Returns
+        -------
+        hoplite.game.state.GameState
+            Game state.
+
+        """
+        return hoplite.game.state.GameState.from_string(encode_states(self, [index])[0])
+
+
+def _parse_integers(buffer, starts, ends, width=5):
+    """Parse the decimal integers found between `starts` and `ends` in a
+    buffer of ASCII bytes, all at once, one digit position at a time. Fields
+    must be made of 1 to `width` digits.
+    """
+    lengths = ends - starts
+    if numpy.any((lengths < 1) | (lengths > width)):
+        raise ValueError("Integer fields must have 1 to %d digits" % width)
+    values = numpy.zeros(len(starts), dtype=numpy.int32)
+    for offset in range(width):
+        positions = starts + offset
+        inside = positions < ends
+        digits = buffer[numpy.minimum(positions, len(buffer) - 1)].astype(numpy.int32) - ord("0")
+        if numpy.any(inside & ((digits < 0) | (digits > 9))):
+            raise ValueError("Integer fields must only contain digits")
+        values = numpy.where(inside, 10 * values + digits, values)
+    return values
+
+
+def decode_states(strings):
+    """Decode many game state strings at once. The strings are joined into a
+    single buffer, and the fields are located through the positions of their
+    delimiters.
+
+    Parameters
+    ----------
+    strings : list[str]
+        Representations of `hoplite.game.state.GameState`.
+
+    Returns
+    -------
+    StateArrays
+        Decoded states.
+
+    """
+    count = len(strings)
+    if count == 0:
+        return StateArrays(
+            numpy.zeros((0, TERRAIN_SIZE), dtype=numpy.uint8),
+            numpy.zeros(0, dtype=numpy.int32),
+            numpy.zeros((0, len(STATUS_FIELDS)), dtype=numpy.int32),
+            numpy.zeros(0, dtype=numpy.uint32),
+            numpy.zeros(0, dtype=object)
+        )
+    buffer = numpy.frombuffer(("\n".join(strings) + "\n").encode("ascii"), dtype=numpy.uint8)
+    semicolons = numpy.flatnonzero(buffer == ord(";"))
+    slashes = numpy.flatnonzero(buffer == ord("/"))
+    newlines = numpy.flatnonzero(buffer == ord("\n"))
+    if semicolons.size != 2 * count or slashes.size != 5 * count:
+        raise ValueError("Malformed game state strings")
+    semicolons = semicolons.reshape(count, 2)
+    slashes = slashes.reshape(count, 5)
+    if numpy.any(semicolons[:, 1] - semicolons[:, 0] != TERRAIN_SIZE + 1):
+        raise ValueError("Terrains must have %d tiles" % TERRAIN_SIZE)
+    terrain = DECODING_TABLE[buffer[
+        semicolons[:, :1] + 1 + numpy.arange(TERRAIN_SIZE)]]
+    if numpy.any(terrain == 255):
+        raise ValueError("Unknown surface element in terrains")
+    line_starts = numpy.concatenate([[0], newlines[:-1] + 1])
+    field_starts = numpy.concatenate([semicolons[:, 1:], slashes[:, :4]], axis=1) + 1
+    status = _parse_integers(
+        buffer, field_starts.reshape(-1), slashes.reshape(-1)).reshape(count, 5)
+    prayer_fields = numpy.array(
+        [string[string.rfind("/") + 1:] for string in strings], dtype=object)
+    masks = dict()
+    prayers = numpy.array([
+        masks[field] if field in masks else masks.setdefault(field, prayer_mask(field))
+        for field in prayer_fields
+    ], dtype=numpy.uint32)
+    return StateArrays(
+        terrain,
+        _parse_integers(buffer, line_starts, semicolons[:, 0]),
+        status,
+        prayers,
+        prayer_fields
+    )
+
+
+def encode_states(arrays, indices=None):
+    """Encode decoded states back into strings.
+
+    Parameters
+    ----------
+    arrays : StateArrays
+        Decoded states.
+    indices : list[int]
+        Indices of the states to encode, all of them if `None`.
+
+    Returns
+    -------
+    list[str]
+        Representations of `hoplite.game.state.GameState`.
+
+    """
+    if indices is None:
+        indices = numpy.arange(len(arrays))
+    indices = numpy.asarray(indices, dtype=int)
+    terrain = ENCODING_TABLE[arrays.terrain[indices]].tobytes().decode("ascii")
+    if arrays.prayer_fields is None:
+        prayers = [mask_prayers(mask) for mask in arrays.prayers[indices]]
+    else:
+        prayers = arrays.prayer_fields[indices]
+    return [
+        "%d;%s;%d/%d/%d/%d/%d/%s" % (
+            depth,
+            terrain[i * TERRAIN_SIZE:(i + 1) * TERRAIN_SIZE],
+            *status,
+            prayer
+        )
+        for i, (depth, status, prayer) in enumerate(zip(
+            arrays.depth[indices].tolist(),
+            arrays.status[indices].tolist(),
+            prayers
+        ))
+    ]
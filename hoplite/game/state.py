@@ -87,6 +87,40 @@ class GameState:
         state.status = hoplite.game.status.Status.from_string(status_string)
         return state
 
+    def to_bytes(self):
+        """Pack the game state into a binary record, equivalent to its string
+        representation: the packed `hoplite.game.terrain.Terrain` (40 bytes),
+        the depth (1 byte) and the packed `hoplite.game.status.Status`.
+
+        Returns
+        -------
+        bytes
+            50 bytes, more if the prayer order must be kept.
+
+        """
+        return self.terrain.to_bytes() + bytes([self.depth]) + self.status.to_bytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Create and return a `GameState` object from its packed form.
+
+        Parameters
+        ----------
+        data : bytes
+            Packed game state returned by `to_bytes`.
+
+        Returns
+        -------
+        GameState
+            Game state corresponding to these bytes.
+
+        """
+        state = cls()
+        state.terrain = hoplite.game.terrain.Terrain.from_bytes(data[:40])
+        state.depth = data[40]
+        state.status = hoplite.game.status.Status.from_bytes(data[41:])
+        return state
+
     def copy(self):
         """Copy the current state.
 
@@ -96,7 +130,10 @@ class GameState:
             Same state with different address.
 
         """
-        return copy.deepcopy(self)
+        state = copy.copy(self)
+        state.terrain = copy.deepcopy(self.terrain)
+        state.status = self.status.copy()
+        return state
 
     def update(self, new_state):
         """Update the current state with a newly parsed one.
@@ -2,6 +2,7 @@
 """
 
 import enum
+import struct
 
 
 @enum.unique
@@ -29,6 +30,33 @@ class Prayer(enum.Enum):
     STAGGERING_LEAP = 16
 
 
+ATTRIBUTE_NAMES = (
+    "maximum_health",
+    "maximum_energy",
+    "knockback_distance",
+    "cooldown",
+    "throw_distance",
+    "leap_distance",
+)
+
+PRAYER_EFFECTS = {
+    Prayer.FORTITUDE: (1, 0, 0, 0, 0, 0),
+    Prayer.BLOODLUST: (-1, 0, 0, 0, 0, 0),
+    Prayer.MIGHTY_BASH: (0, 0, 1, 0, 0, 0),
+    Prayer.QUICK_BASH: (0, 0, 0, -1, 0, 0),
+    Prayer.GREATER_THROW: (0, 0, 0, 0, 1, 0),
+    Prayer.GREATER_THROW_II: (-1, 0, 0, 0, 1, 0),
+    Prayer.GREATER_ENERGY: (0, 20, 0, 0, 0, 0),
+    Prayer.GREATER_ENERGY_II: (-1, 15, 0, 0, 0, 0),
+    Prayer.WINGED_SANDALS: (-1, 0, 0, 0, 0, 1),
+    Prayer.SURGE: (-1, 0, 0, 0, 0, 0),
+    Prayer.REGENERATION: (-1, 0, 0, 0, 0, 0),
+    Prayer.STAGGERING_LEAP: (-2, 0, 0, 0, 0, 0),
+}
+
+PRAYERS = tuple(Prayer)
+
+
 class PlayerAttributes:  # pylint: disable=R0903
     """Representation of the attributes of the player, which will determine
     the result of its actions.
@@ -61,6 +89,135 @@ class PlayerAttributes:  # pylint: disable=R0903
     def __repr__(self):
         return str(self.__dict__)
 
+    @classmethod
+    def from_values(cls, values):
+        """Create and return a `PlayerAttributes` object from its values.
+
+        Parameters
+        ----------
+        values : tuple[int]
+            Values of the attributes, in the order of `ATTRIBUTE_NAMES`.
+
+        Returns
+        -------
+        PlayerAttributes
+            Attributes with these values.
+
+        """
+        attributes = cls()
+        attributes.__dict__.update(zip(ATTRIBUTE_NAMES, values))
+        return attributes
+
+
+ATTRIBUTE_TABLE = dict()
+
+
+def derive_attributes(multiset):
+    """Get the changes some prayers make to the attributes of the player.
+    Changes are computed once per prayer multiset, and then read from
+    `ATTRIBUTE_TABLE`.
+
+    Parameters
+    ----------
+    multiset : tuple[int]
+        Values of the prayers made by the player, in increasing order.
+
+    Returns
+    -------
+    tuple[int]
+        Changes of the attributes, in the order of `ATTRIBUTE_NAMES`.
+
+    """
+    values = ATTRIBUTE_TABLE.get(multiset)
+    if values is None:
+        values = [0] * len(ATTRIBUTE_NAMES)
+        for prayer in multiset:
+            for i, delta in enumerate(PRAYER_EFFECTS.get(PRAYERS[prayer], ())):
+                values[i] += delta
+        values = ATTRIBUTE_TABLE.setdefault(multiset, tuple(values))
+    return values
+
+
+class PrayerSet:
+    """Immutable sequence of the prayers made by the player, in the order they
+    were made, possibly with repetitions. Membership is tested on a bitmask,
+    and the whole sequence is identified by a single integer key.
+
+    Parameters
+    ----------
+    values : Iterable[int]
+        Values of the prayers, in the order they were made.
+
+    Attributes
+    ----------
+    values : tuple[int]
+        Values of the prayers, in the order they were made.
+    mask : int
+        Bitmask with bit `i` set if prayer `Prayer(i)` was made.
+    key : int
+        Encoding of the sequence, with 5 bits per prayer.
+
+    """
+
+    __slots__ = ("values", "mask", "key")
+
+    def __init__(self, values=()):
+        self.values = tuple(values)
+        self.mask = 0
+        self.key = 0
+        for i, value in enumerate(self.values):
+            self.mask |= 1 << value
+            self.key |= (value + 1) << (5 * i)
+
+    def __contains__(self, prayer):
+        return self.mask >> prayer._value_ & 1 == 1  # pylint: disable=W0212
+
+    def __iter__(self):
+        return (PRAYERS[value] for value in self.values)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __eq__(self, other):
+        return isinstance(other, PrayerSet) and self.key == other.key
+
+    def __repr__(self):
+        return ",".join(map(str, self.values)) or "-"
+
+    @property
+    def multiset(self):
+        """Values of the prayers, in increasing order.
+        """
+        return tuple(sorted(self.values))
+
+    def add(self, prayer):
+        """Append a prayer to the sequence.
+
+        Parameters
+        ----------
+        prayer : Prayer
+            Prayer to append.
+
+        Returns
+        -------
+        PrayerSet
+            New sequence, this one is left unchanged.
+
+        """
+        result = PrayerSet.__new__(PrayerSet)
+        result.values = self.values + (prayer.value,)
+        result.mask = self.mask | 1 << prayer.value
+        result.key = self.key | (prayer.value + 1) << (5 * len(self.values))
+        return result
+
+
+STATUS_RECORD = struct.Struct("<BHbBI")
+SPEAR_FLAG = 1 << 31
+ORDER_FLAG = 1 << 30
+
 
 class Status:
     """Logical representation of the player status.
@@ -77,10 +234,11 @@ class Status:
         Number of full hearts.
     spree : int
         Current killing spree counter.
-    prayers : List[Prayer]
-        List of prayers made by the player so far.
+    prayers : PrayerSet
+        Prayers made by the player so far.
     attributes : PlayerAttributes
-        Current abilities of the player.
+        Current abilities of the player. Copies of a status share this object,
+        which is replaced, not modified, when a prayer is added.
 
     """
 
@@ -90,31 +248,65 @@ class Status:
         self.spear = True
         self.health = 3
         self.spree = 0
-        self.prayers = list()
+        self.prayers = PrayerSet()
         self.attributes = PlayerAttributes()
 
+    def _key(self):
+        return (self.cooldown, self.energy, self.spear, self.health, self.spree, self.prayers.key)
+
     def __hash__(self):
-        return hash(repr(self))
+        return hash(self._key())
 
     def __eq__(self, other):
-        return repr(self) == repr(other)
+        return isinstance(other, Status) and self._key() == other._key()  # pylint: disable=W0212
 
     def __repr__(self):
-        text = "/".join([
-            str(self.cooldown),
-            str(self.energy),
-            str(int(self.spear)),
-            str(self.health),
-            str(self.spree),
-            ",".join([str(prayer.value) for prayer in self.prayers])
-        ])
-        if text[-1] == "/":
-            return text + "-"
-        return text
+        return "%d/%d/%d/%d/%d/%r" % (
+            self.cooldown,
+            self.energy,
+            self.spear,
+            self.health,
+            self.spree,
+            self.prayers
+        )
 
     def __str__(self):
         return "Status%s" % self.__dict__
 
+    def copy(self):
+        """Copy the current status. Prayers and attributes are shared with the
+        copy.
+
+        Returns
+        -------
+        Status
+            Same status with different address.
+
+        """
+        status = Status.__new__(Status)
+        status.__dict__.update(self.__dict__)
+        return status
+
+    def set_prayers(self, prayers):
+        """Replace the prayers made by the player, without affecting the live
+        health and energy values. The changes of the previous prayers to the
+        attributes are replaced by the ones of the new prayers, so that values
+        set otherwise, e.g. the maximum health observed on screen, are kept.
+
+        Parameters
+        ----------
+        prayers : PrayerSet
+            New prayers.
+
+        """
+        previous = derive_attributes(self.prayers.multiset)
+        changes = derive_attributes(prayers.multiset)
+        self.prayers = prayers
+        self.attributes = PlayerAttributes.from_values([
+            getattr(self.attributes, name) - before + after
+            for name, before, after in zip(ATTRIBUTE_NAMES, previous, changes)
+        ])
+
     @classmethod
     def from_string(cls, string):
         """Create and return a `Status` object from its string representation.
@@ -139,13 +331,63 @@ class Status:
         status.spear = spear == "1"
         status.health = int(health)
         status.spree = int(spree)
-        for prayer in prayers.split(","):
-            if prayer != "-":
-                status.add_prayer(Prayer(int(prayer)), False)
+        if prayers != "-":
+            status.set_prayers(PrayerSet(
+                Prayer(int(prayer)).value for prayer in prayers.split(",")))
+        return status
+
+    def to_bytes(self):
+        """Pack the status into a fixed-size record: cooldown, energy, health,
+        killing spree, and a 32 bits word holding the prayer bitmask and the
+        spear flag. If the prayers are not the increasing sequence of distinct
+        prayers the bitmask describes, their count and values follow.
+
+        Returns
+        -------
+        bytes
+            9 bytes, plus the optional prayer sequence.
+
+        """
+        values = list(self.prayers.values)
+        ordered = values == sorted(set(values))
+        flags = self.prayers.mask | (SPEAR_FLAG if self.spear else 0)\
+            | (0 if ordered else ORDER_FLAG)
+        record = STATUS_RECORD.pack(self.cooldown, self.energy, self.health, self.spree, flags)
+        if ordered:
+            return record
+        return record + bytes([len(values)] + values)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Create and return a `Status` object from its packed form.
+
+        Parameters
+        ----------
+        data : bytes
+            Packed status returned by `to_bytes`.
+
+        Returns
+        -------
+        Status
+            Status corresponding to these bytes.
+
+        """
+        status = cls()
+        status.cooldown, status.energy, status.health, status.spree, flags =\
+            STATUS_RECORD.unpack_from(data)
+        status.spear = bool(flags & SPEAR_FLAG)
+        if flags & ORDER_FLAG:
+            count = data[STATUS_RECORD.size]
+            values = data[STATUS_RECORD.size + 1:STATUS_RECORD.size + 1 + count]
+        else:
+            values = [value for value in range(len(Prayer)) if flags >> value & 1]
+        if values:
+            status.set_prayers(PrayerSet(Prayer(value).value for value in values))
         return status
 
-    def add_prayer(self, prayer, online=True):  # pylint: disable=R0912
-        """Add a prayer to the prayer list.
+    def add_prayer(self, prayer, online=True):
+        """Add a prayer to the prayer list. Attributes are read from the
+        precomputed table of the new prayer multiset.
 
         Parameters
         ----------
@@ -159,55 +401,13 @@ class Status:
             prayers effects into account.
 
         """
-        self.prayers.append(prayer)
         if prayer == Prayer.DIVINE_RESTORATION and online:
             self.health = self.attributes.maximum_health
-        elif prayer == Prayer.FORTITUDE:
-            if online:
-                self.health += 1
-            self.attributes.maximum_health += 1
-        elif prayer == Prayer.BLOODLUST:
-            if online:
-                self.health -= 1
-            self.attributes.maximum_health -= 1
-        elif prayer == Prayer.MIGHTY_BASH:
-            self.attributes.knockback_distance += 1
-        elif prayer == Prayer.QUICK_BASH:
-            self.attributes.cooldown -= 1
-        elif prayer == Prayer.GREATER_THROW:
-            self.attributes.throw_distance += 1
-        elif prayer == Prayer.GREATER_THROW_II:
-            self.attributes.throw_distance += 1
-            if online:
-                self.health -= 1
-            self.attributes.maximum_health -= 1
-        elif prayer == Prayer.GREATER_ENERGY:
-            self.attributes.maximum_energy += 20
-            if online:
-                self.energy += 20
-        elif prayer == Prayer.GREATER_ENERGY_II:
-            self.attributes.maximum_energy += 15
-            if online:
-                self.energy += 15
-                self.health -= 1
-            self.attributes.maximum_health -= 1
-        elif prayer == Prayer.WINGED_SANDALS:
-            self.attributes.leap_distance += 1
-            if online:
-                self.health -= 1
-            self.attributes.maximum_health -= 1
-        elif prayer == Prayer.SURGE:
-            if online:
-                self.health -= 1
-            self.attributes.maximum_health -= 1
-        elif prayer == Prayer.REGENERATION:
-            if online:
-                self.health -= 1
-            self.attributes.maximum_health -= 1
-        elif prayer == Prayer.STAGGERING_LEAP:
-            if online:
-                self.health -= 2
-            self.attributes.maximum_health -= 2
+        elif online and prayer in PRAYER_EFFECTS:
+            health, energy, *_ = PRAYER_EFFECTS[prayer]
+            self.health += health
+            self.energy += energy
+        self.set_prayers(self.prayers.add(prayer))
 
 
     def update(self, new_status):
@@ -80,6 +80,22 @@ SURFACE_ELEMENT_DECODER = {
 }
 
 
+SURFACE_INDEX = {pos: index for index, pos in enumerate(hoplite.utils.SURFACE_COORDINATES)}
+
+TILE_DECODER = [Tile.GROUND, Tile.MAGMA] + [Tile.GROUND] * 14
+
+DEMON_DECODER = {
+    SurfaceElement.FOOTMAN.value: hoplite.game.demons.Footman,
+    SurfaceElement.ARCHER.value: hoplite.game.demons.Archer,
+    SurfaceElement.DEMOLITIONIST_HOLDING_BOMB.value:
+        lambda: hoplite.game.demons.Demolitionist(True),
+    SurfaceElement.DEMOLITIONIST_WITHOUT_BOMB.value:
+        lambda: hoplite.game.demons.Demolitionist(False),
+    SurfaceElement.WIZARD_CHARGED.value: lambda: hoplite.game.demons.Wizard(True),
+    SurfaceElement.WIZARD_DISCHARGED.value: lambda: hoplite.game.demons.Wizard(False),
+}
+
+
 class Terrain:  # pylint: disable=R0902
     """Logical representation of the game terrain.
 
@@ -252,6 +268,129 @@ class Terrain:  # pylint: disable=R0902
                 terrain.portal = pos
         return terrain
 
+    def to_codes(self):
+        """Represent the terrain as `SurfaceElement` values, without going
+        through every tile: elements are written over the ground in the
+        reverse order of their precedence in `to_list`.
+
+        Returns
+        -------
+        bytearray
+            Values of the surface elements in the order of
+            `SURFACE_COORDINATES`.
+
+        """
+        codes = bytearray(len(SURFACE_INDEX))
+        for pos, tile in self.surface.items():
+            if tile == Tile.MAGMA and pos in SURFACE_INDEX:
+                codes[SURFACE_INDEX[pos]] = SurfaceElement.MAGMA.value
+        for pos, demon in self.demons.items():
+            if pos not in SURFACE_INDEX:
+                continue
+            if demon.skill == hoplite.game.demons.DemonSkill.FOOTMAN:
+                element = SurfaceElement.FOOTMAN
+            elif demon.skill == hoplite.game.demons.DemonSkill.ARCHER:
+                element = SurfaceElement.ARCHER
+            elif demon.skill == hoplite.game.demons.DemonSkill.DEMOLITIONIST:
+                element = SurfaceElement.DEMOLITIONIST_WITHOUT_BOMB
+                if demon.holds_bomb:
+                    element = SurfaceElement.DEMOLITIONIST_HOLDING_BOMB
+            else:
+                element = SurfaceElement.WIZARD_DISCHARGED
+                if demon.charged_wand:
+                    element = SurfaceElement.WIZARD_CHARGED
+            codes[SURFACE_INDEX[pos]] = element.value
+        altar = SurfaceElement.ALTAR_ON if self.altar_prayable else SurfaceElement.ALTAR_OFF
+        singles = [(self.stairs, SurfaceElement.STAIRS)]
+        singles += [(pos, SurfaceElement.BOMB) for pos in self.bombs]
+        singles += [
+            (self.portal, SurfaceElement.PORTAL),
+            (self.fleece, SurfaceElement.FLEECE),
+            (self.altar, altar),
+            (self.spear, SurfaceElement.SPEAR),
+            (self.player, SurfaceElement.PLAYER),
+        ]
+        for pos, element in singles:
+            if pos in SURFACE_INDEX:
+                codes[SURFACE_INDEX[pos]] = element.value
+        return codes
+
+    @classmethod
+    def from_codes(cls, codes):
+        """Create and return a `Terrain` object from `SurfaceElement` values.
+
+        Parameters
+        ----------
+        codes : bytes
+            Values of the surface elements in the order of
+            `SURFACE_COORDINATES`.
+
+        Returns
+        -------
+        Terrain
+            Terrain corresponding to these values, same as `from_list`.
+
+        """
+        terrain = cls()
+        terrain.surface = dict(zip(
+            hoplite.utils.SURFACE_COORDINATES,
+            map(TILE_DECODER.__getitem__, codes)
+        ))
+        for pos, code in zip(hoplite.utils.SURFACE_COORDINATES, codes):
+            if code <= 1:
+                continue
+            elt = SurfaceElement(code)
+            if code in DEMON_DECODER:
+                terrain.demons[pos] = DEMON_DECODER[code]()
+            elif elt == SurfaceElement.SPEAR:
+                terrain.spear = pos
+            elif elt == SurfaceElement.BOMB:
+                terrain.bombs.add(pos)
+            elif elt == SurfaceElement.PLAYER:
+                terrain.player = pos
+            elif elt == SurfaceElement.STAIRS:
+                terrain.stairs = pos
+            elif elt in (SurfaceElement.ALTAR_ON, SurfaceElement.ALTAR_OFF):
+                terrain.altar = pos
+                terrain.altar_prayable = elt == SurfaceElement.ALTAR_ON
+            elif elt == SurfaceElement.FLEECE:
+                terrain.fleece = pos
+            elif elt == SurfaceElement.PORTAL:
+                terrain.portal = pos
+        return terrain
+
+    def to_bytes(self):
+        """Pack the terrain, two tiles per byte.
+
+        Returns
+        -------
+        bytes
+            40 bytes, the high half of each byte holding the first tile.
+
+        """
+        codes = self.to_codes() + b"\0"
+        return bytes(high << 4 | low for high, low in zip(codes[::2], codes[1::2]))
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Create and return a `Terrain` object from its packed form.
+
+        Parameters
+        ----------
+        data : bytes
+            Packed terrain returned by `to_bytes`.
+
+        Returns
+        -------
+        Terrain
+            Terrain corresponding to these bytes.
+
+        """
+        codes = bytearray(2 * len(data))
+        codes[::2] = bytes(byte >> 4 for byte in data)
+        codes[1::2] = bytes(byte & 15 for byte in data)
+        return cls.from_codes(codes[:len(SURFACE_INDEX)])
+
     def __repr__(self):
         text = ""
         for elt in self.to_list():
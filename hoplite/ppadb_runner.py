@@ -2,9 +2,14 @@
 """
 import logging
 import io
+import re
+import struct
+import threading
 from typing import Optional
+import numpy
 from ppadb.client import Client as AdbClient
 from ppadb.device import Device
+import hoplite.streaming
 
 LOGGER = logging.getLogger(__name__)
 
@@ -16,6 +21,14 @@ class PurePythonAdbInterface:
     ----------
     device_serial : Optional[str]
         Serial name of user device from adb
+    port : Optional[int]
+        Port of the adb server, `PORT` by default. Used for connecting to a
+        `hoplite.fake_adb.FakeAdbServer`.
+    persistent_touch : bool
+        Whether to send touches as lines to a long-lived shell session instead
+        of opening a connection per touch. Touches are written as `sendevent`
+        commands to the touch device if one is found, as `input tap` commands
+        otherwise. The session is reopened if it gets closed.
 
     Attributes
     ----------
@@ -25,26 +38,192 @@ class PurePythonAdbInterface:
         Port for adb client
     DEFAULT_DEVICE_SERIAL : str
         AVD default device serial name for adb
+    FRAMEBUFFER_PATH : str
+        Path on the device where raw screen captures are written.
+    ACK_TIMEOUT : float
+        Maximum time, in seconds, to wait for the touch session to perform
+        touches.
     device: ppadb.device.Device
         Device interface for touch and snapshot
+    bytes_received : int
+        Total amount of screen capture data received from the device.
+    _framebuffer : tuple[int, int, int, int]
+        Width, height, pixel format and header size of raw screen captures,
+        `None` until they are first requested.
+    persistent_touch
+    reconnections : int
+        Number of times the touch session had to be reopened.
+    _touch_session : ppadb.connection.Connection
+        Long-lived shell session receiving touches, if open.
+    _touch_opened : bool
+        Whether a touch session was ever opened.
+    _touch_lock : threading.Lock
+        Lock for the touch session.
+    _touch_acknowledged : threading.Condition
+        Condition on `_touch_lock`, notified when the touch session
+        acknowledges a batch of touches or gets closed.
+    _touch_sequence : int
+        Number of the last batch of touches sent to the touch session.
+    _touch_acknowledgment : int
+        Number of the last batch of touches performed by the touch session.
+    _touch_device : tuple[str, tuple[int, int, int, int], tuple[int, int]]
+        Path of the touch device, minimum and maximum of its X and Y
+        coordinates, and screen size, or `None` if touches are sent as
+        `input tap` commands.
     """
 
     HOST = "localhost"
     PORT = 5037
     DEFAULT_DEVICE_SERIAL = "emulator-5554"
+    FRAMEBUFFER_PATH = "/data/local/tmp/hoplite.raw"
+    ACK_TIMEOUT = 5.
 
-    def __init__(self, device_serial: Optional[str]):
+    def __init__(self, device_serial: Optional[str], port: Optional[int] = None,
+                 persistent_touch: bool = False):
         serial = device_serial or self.DEFAULT_DEVICE_SERIAL
-        device = AdbClient(host=self.HOST, port=self.PORT).device(serial)
+        device = AdbClient(host=self.HOST, port=port or self.PORT).device(serial)
         if not device:
             raise ConnectionRefusedError(
                 "Cannot connect to device with serial", serial)
         if not isinstance(device, Device):  # Should never occur
             raise ConnectionRefusedError()
         self.device = device
+        self.bytes_received = 0
+        self._framebuffer = None
+        self.persistent_touch = persistent_touch
+        self.reconnections = 0
+        self._touch_session = None
+        self._touch_opened = False
+        self._touch_lock = threading.Lock()
+        self._touch_acknowledged = threading.Condition(self._touch_lock)
+        self._touch_sequence = 0
+        self._touch_acknowledgment = 0
+        self._touch_device = None
 
     def open(self):
-        """For compatibility"""
+        """Open the touch session if `persistent_touch` is set."""
+        if self.persistent_touch:
+            self._touch_device = self.find_touch_device()
+            if self._touch_device is None:
+                LOGGER.warning("No touch device found, falling back to input tap commands")
+            with self._touch_lock:
+                self._open_touch_session()
+
+    def find_touch_device(self):
+        """Look for the multi-touch input device of the device.
+
+        Returns
+        -------
+        tuple[str, tuple[int, int, int, int], tuple[int, int]]
+            Path of the touch device, minimum and maximum of its X and Y
+            coordinates, and screen size in pixels, or `None` if not found.
+
+        """
+        description = self._exec("getevent -pl").decode("utf8", "replace")
+        devices = dict()
+        path = None
+        for line in description.splitlines():
+            match = re.match(r"add device \d+: (\S+)", line)
+            if match is not None:
+                path = match.group(1)
+            match = re.search(
+                r"ABS_MT_POSITION_([XY])\s*:\s*value -?\d+, min (-?\d+), max (-?\d+)", line)
+            if match is not None and path is not None:
+                devices.setdefault(path, dict())[match.group(1)] = (
+                    int(match.group(2)), int(match.group(3)))
+        size = re.search(r"(\d+)x(\d+)", self._exec("wm size").decode("utf8", "replace"))
+        for path, axes in devices.items():
+            if len(axes) == 2 and size is not None:
+                LOGGER.debug("Found touch device %s", path)
+                return path, axes["X"] + axes["Y"], (int(size.group(1)), int(size.group(2)))
+        return None
+
+    def _tap_lines(self, touch_x, touch_y):
+        if self._touch_device is None:
+            return ["input tap %d %d" % (touch_x, touch_y)]
+        path, (min_x, max_x, min_y, max_y), (width, height) = self._touch_device
+        device_x = min_x + touch_x * (max_x - min_x) // max(1, width - 1)
+        device_y = min_y + touch_y * (max_y - min_y) // max(1, height - 1)
+        # Type B multi-touch protocol: press then release of a single contact
+        events = [
+            (3, 57, self._touch_sequence % 65536),  # ABS_MT_TRACKING_ID
+            (3, 53, device_x),  # ABS_MT_POSITION_X
+            (3, 54, device_y),  # ABS_MT_POSITION_Y
+            (1, 330, 1),  # BTN_TOUCH
+            (0, 0, 0),  # SYN_REPORT
+            (3, 57, -1),
+            (1, 330, 0),
+            (0, 0, 0),
+        ]
+        return ["sendevent %s %d %d %d" % (path, *event) for event in events]
+
+    def _open_touch_session(self):
+        connection = self.device.create_connection()
+        connection.send("shell:")
+        if self._touch_opened:
+            self.reconnections += 1
+        self._touch_opened = True
+        self._touch_session = connection
+        threading.Thread(target=self._drain, args=(connection,), daemon=True).start()
+        LOGGER.debug("Opened touch session")
+
+    def _drain(self, connection):
+        # The shell output is scanned for acknowledgments, and otherwise
+        # discarded. The session is forgotten when the device closes it, to be
+        # reopened on next touch.
+        buffer = b""
+        try:
+            while True:
+                chunk = connection.socket.recv(4096)
+                if not chunk:
+                    break
+                buffer += chunk
+                acknowledgments = re.findall(rb"@ack (\d+)\r?\n", buffer)
+                buffer = buffer[buffer.rfind(b"\n") + 1:]
+                if acknowledgments:
+                    with self._touch_lock:
+                        self._touch_acknowledgment = max(
+                            self._touch_acknowledgment, int(acknowledgments[-1]))
+                        self._touch_acknowledged.notify_all()
+        except OSError:
+            pass
+        with self._touch_lock:
+            if self._touch_session is connection:
+                self._touch_session = None
+                LOGGER.warning("Touch session closed by the device")
+            self._touch_acknowledged.notify_all()
+
+    def _send_to_session(self, lines):
+        """Write lines to the touch session, and wait until the shell has run
+        them. Each batch ends with an `echo` of its number, which the shell
+        outputs once the previous lines are done.
+        """
+        with self._touch_lock:
+            self._touch_sequence += 1
+            sequence = self._touch_sequence
+            # Quotes keep the shell echo of the command from matching
+            lines = list(lines) + ["echo \"@\"ack %d" % sequence]
+            data = "".join(line + "\n" for line in lines).encode("utf8")
+            for _ in range(2):
+                if self._touch_session is None:
+                    self._open_touch_session()
+                session = self._touch_session
+                try:
+                    session.socket.sendall(data)
+                    break
+                except OSError:
+                    LOGGER.warning("Touch session lost, reconnecting")
+                    session.close()
+                    self._touch_session = None
+            else:
+                raise ConnectionError("Cannot send touches to the device")
+            if not self._touch_acknowledged.wait_for(
+                    lambda: self._touch_acknowledgment >= sequence
+                    or self._touch_session is not session,
+                    timeout=self.ACK_TIMEOUT):
+                raise TimeoutError("Touches were not performed in %g seconds" % self.ACK_TIMEOUT)
+            if self._touch_acknowledgment < sequence:
+                raise ConnectionError("Touch session closed before performing the touches")
 
     def snapshot(self, as_stream=False):
         """Take a snapshot of the screen.
@@ -61,10 +240,118 @@ class PurePythonAdbInterface:
 
         """
         image_data = self.device.screencap()
+        self.bytes_received += len(image_data)
         if as_stream:
             return io.BytesIO(image_data)
         return image_data
 
+    def _exec(self, command):
+        """Run a command on the device and return its binary output, without
+        the line ending conversions of the `shell:` service.
+        """
+        connection = self.device.create_connection()
+        with connection:
+            connection.send("exec:" + command)
+            data = bytes(connection.read_all())
+        self.bytes_received += len(data)
+        return data
+
+    def framebuffer_format(self):
+        """Retrieve the format of raw screen captures.
+
+        Returns
+        -------
+        tuple[int, int, int, int]
+            Width, height, pixel format (as the Android `PixelFormat`) and
+            size of the header preceding the pixels, in bytes.
+
+        """
+        if self._framebuffer is None:
+            data = self._exec("screencap > {0} && head -c 12 {0} && wc -c < {0}"
+                              .format(self.FRAMEBUFFER_PATH))
+            width, height, pixel_format = struct.unpack("<3I", data[:12])
+            header = int(data[12:].strip()) - 4 * width * height
+            self._framebuffer = width, height, pixel_format, header
+            LOGGER.debug("Raw framebuffer format: %s", self._framebuffer)
+        return self._framebuffer
+
+    def snapshot_rows(self, bands):
+        """Take a raw snapshot of the screen, only transferring some bands of
+        rows. The capture is written to the device storage and the bands are
+        cut from it on the device, in a single round trip.
+
+        Parameters
+        ----------
+        bands : list[tuple[int, int]]
+            Ranges of rows to transfer, as (start, stop) with stop excluded.
+
+        Returns
+        -------
+        numpy.ndarray
+            RGB matrix of the screen, with values between 0 and 1 as for
+            PNG snapshots. Rows outside of `bands` are black.
+
+        """
+        width, height, pixel_format, header = self.framebuffer_format()
+        if pixel_format not in (1, 2, 5):
+            raise ValueError("Unsupported framebuffer pixel format %d" % pixel_format)
+        row_size = 4 * width
+        commands = ["screencap > " + self.FRAMEBUFFER_PATH]
+        for start, stop in bands:
+            commands.append("tail -c +%d %s | head -c %d" % (
+                header + start * row_size + 1,
+                self.FRAMEBUFFER_PATH,
+                (stop - start) * row_size
+            ))
+        data = self._exec(" && ".join(commands))
+        array = numpy.zeros((height, width, 3), dtype=numpy.float32)
+        offset = 0
+        for start, stop in bands:
+            band = numpy.frombuffer(
+                data,
+                dtype=numpy.uint8,
+                count=(stop - start) * row_size,
+                offset=offset
+            ).reshape(stop - start, width, 4)[:, :, :3]
+            if pixel_format == 5:  # BGRA_8888
+                band = band[:, :, ::-1]
+            numpy.divide(band, 255, out=array[start:stop], dtype=numpy.float32)
+            offset += (stop - start) * row_size
+        return array
+
+    def open_frame_stream(self, slots=3):
+        """Start a persistent capture session, continuously writing raw
+        frames to a single connection.
+
+        Parameters
+        ----------
+        slots : int
+            Number of frames kept in the ring buffer of the stream.
+
+        Returns
+        -------
+        hoplite.streaming.FrameStream
+            Started stream of frames. Its `connection` attribute holds the
+            adb connection, closed when the stream is stopped.
+
+        """
+        width, height, pixel_format, header = self.framebuffer_format()
+        if pixel_format not in (1, 2, 5):
+            raise ValueError("Unsupported framebuffer pixel format %d" % pixel_format)
+        connection = self.device.create_connection()
+        connection.send("exec:while true; do screencap; done")
+        frame_stream = hoplite.streaming.FrameStream(
+            connection.socket.makefile("rb"),
+            width,
+            height,
+            header=header,
+            pixel_format=pixel_format,
+            slots=slots
+        )
+        frame_stream.connection = connection
+        frame_stream.start()
+        return frame_stream
+
     def touch(self, touch_x, touch_y):
         """Touch the screen at given coordinates.
 
@@ -76,7 +363,37 @@ class PurePythonAdbInterface:
             y coordinate of the point to touch on screen.
 
         """
-        self.device.input_tap(touch_x, touch_y)
+        if self.persistent_touch:
+            self._send_to_session(self._tap_lines(touch_x, touch_y))
+        else:
+            self.device.input_tap(touch_x, touch_y)
+
+    def touch_many(self, points, delay=0.):
+        """Touch the screen at several points, with a single shell command.
+
+        Parameters
+        ----------
+        points : list[tuple[int, int]]
+            Coordinates of the points to touch, in order.
+        delay : float
+            Time to wait between two touches, in seconds.
+
+        """
+        if self.persistent_touch:
+            lines = list()
+            for index, (touch_x, touch_y) in enumerate(points):
+                if index > 0 and delay > 0:
+                    lines.append("sleep %g" % delay)
+                lines += self._tap_lines(touch_x, touch_y)
+            self._send_to_session(lines)
+            return
+        taps = ["input tap %d %d" % (touch_x, touch_y) for touch_x, touch_y in points]
+        separator = " && " if delay <= 0 else " && sleep %g && " % delay
+        self.device.shell(separator.join(taps))
 
     def close(self):
-        """For compatibility"""
+        """Close the touch session, if open."""
+        with self._touch_lock:
+            if self._touch_session is not None:
+                self._touch_session.close()
+                self._touch_session = None
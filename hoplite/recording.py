@@ -0,0 +1,732 @@
+"""Storage of game recordings.
+
+A recording folder either follows the original layout, a `game.log` text
+file with one PNG screenshot per turn, or holds a binary container:
+
+- `game.bin`, an append-only log starting with a header (magic, frame mode
+  and frame shape), followed by one record per turn: a `<III` header (turn,
+  text length, frame length), the UTF-8 text of the log line after the turn,
+  and the zlib-compressed frame as `uint8` pixels;
+- `game.idx`, an index of fixed-size `<IQ` entries (turn, record offset).
+
+Frames are either full RGB screenshots, only probe pixels (see
+`hoplite.vision.observer.ScreenParser.sample_screen_probes`), or
+delta-encoded screenshots: a full keyframe every few stored frames, and in
+between only the blocks of pixels that changed since the previous frame,
+typically a few tiles and HUD bands. Both layouts are read through `load`.
+"""
+
+import os
+import glob
+import mmap
+import collections
+import zlib
+import struct
+import logging
+import numpy
+import matplotlib.image
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+LOG_FILENAME = "game.log"
+BINARY_FILENAME = "game.bin"
+INDEX_FILENAME = "game.idx"
+MAGIC = b"HOPREC1\0"
+HEADER = struct.Struct("<8sI3I")
+RECORD = struct.Struct("<III")
+INDEX_DTYPE = numpy.dtype([("turn", "<u4"), ("offset", "<u8")])
+KEYFRAME = 0
+DELTA = 1
+DELTA_HEADER = struct.Struct("<HHI")
+BLOCK_SHAPE = (64, 60)
+
+
+class FrameMode:  # pylint: disable=R0903
+    """Content of the frames stored in a binary container.
+    """
+
+    NONE = 0
+    FULL = 1
+    PROBES = 2
+    DELTA = 3
+
+
+def to_pixels(array):
+    """Quantize a frame.
+
+    Parameters
+    ----------
+    array : numpy.ndarray
+        Frame with values between 0 and 1.
+
+    Returns
+    -------
+    numpy.ndarray
+        RGB `uint8` pixels.
+
+    """
+    return numpy.rint(numpy.asarray(array)[..., :3] * 255).astype(numpy.uint8)
+
+
+def encode_frame(array):
+    """Compress a frame.
+
+    Parameters
+    ----------
+    array : numpy.ndarray
+        Frame with values between 0 and 1.
+
+    Returns
+    -------
+    bytes
+        Compressed `uint8` pixels.
+
+    """
+    return zlib.compress(to_pixels(array).tobytes(), 1)
+
+
+def decode_frame(data, shape):
+    """Decompress a frame.
+
+    Parameters
+    ----------
+    data : bytes
+        Data returned by `encode_frame`.
+    shape : tuple[int]
+        Shape of the frame.
+
+    Returns
+    -------
+    numpy.ndarray
+        Frame with `float32` values between 0 and 1.
+
+    """
+    pixels = numpy.frombuffer(zlib.decompress(data), dtype=numpy.uint8).reshape(shape)
+    return numpy.divide(pixels, 255, dtype=numpy.float32)
+
+
+def block_grid(shape, block_shape=BLOCK_SHAPE):
+    """Compute the number of blocks along each axis of a frame.
+
+    Parameters
+    ----------
+    shape : tuple[int]
+        Shape of the frame.
+    block_shape : tuple[int, int]
+        Height and width of a block, in pixels. Blocks on the bottom and right
+        edges may be smaller.
+
+    Returns
+    -------
+    tuple[int, int]
+        Number of block rows and block columns.
+
+    """
+    return -(-shape[0] // block_shape[0]), -(-shape[1] // block_shape[1])
+
+
+def _block(pixels, index, block_shape, columns):
+    row, column = divmod(int(index), columns)
+    return pixels[
+        row * block_shape[0]:(row + 1) * block_shape[0],
+        column * block_shape[1]:(column + 1) * block_shape[1]
+    ]
+
+
+def encode_keyframe(pixels):
+    """Encode a keyframe of a delta-encoded recording.
+
+    Parameters
+    ----------
+    pixels : numpy.ndarray
+        RGB `uint8` pixels.
+
+    Returns
+    -------
+    bytes
+        Encoded frame.
+
+    """
+    return bytes([KEYFRAME]) + zlib.compress(pixels.tobytes(), 1)
+
+
+def encode_delta(previous, pixels, block_shape=BLOCK_SHAPE):
+    """Encode the blocks that changed between two frames.
+
+    Parameters
+    ----------
+    previous : numpy.ndarray
+        RGB `uint8` pixels of the previous frame.
+    pixels : numpy.ndarray
+        RGB `uint8` pixels of the current frame.
+    block_shape : tuple[int, int]
+        Height and width of a block, in pixels.
+
+    Returns
+    -------
+    bytes
+        Encoded frame: block shape, number and indices of the changed blocks,
+        followed by their pixels.
+
+    """
+    rows, columns = block_grid(pixels.shape, block_shape)
+    changed = numpy.any(previous != pixels, axis=2)
+    changed = numpy.pad(changed, (
+        (0, rows * block_shape[0] - changed.shape[0]),
+        (0, columns * block_shape[1] - changed.shape[1])
+    ))
+    indices = numpy.flatnonzero(
+        changed.reshape(rows, block_shape[0], columns, block_shape[1]).any(axis=(1, 3)))
+    payload = b"".join(
+        [DELTA_HEADER.pack(*block_shape, len(indices)), indices.astype("<u2").tobytes()]
+        + [_block(pixels, index, block_shape, columns).tobytes() for index in indices]
+    )
+    return bytes([DELTA]) + zlib.compress(payload, 1)
+
+
+def apply_delta(pixels, data):
+    """Apply an encoded delta to a frame, in place.
+
+    Parameters
+    ----------
+    pixels : numpy.ndarray
+        RGB `uint8` pixels of the previous frame, modified to become the
+        current frame.
+    data : bytes
+        Encoded frame returned by `encode_delta`.
+
+    """
+    payload = zlib.decompress(data[1:])
+    height, width, count = DELTA_HEADER.unpack_from(payload, 0)
+    _, columns = block_grid(pixels.shape, (height, width))
+    offset = DELTA_HEADER.size + 2 * count
+    indices = numpy.frombuffer(payload, dtype="<u2", count=count, offset=DELTA_HEADER.size)
+    for index in indices:
+        block = _block(pixels, index, (height, width), columns)
+        block[...] = numpy.frombuffer(
+            payload, dtype=numpy.uint8, count=block.size, offset=offset).reshape(block.shape)
+        offset += block.size
+
+
+class RecordingWriter:
+    """Append records to a binary container.
+
+    Parameters
+    ----------
+    folder : str
+        Path to the recording folder.
+    mode : int
+        `FrameMode` of the stored frames.
+    shape : tuple[int]
+        Shape of the stored frames, e.g. `(1920, 1080, 3)` for full frames or
+        `(n_probes, 3)` for probe pixels.
+    sampler : Callable[[numpy.ndarray], numpy.ndarray]
+        Function extracting the stored pixels from a screenshot, for the
+        `FrameMode.PROBES` mode.
+    keyframe_interval : int
+        Number of stored frames between two keyframes, for the
+        `FrameMode.DELTA` mode.
+
+    Attributes
+    ----------
+    folder
+    mode
+    shape
+    sampler
+    keyframe_interval
+    _data : io.BufferedWriter
+        Binary log.
+    _index : io.BufferedWriter
+        Index file.
+    _previous : numpy.ndarray
+        Pixels of the last stored frame, for the `FrameMode.DELTA` mode.
+    _stored : int
+        Number of stored frames.
+
+    """
+
+    def __init__(self, folder, mode=FrameMode.FULL, shape=(1920, 1080, 3),  # pylint: disable=R0913
+                 sampler=None, keyframe_interval=10):
+        self.folder = folder
+        self.mode = mode
+        self.shape = tuple(shape)
+        self.sampler = sampler
+        self.keyframe_interval = keyframe_interval
+        self._previous = None
+        self._stored = 0
+        self._data = open(os.path.join(folder, BINARY_FILENAME), "wb")
+        self._index = open(os.path.join(folder, INDEX_FILENAME), "wb")
+        self._data.write(HEADER.pack(MAGIC, mode, *(self.shape + (0,) * (3 - len(self.shape)))))
+        self._data.flush()
+
+    def append(self, turn, text, screenshot=None):
+        """Append a record.
+
+        Parameters
+        ----------
+        turn : int
+            Controller turn.
+        text : str
+            Log line without the turn, e.g. `"move\\t<state>\\t<move>"`.
+        screenshot : numpy.ndarray
+            Screenshot of the turn. If `None`, or if the mode is
+            `FrameMode.NONE`, no frame is stored.
+
+        """
+        frame = b""
+        if screenshot is not None and self.mode == FrameMode.DELTA:
+            pixels = to_pixels(screenshot)
+            if self._stored % self.keyframe_interval == 0:
+                frame = encode_keyframe(pixels)
+            else:
+                frame = encode_delta(self._previous, pixels)
+            self._previous = pixels
+            self._stored += 1
+        elif screenshot is not None and self.mode != FrameMode.NONE:
+            if self.mode == FrameMode.PROBES:
+                screenshot = self.sampler(screenshot)
+            frame = encode_frame(screenshot)
+        encoded = text.encode("utf8")
+        self._index.write(struct.pack("<IQ", turn, self._data.tell()))
+        self._data.write(RECORD.pack(turn, len(encoded), len(frame)))
+        self._data.write(encoded)
+        self._data.write(frame)
+
+    def flush(self):
+        """Flush both files.
+        """
+        self._data.flush()
+        self._index.flush()
+
+    def close(self):
+        """Flush and close both files.
+        """
+        self._data.close()
+        self._index.close()
+
+
+class RecordingReader:
+    """Lazy reader of a binary container, through memory maps.
+
+    Parameters
+    ----------
+    folder : str
+        Path to the recording folder.
+    cache_size : int
+        Number of decoded keyframes to keep, for the `FrameMode.DELTA` mode.
+
+    Attributes
+    ----------
+    mode : int
+        `FrameMode` of the stored frames.
+    shape : tuple[int]
+        Shape of the stored frames.
+    index : numpy.ndarray
+        Memory mapped index, with fields `turn` and `offset`.
+    folder
+    cache_size
+    _positions : dict[int, int]
+        Position of the last record of each turn.
+    _data : mmap.mmap
+        Memory mapped binary log.
+    _keyframes : collections.OrderedDict[int, numpy.ndarray]
+        Decoded keyframe pixels, by record position, least recently used
+        first.
+    _last : tuple[int, numpy.ndarray]
+        Position and pixels of the last reconstructed frame, so that reading
+        frames in order only applies one delta each.
+
+    """
+
+    def __init__(self, folder, cache_size=4):
+        self.folder = folder
+        self.cache_size = cache_size
+        self._keyframes = collections.OrderedDict()
+        self._last = None
+        with open(os.path.join(folder, BINARY_FILENAME), "rb") as file:
+            self._data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.mode, *shape = HEADER.unpack_from(self._data, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a recording container: %s" % folder)
+        self.shape = tuple(size for size in shape if size > 0)
+        index_path = os.path.join(folder, INDEX_FILENAME)
+        if os.path.getsize(index_path) == 0:
+            self.index = numpy.zeros(0, dtype=INDEX_DTYPE)
+        else:
+            self.index = numpy.memmap(index_path, dtype=INDEX_DTYPE, mode="r")
+        self._positions = {
+            turn: position for position, turn in enumerate(self.index["turn"].tolist())
+        }
+
+    def __len__(self):
+        return len(self.index)
+
+    def _record(self, position):
+        offset = int(self.index["offset"][position])
+        turn, text_length, frame_length = RECORD.unpack_from(self._data, offset)
+        start = offset + RECORD.size
+        return turn, start, text_length, frame_length
+
+    def line(self, position):
+        """Read the log line of a record.
+
+        Parameters
+        ----------
+        position : int
+            Position of the record in the container.
+
+        Returns
+        -------
+        str
+            Log line, as written in a `game.log` file.
+
+        """
+        turn, start, text_length, _ = self._record(position)
+        return "%s\t%s\n" % (
+            str(turn).rjust(3, "0"),
+            self._data[start:start + text_length].decode("utf8")
+        )
+
+    def lines(self):
+        """Read all the log lines.
+
+        Returns
+        -------
+        list[str]
+            Log lines, as written in a `game.log` file.
+
+        """
+        return [self.line(position) for position in range(len(self))]
+
+    def position(self, turn):
+        """Find the position of a turn in the container.
+
+        Parameters
+        ----------
+        turn : int
+            Controller turn.
+
+        Returns
+        -------
+        int
+            Position of the record of that turn.
+
+        """
+        position = self._positions.get(int(turn))
+        if position is None:
+            raise KeyError("No record for turn %d" % turn)
+        return position
+
+    def frame(self, turn):
+        """Read the stored frame of a turn.
+
+        Parameters
+        ----------
+        turn : int
+            Controller turn.
+
+        Returns
+        -------
+        numpy.ndarray
+            Frame of shape `shape`, or `None` if it was not stored.
+
+        """
+        position = self.position(turn)
+        if self.mode == FrameMode.DELTA:
+            pixels = self._reconstruct(position)
+            if pixels is None:
+                return None
+            return numpy.divide(pixels, 255, dtype=numpy.float32)
+        data = self._frame_data(position)
+        if data is None:
+            return None
+        return decode_frame(data, self.shape)
+
+    def _frame_data(self, position):
+        _, start, text_length, frame_length = self._record(position)
+        if frame_length == 0:
+            return None
+        start += text_length
+        return self._data[start:start + frame_length]
+
+    def _keyframe(self, position, data):
+        if position in self._keyframes:
+            self._keyframes.move_to_end(position)
+        else:
+            self._keyframes[position] = numpy.frombuffer(
+                zlib.decompress(data[1:]), dtype=numpy.uint8).reshape(self.shape)
+            while len(self._keyframes) > self.cache_size:
+                self._keyframes.popitem(last=False)
+        return self._keyframes[position]
+
+    def _reconstruct(self, position):
+        if self._frame_data(position) is None:
+            return None
+        deltas = list()
+        current = position
+        while True:
+            if current < 0:
+                raise ValueError("No keyframe before record %d" % position)
+            data = self._frame_data(current)
+            if data is None:
+                current -= 1
+                continue
+            if self._last is not None and self._last[0] == current:
+                pixels = self._last[1].copy()
+                break
+            if data[0] == KEYFRAME:
+                pixels = self._keyframe(current, data).copy()
+                break
+            deltas.append(data)
+            current -= 1
+        for data in reversed(deltas):
+            apply_delta(pixels, data)
+        self._last = position, pixels
+        return pixels
+
+    def screenshot(self, turn):
+        """Read the screenshot of a turn.
+
+        Parameters
+        ----------
+        turn : int
+            Controller turn.
+
+        Returns
+        -------
+        numpy.ndarray
+            RGB screenshot.
+
+        """
+        if self.mode not in (FrameMode.FULL, FrameMode.DELTA):
+            raise ValueError("Recording %s only stores probe pixels" % self.folder)
+        return self.frame(turn)
+
+    def close(self):
+        """Release the memory maps.
+        """
+        self.index = None
+        self._keyframes.clear()
+        self._last = None
+        self._data.close()
+
+
+class FolderRecording:
+    """Reader of a recording with the original layout, with the same
+    interface as `RecordingReader`.
+
+    Parameters
+    ----------
+    folder : str
+        Path to the recording folder.
+
+    Attributes
+    ----------
+    folder
+
+    """
+
+    mode = FrameMode.FULL
+
+    def __init__(self, folder):
+        self.folder = folder
+
+    def lines(self):
+        """Read all the log lines.
+
+        Returns
+        -------
+        list[str]
+            Log lines.
+
+        """
+        with open(os.path.join(self.folder, LOG_FILENAME), "r") as file:
+            return file.readlines()
+
+    def screenshot(self, turn):
+        """Read the screenshot of a turn.
+
+        Parameters
+        ----------
+        turn : int
+            Controller turn.
+
+        Returns
+        -------
+        numpy.ndarray
+            RGB screenshot, or `None` if it was not saved.
+
+        """
+        path = os.path.join(self.folder, str(turn).rjust(3, "0") + ".png")
+        if not os.path.isfile(path):
+            return None
+        return matplotlib.image.imread(path)[:, :, :3]
+
+    frame = screenshot
+
+    def close(self):
+        """For compatibility"""
+
+
+def load(folder):
+    """Open a recording folder, whatever its layout.
+
+    Parameters
+    ----------
+    folder : str
+        Path to the recording folder.
+
+    Returns
+    -------
+    RecordingReader or FolderRecording
+        Reader for the recording.
+
+    """
+    if os.path.isfile(os.path.join(folder, BINARY_FILENAME)):
+        return RecordingReader(folder)
+    return FolderRecording(folder)
+
+
+def log_path(path):
+    """Find the file holding the log lines of a recording.
+
+    Parameters
+    ----------
+    path : str
+        Path to a `game.log` file, to a `game.bin` container, or to a
+        recording folder.
+
+    Returns
+    -------
+    str
+        Path to the `game.bin` container of a recording folder if it has one,
+        to its `game.log` file otherwise, or `path` itself if it is a file.
+
+    """
+    if os.path.isdir(path) and os.path.isfile(os.path.join(path, BINARY_FILENAME)):
+        return os.path.join(path, BINARY_FILENAME)
+    if os.path.isdir(path):
+        return os.path.join(path, LOG_FILENAME)
+    return path
+
+
+def iter_lines(path):
+    """Lazily read the log lines of a recording.
+
+    Parameters
+    ----------
+    path : str
+        Path to a `game.log` file, to a `game.bin` container, or to a
+        recording folder.
+
+    Returns
+    -------
+    Iterator[str]
+        Log lines.
+
+    """
+    path = log_path(path)
+    if os.path.basename(path) == BINARY_FILENAME:
+        reader = RecordingReader(os.path.dirname(path) or ".")
+        try:
+            for position in range(len(reader)):
+                yield reader.line(position)
+        finally:
+            reader.close()
+        return
+    with open(path, "r") as file:
+        yield from file
+
+
+def read_lines(path):
+    """Read the log lines of a recording.
+
+    Parameters
+    ----------
+    path : str
+        Path to a `game.log` file, to a `game.bin` container, or to a
+        recording folder.
+
+    Returns
+    -------
+    list[str]
+        Log lines.
+
+    """
+    return list(iter_lines(path))
+
+
+def find_recordings(pattern):
+    """List the recordings matching a path or a glob pattern.
+
+    Parameters
+    ----------
+    pattern : str
+        Path to a log file, a container or a recording folder, to a folder of
+        recording folders, or glob pattern matching any of those.
+
+    Returns
+    -------
+    list[str]
+        Sorted paths to log files, containers or recording folders.
+
+    """
+    recordings = list()
+    for path in sorted(glob.glob(pattern)):
+        if os.path.isfile(path):
+            recordings.append(path)
+        elif any(os.path.isfile(os.path.join(path, filename))
+                 for filename in [BINARY_FILENAME, LOG_FILENAME]):
+            recordings.append(path)
+        elif os.path.isdir(path):
+            for child in sorted(os.listdir(path)):
+                if os.path.isdir(os.path.join(path, child)):
+                    recordings += find_recordings(glob.escape(os.path.join(path, child)))
+    return recordings
+
+
+def convert(folder, sampler=None, shape=(1920, 1080, 3), delta=False, keyframe_interval=10):
+    """Convert a recording with the original layout into a binary container,
+    written in the same folder. Original files are kept.
+
+    Parameters
+    ----------
+    folder : str
+        Path to the recording folder.
+    sampler : Callable[[numpy.ndarray], numpy.ndarray]
+        If given, only the pixels it extracts are stored, see
+        `RecordingWriter`.
+    shape : tuple[int]
+        Shape of the stored frames.
+    delta : bool
+        Delta-encode the screenshots, ignored if `sampler` is given.
+    keyframe_interval : int
+        Number of stored frames between two keyframes, with `delta`.
+
+    Returns
+    -------
+    tuple[int, int]
+        Size of the original files and of the container, in bytes.
+
+    """
+    source = FolderRecording(folder)
+    mode = FrameMode.DELTA if delta else FrameMode.FULL
+    if sampler is not None:
+        mode = FrameMode.PROBES
+    writer = RecordingWriter(folder, mode, shape, sampler, keyframe_interval)
+    for line in source.lines():
+        turn, text = line.rstrip("\n").split("\t", 1)
+        writer.append(int(turn), text, source.screenshot(int(turn)))
+    writer.close()
+    original = sum(
+        os.path.getsize(path)
+        for path in glob.glob(os.path.join(folder, "*.png")) + [os.path.join(folder, LOG_FILENAME)]
+    )
+    converted = sum(
+        os.path.getsize(os.path.join(folder, filename))
+        for filename in [BINARY_FILENAME, INDEX_FILENAME]
+    )
+    LOGGER.info("Converted %s: %d kB to %d kB", folder, original // 1000, converted // 1000)
+    return original, converted
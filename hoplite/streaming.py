@@ -0,0 +1,261 @@
+"""Continuous screen capture. A long-lived capture session writes raw frames
+to a stream, which a background thread reads into a ring buffer, so that the
+newest frame is always available without waiting for a new capture.
+
+Running this module emits synthetic raw frames on the standard output, as a
+stand-in for a device capture session:
+
+    python -m hoplite.streaming --rate 30 --count 100
+
+"""
+
+import sys
+import time
+import struct
+import logging
+import argparse
+import threading
+import subprocess
+import numpy
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+def decode_frame(data, width, height, header=16, pixel_format=1):
+    """Decode a raw frame, as written by Android `screencap`.
+
+    Parameters
+    ----------
+    data : bytes
+        Raw frame data, header included.
+    width : int
+        Frame width in pixels.
+    height : int
+        Frame height in pixels.
+    header : int
+        Size of the header preceding the pixels, in bytes.
+    pixel_format : int
+        Android `PixelFormat` of the pixels: RGBA_8888 (1), RGBX_8888 (2)
+        or BGRA_8888 (5).
+
+    Returns
+    -------
+    numpy.ndarray
+        RGB matrix of shape `(height, width, 3)` with values between 0 and 1.
+
+    """
+    pixels = numpy.frombuffer(
+        data,
+        dtype=numpy.uint8,
+        count=4 * width * height,
+        offset=header
+    ).reshape(height, width, 4)[:, :, :3]
+    if pixel_format == 5:
+        pixels = pixels[:, :, ::-1]
+    return numpy.divide(pixels, 255, dtype=numpy.float32)
+
+
+class FrameStream:  # pylint: disable=R0902
+    """Read raw frames from a stream in a background thread, keeping the
+    latest ones in a ring buffer.
+
+    Parameters
+    ----------
+    stream : file-like
+        Binary stream of consecutive raw frames.
+    width : int
+        Frame width in pixels.
+    height : int
+        Frame height in pixels.
+    header : int
+        Size of the header preceding each frame, in bytes.
+    pixel_format : int
+        Android `PixelFormat` of the frames, see `decode_frame`.
+    slots : int
+        Number of frames in the ring buffer.
+
+    Attributes
+    ----------
+    frames_received : int
+        Number of frames read so far; the index of the latest frame.
+    process : subprocess.Popen
+        Process writing the frames, if created by `FrameStream.from_process`.
+    connection : object
+        Connection the frames are read from, closed along with the stream.
+    stream
+    width
+    height
+    header
+    pixel_format
+    _buffers : list[bytearray]
+        Ring buffer of raw frames.
+    _latest : int
+        Slot of the ring buffer holding the latest complete frame.
+    _condition : threading.Condition
+        Notified whenever a new frame is complete.
+    _thread : threading.Thread
+        Background reader.
+    _running : bool
+        Whether the background reader should keep going.
+    _served : int
+        Index of the last frame returned by `latest`.
+
+    """
+
+    def __init__(self, stream, width, height, header=16, pixel_format=1, slots=3):  # pylint: disable=R0913
+        self.stream = stream
+        self.width = width
+        self.height = height
+        self.header = header
+        self.pixel_format = pixel_format
+        self.frames_received = 0
+        self.process = None
+        self.connection = None
+        self._buffers = [bytearray(header + 4 * width * height) for _ in range(max(2, slots))]
+        self._latest = None
+        self._condition = threading.Condition()
+        self._thread = None
+        self._running = False
+        self._served = 0
+
+    @classmethod
+    def from_process(cls, args, width, height, **kwargs):
+        """Create a stream reading frames from the standard output of a local
+        process, such as this module run as a script.
+
+        Parameters
+        ----------
+        args : list[str]
+            Command line of the process.
+        width : int
+            Frame width in pixels.
+        height : int
+            Frame height in pixels.
+        **kwargs
+            Other arguments for the `FrameStream` constructor.
+
+        Returns
+        -------
+        FrameStream
+            Stream, not started yet.
+
+        """
+        process = subprocess.Popen(args, stdout=subprocess.PIPE)
+        frame_stream = cls(process.stdout, width, height, **kwargs)
+        frame_stream.process = process
+        return frame_stream
+
+    def _read_into(self, buffer):
+        view = memoryview(buffer)
+        received = 0
+        while received < len(buffer):
+            size = self.stream.readinto(view[received:])
+            if not size:
+                return False
+            received += size
+        return True
+
+    def _run(self):
+        slot = 0
+        while self._running:
+            if slot == self._latest:
+                slot = (slot + 1) % len(self._buffers)
+            if not self._read_into(self._buffers[slot]):
+                if self._running:
+                    LOGGER.warning("Frame stream ended after %d frames", self.frames_received)
+                break
+            with self._condition:
+                self._latest = slot
+                self.frames_received += 1
+                self._condition.notify_all()
+            slot = (slot + 1) % len(self._buffers)
+        self._running = False
+        with self._condition:
+            self._condition.notify_all()
+
+    def start(self):
+        """Start reading frames in the background.
+        """
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop reading frames, and terminate the writing process if any.
+        """
+        self._running = False
+        if self.process is not None:
+            self.process.terminate()
+            self.process.wait()
+        for resource in (self.stream, self.connection):
+            try:
+                if resource is not None:
+                    resource.close()
+            except OSError:
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+
+    def latest(self, newer_than=0, timeout=None):
+        """Get the latest frame. Once the stream has ended, the last frame is
+        returned at most once, and `EOFError` is raised afterwards, so that
+        callers do not loop on a frozen screen.
+
+        Parameters
+        ----------
+        newer_than : int
+            Wait for a frame with an index greater than this one. By default,
+            only waits if no frame was received yet.
+        timeout : float
+            Maximum waiting time in seconds, `None` for no limit.
+
+        Returns
+        -------
+        tuple[int, numpy.ndarray]
+            Index of the frame and RGB matrix of the frame.
+
+        """
+        with self._condition:
+            if not self._condition.wait_for(
+                    lambda: self.frames_received > newer_than or not self._running,
+                    timeout):
+                raise TimeoutError("No new frame after %s seconds" % timeout)
+            if self._latest is None:
+                raise EOFError("Frame stream ended before any frame")
+            if not self._running and self.frames_received <= max(newer_than, self._served):
+                raise EOFError("Frame stream ended after %d frames" % self.frames_received)
+            index = self.frames_received
+            self._served = index
+            data = bytes(self._buffers[self._latest])
+        return index, decode_frame(data, self.width, self.height, self.header, self.pixel_format)
+
+
+def main():
+    """Write synthetic raw frames to the standard output.
+    """
+    parser = argparse.ArgumentParser(description="Emit synthetic raw frames.")
+    parser.add_argument("--width", type=int, default=1080)
+    parser.add_argument("--height", type=int, default=1920)
+    parser.add_argument("--rate", type=float, default=30, help="frames per second")
+    parser.add_argument("--count", type=int, default=0, help="0 for no limit")
+    args = parser.parse_args()
+    header = struct.pack("<4I", args.width, args.height, 1, 0)
+    pixels = numpy.zeros((args.height, args.width, 4), dtype=numpy.uint8)
+    pixels[:, :, 3] = 255
+    index = 0
+    time_start = time.time()
+    try:
+        while args.count == 0 or index < args.count:
+            # The frame index is written in the first pixels
+            pixels[0, :4, 0] = numpy.frombuffer(struct.pack("<I", index), dtype=numpy.uint8)
+            sys.stdout.buffer.write(header + pixels.tobytes())
+            sys.stdout.buffer.flush()
+            index += 1
+            time.sleep(max(0, time_start + index / args.rate - time.time()))
+    except (BrokenPipeError, KeyboardInterrupt):
+        pass
+
+
+if __name__ == "__main__":
+    main()
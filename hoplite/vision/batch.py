@@ -0,0 +1,149 @@
+"""Parse many screenshots with a process pool, e.g. for relabeling recordings
+after a classifier change. Screenshots are sent to the workers in chunks, and
+a bounded number of chunks is in flight at once, so that results can be
+streamed in order with a bounded memory.
+"""
+
+import os
+import glob
+import time
+import logging
+import concurrent.futures
+import hoplite.game.state
+import hoplite.vision.observer
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+_PARSER = None
+
+
+def list_screenshots(source):
+    """List the screenshots to parse.
+
+    Parameters
+    ----------
+    source : str
+        Folder of screenshots, searched recursively, glob pattern, or text file
+        listing one screenshot path per line.
+
+    Returns
+    -------
+    list[str]
+        Paths to the screenshots.
+
+    """
+    if os.path.isdir(source):
+        return sorted(
+            os.path.join(root, filename)
+            for root, _, filenames in os.walk(source)
+            for filename in filenames
+            if filename.lower().endswith(IMAGE_EXTENSIONS)
+        )
+    if os.path.isfile(source) and not source.lower().endswith(IMAGE_EXTENSIONS):
+        with open(source, "r") as file:
+            return [line.strip() for line in file if line.strip()]
+    return sorted(glob.glob(source, recursive=True))
+
+
+def _initialize(cache_directory, terrain_table):
+    global _PARSER  # pylint: disable=W0603
+    cache = None
+    if cache_directory is not None:
+        cache = hoplite.vision.observer.ParseCache(directory=cache_directory)
+    _PARSER = hoplite.vision.observer.ScreenParser(cache=cache, terrain_table=terrain_table)
+
+
+def parse_screenshot(parser, path):
+    """Parse a screenshot into a JSON serializable record.
+
+    Parameters
+    ----------
+    parser : hoplite.vision.observer.ScreenParser
+        Parser to use.
+    path : str
+        Path to the screenshot.
+
+    Returns
+    -------
+    dict
+        Path, interface name, representation of the game or altar state if
+        any, and reading and parsing durations in milliseconds. If the
+        screenshot could not be parsed, an error message replaces the
+        interface and state.
+
+    """
+    record = {"path": path}
+    try:
+        time_start = time.time()
+        array = parser.read_stream(path)
+        time_read = time.time()
+        interface = parser.observe_interface(array)
+        state = None
+        if interface == hoplite.game.state.Interface.PLAYING:
+            state = repr(parser.observe_game(array))
+        elif interface == hoplite.game.state.Interface.ALTAR:
+            state = repr(parser.observe_altar(array))
+        time_parse = time.time()
+    except Exception as error:  # pylint: disable=W0703
+        record["error"] = "%s: %s" % (error.__class__.__name__, error)
+        return record
+    record["interface"] = interface.name
+    record["state"] = state
+    record["timings"] = {
+        "read_ms": 1000 * (time_read - time_start),
+        "parse_ms": 1000 * (time_parse - time_read),
+    }
+    return record
+
+
+def _parse_chunk(paths):
+    return [parse_screenshot(_PARSER, path) for path in paths]
+
+
+def parse_screenshots(paths, workers=None, chunksize=16, cache_directory=None,  # pylint: disable=R0913
+                      terrain_table=None):
+    """Parse screenshots in a process pool.
+
+    Parameters
+    ----------
+    paths : list[str]
+        Paths to the screenshots.
+    workers : int
+        Number of worker processes, default is the number of processors. With
+        1, screenshots are parsed in the current process.
+    chunksize : int
+        Number of screenshots sent to a worker at once.
+    cache_directory : str
+        Path to a folder for caching parsed screenshots on disk, shared by the
+        workers.
+    terrain_table : hoplite.vision.compiler.TableClassifier
+        Compiled terrain classifier.
+
+    Returns
+    -------
+    Iterator[dict]
+        Records from `parse_screenshot`, in the order of `paths`.
+
+    """
+    chunks = (paths[i:i + chunksize] for i in range(0, len(paths), chunksize))
+    if workers == 1:
+        _initialize(cache_directory, terrain_table)
+        for chunk in chunks:
+            yield from _parse_chunk(chunk)
+        return
+    workers = workers or os.cpu_count()
+    with concurrent.futures.ProcessPoolExecutor(
+            workers,
+            initializer=_initialize,
+            initargs=(cache_directory, terrain_table)) as executor:
+        pending = list()
+        for chunk in chunks:
+            pending.append(executor.submit(_parse_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                yield from pending.pop(0).result()
+        for future in pending:
+            yield from future.result()
@@ -5,6 +5,7 @@
 import numpy
 import hoplite.game.terrain
 import hoplite.game.status
+import hoplite.game.state
 
 
 def is_close(tgt, ref, tol=.001):
@@ -26,6 +27,54 @@ def is_close(tgt, ref, tol=.001):
     return numpy.isclose(tgt - ref, 0, atol=tol).all()
 
 
+def are_close(tgt, ref, tol=.001):
+    """Vectorized version of `is_close`, comparing many pixels at once.
+
+    Parameters
+    ----------
+    tgt : numpy.ndarray
+        Target pixels, of shape `(..., 3)`.
+    ref : numpy.ndarray
+        Reference pixel (vector), or reference pixels broadcastable to `tgt`.
+
+    Returns
+    -------
+    numpy.ndarray
+        Boolean array of shape `tgt.shape[:-1]`, `True` where pixels are the
+        same.
+
+    """
+    return numpy.all(numpy.abs(numpy.asarray(tgt) - ref) <= tol, axis=-1)
+
+
+PROBES = {
+    "terrain": (
+        (0, 0), (8, 25), (10, 0), (15, 15), (15, 26), (20, 23), (26, 26),
+        (28, 0), (33, 28), (37, 26), (37, 37), (42, 51), (45, 40), (48, 26),
+    ),
+    "font": (
+        (0, 0), (0, 5), (0, 9), (0, 17), (9, 5), (10, 0), (12, 0), (17, 17),
+        (20, 2), (20, 10),
+    ),
+    "hearts": ((50, 40),),
+    "spear": ((40, 10),),
+    "energy": ((0, 0), (0, 39)),
+    "spree": ((36, 30),),
+    "interface": (
+        (80, 20), (275, 640), (600, 1000), (635, 640), (750, 1000), (949, 542),
+        (1000, 540), (1011, 543), (1450, 540),
+    ),
+    "prayer": (
+        (36, 536), (38, 580), (50, 50), (50, 200), (50, 680), (50, 795),
+        (60, 370), (60, 638), (60, 735), (60, 755), (70, 82), (75, 90),
+        (86, 300), (87, 72), (89, 215), (100, 50), (100, 83),
+    ),
+}
+"""Pixels (row, column) read by each classifier within the part it is given.
+Two parts with identical pixels at these locations get the same label.
+"""
+
+
 def terrain(part):
     """Classify a terrain tile.
 
@@ -198,8 +247,76 @@ def energy(part):
     return 2
 
 
+INTERFACE_RULES = (
+    ((600, 1000), (0.352941, 0.270588, 0.160784), hoplite.game.state.Interface.ALTAR),
+    ((600, 1000), (0.290196, 0.301961, 0.290196), hoplite.game.state.Interface.ALTAR),
+    ((635, 640), (0.647059, 0.000000, 0.000000), hoplite.game.state.Interface.DEATH),
+    ((80, 20), (1.000000, 1.000000, 1.000000), hoplite.game.state.Interface.EMBARK),
+    ((1000, 540), (0.937255, 0.764706, 0.000000), hoplite.game.state.Interface.FLEECE),
+    ((275, 640), (1.000000, 1.000000, 1.000000), hoplite.game.state.Interface.VICTORY),
+    ((1450, 540), (1.000000, 1.000000, 1.000000), hoplite.game.state.Interface.STAIRS),
+    ((750, 1000), (0.352941, 0.270588, 0.160784), hoplite.game.state.Interface.ALTAR),
+    ((1011, 543), None, hoplite.game.state.Interface.FLEECE),
+    ((949, 542), (0.094118, 0.109804, 0.094118), hoplite.game.state.Interface.BLACK),
+)
+"""Ordered rules for `interface` detection: the first rule whose pixel
+(row, column) matches its color gives the interface. A `None` color stands
+for the fleece color test, which is not an exact match.
+"""
+
+_INTERFACE_RULE_PROBES = numpy.array([
+    PROBES["interface"].index(pixel) for pixel, _, _ in INTERFACE_RULES])
+_INTERFACE_RULE_COLORS = numpy.array([
+    (numpy.nan,) * 3 if color is None else color for _, color, _ in INTERFACE_RULES])
+_INTERFACE_FLEECE_RULE = [color for _, color, _ in INTERFACE_RULES].index(None)
+
+
+def interface_probes(part):
+    """Gather the pixels read by the `interface` classifier.
+
+    Parameters
+    ----------
+    part : numpy.ndarray
+        Screenshot array of shape `(1920, 1080, 3)`.
+
+    Returns
+    -------
+    numpy.ndarray
+        Pixels at `PROBES["interface"]`, of shape `(n_probes, 3)`.
+
+    """
+    rows, columns = zip(*PROBES["interface"])
+    return part[rows, columns, :3]
+
+
+def interface_from_probes(probes):
+    """Resolve the `INTERFACE_RULES` over gathered pixels.
+
+    Parameters
+    ----------
+    probes : numpy.ndarray
+        Pixels returned by `interface_probes`.
+
+    Returns
+    -------
+    hoplite.game.state.Interface
+        Interface currently displayed on screen.
+
+    """
+    pixels = probes[_INTERFACE_RULE_PROBES]
+    matches = are_close(pixels, _INTERFACE_RULE_COLORS)
+    fleece = pixels[_INTERFACE_FLEECE_RULE]
+    matches[_INTERFACE_FLEECE_RULE] =\
+        abs(fleece[0] * 0.80465513 + 0.018641233 - fleece[1]) < .03\
+        and numpy.max(abs(fleece - [1, 1, 0])) < .5
+    if not matches.any():
+        return hoplite.game.state.Interface.PLAYING
+    return INTERFACE_RULES[numpy.argmax(matches)][2]
+
+
 def interface(part):
     """Detect which of `hoplite.game.state.Interface` is displayed on screen.
+    All the pixels are read at once, then matched against `INTERFACE_RULES`.
 
     Parameters
     ----------
@@ -212,28 +329,7 @@ def interface(part):
         Interface currently displayed on screen.
 
     """
-    if is_close(part[600, 1000], [0.352941, 0.270588, 0.160784]):
-        return hoplite.game.state.Interface.ALTAR
-    if is_close(part[600, 1000], [0.290196, 0.301961, 0.290196]):
-        return hoplite.game.state.Interface.ALTAR
-    if is_close(part[635, 640], [0.647059, 0.000000, 0.000000]):
-        return hoplite.game.state.Interface.DEATH
-    if is_close(part[80, 20], [1.000000, 1.000000, 1.000000]):
-        return hoplite.game.state.Interface.EMBARK
-    if is_close(part[1000, 540], [0.937255, 0.764706, 0.000000]):
-        return hoplite.game.state.Interface.FLEECE
-    if is_close(part[275, 640], [1.000000, 1.000000, 1.000000]):
-        return hoplite.game.state.Interface.VICTORY
-    if is_close(part[1450, 540], [1.000000, 1.000000, 1.000000]):
-        return hoplite.game.state.Interface.STAIRS
-    if is_close(part[750, 1000], [0.352941, 0.270588, 0.160784]):
-        return hoplite.game.state.Interface.ALTAR
-    if abs(part[1011, 543, 0] * 0.80465513 + 0.018641233 - part[1011, 543, 1]) < .03:
-        if numpy.max(abs(part[1011, 543] - [1, 1, 0])) < .5:
-            return hoplite.game.state.Interface.FLEECE
-    if is_close(part[949, 542], [0.094118, 0.109804, 0.094118]):
-        return  hoplite.game.state.Interface.BLACK
-    return hoplite.game.state.Interface.PLAYING
+    return interface_from_probes(interface_probes(part))
 
 
 def prayer(part):
@@ -0,0 +1,383 @@
+"""Compile table-driven classifiers from labeled template parts.
+
+Hand-written classifiers of `hoplite.vision.classifiers` check pixels one
+after the other. A compiled `TableClassifier` instead reads a small fixed set
+of discriminating pixels, packs their colors into integers, and finds the
+label with a single dictionary lookup. Parts of many templates (e.g. the 79
+terrain tiles) can then be classified with one array gather.
+"""
+
+import os
+import glob
+import json
+import time
+import hashlib
+import logging
+import numpy
+import matplotlib.image
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+def pack_colors(pixels):
+    """Pack RGB pixels into integers.
+
+    Parameters
+    ----------
+    pixels : numpy.ndarray
+        Array of shape `(..., 3)` with values in [0, 1].
+
+    Returns
+    -------
+    numpy.ndarray
+        Array of shape `pixels.shape[:-1]`, where each pixel is encoded as
+        a 24 bits integer `0xRRGGBB`.
+
+    """
+    channels = numpy.rint(numpy.asarray(pixels)[..., :3] * 255).astype(numpy.uint32)
+    return (channels[..., 0] << 16) | (channels[..., 1] << 8) | channels[..., 2]
+
+
+def load_parts(directory):
+    """Load labeled parts from a directory. Each subfolder is named after a
+    label, and contains PNG images of parts with that label, such as the ones
+    saved by `hoplite.vision.observer.Locator` with `save_parts` enabled.
+
+    Parameters
+    ----------
+    directory : str
+        Path to the folder containing one subfolder per label.
+
+    Returns
+    -------
+    tuple[numpy.ndarray, list[str]]
+        Parts stacked in an array of shape `(n_parts, height, width, 3)`, and
+        the label of each part.
+
+    """
+    parts, labels = list(), list()
+    for filename in sorted(glob.glob(os.path.join(directory, "*", "*.png"))):
+        parts.append(matplotlib.image.imread(filename)[:, :, :3])
+        labels.append(os.path.basename(os.path.dirname(filename)))
+    LOGGER.info("Loaded %d parts from %s", len(parts), os.path.realpath(directory))
+    return numpy.stack(parts), labels
+
+
+def label_name(label):
+    """Convert a label returned by a hand-written classifier into a string.
+
+    Parameters
+    ----------
+    label : enum.Enum or str or None
+        Classifier output.
+
+    Returns
+    -------
+    str
+        Name of the enumeration member, or the label itself.
+
+    """
+    if hasattr(label, "name"):
+        return label.name
+    return str(label)
+
+
+def _conflicts(keys, labels, n_labels):
+    # Number of parts misclassified when each key maps to its majority label
+    pairs, counts = numpy.unique(keys * n_labels + labels, return_counts=True)
+    pair_keys = pairs // n_labels
+    starts = numpy.flatnonzero(numpy.r_[True, pair_keys[1:] != pair_keys[:-1]])
+    return len(keys) - numpy.maximum.reduceat(counts, starts).sum()
+
+
+def select_pixels(parts, labels, max_pixels=16, candidates=None):
+    """Greedily select the pixels that best discriminate the labels. At each
+    step, the pixel that leaves the fewest parts misclassified is added, until
+    every key corresponds to a single label.
+
+    Parameters
+    ----------
+    parts : numpy.ndarray
+        Parts of shape `(n_parts, height, width, 3)`.
+    labels : list[str]
+        Label of each part.
+    max_pixels : int
+        Maximum number of pixels to select.
+    candidates : list[tuple[int, int]]
+        (row, column) pixels to select from, e.g. for parts as large as
+        whole screenshots. If `None`, every pixel of the parts is a candidate.
+
+    Returns
+    -------
+    list[tuple[int, int]]
+        Selected (row, column) pixels within the parts.
+
+    """
+    if candidates is None:
+        candidates = list(numpy.ndindex(*parts.shape[1:3]))
+    candidates = [tuple(pixel) for pixel in candidates]
+    rows, columns = numpy.array(candidates, dtype=int).reshape(-1, 2).T
+    colors = pack_colors(parts[:, rows, columns])
+    # Dense codes per pixel keep combined keys small
+    codes = numpy.stack([
+        numpy.unique(colors[:, pixel], return_inverse=True)[1].ravel()
+        for pixel in range(colors.shape[1])
+    ], axis=1).astype(numpy.int64)
+    names, label_codes = numpy.unique(labels, return_inverse=True)
+    label_codes = label_codes.ravel()
+    groups = numpy.zeros(len(parts), dtype=numpy.int64)
+    selected = list()
+    conflicts = _conflicts(groups, label_codes, len(names))
+    while conflicts > 0 and len(selected) < max_pixels:
+        best_pixel, best_conflicts = None, conflicts
+        for pixel in range(codes.shape[1]):
+            candidate = _conflicts(
+                groups * len(parts) + codes[:, pixel], label_codes, len(names))
+            if candidate < best_conflicts:
+                best_pixel, best_conflicts = pixel, candidate
+        if best_pixel is None:
+            LOGGER.warning("Some parts with different labels cannot be told apart")
+            break
+        selected.append(best_pixel)
+        groups = numpy.unique(
+            groups * len(parts) + codes[:, best_pixel],
+            return_inverse=True
+        )[1].ravel()
+        conflicts = best_conflicts
+        LOGGER.debug("Selected pixel %s, %d conflicts left",
+                     candidates[best_pixel], conflicts)
+    return [candidates[pixel] for pixel in selected]
+
+
+class TableClassifier:
+    """Classifier looking up the packed colors of a few pixels in a table.
+
+    Parameters
+    ----------
+    pixels : list[tuple[int, int]]
+        (row, column) pixels read within a part.
+    table : dict[tuple[int], object]
+        Mapping from the packed colors of `pixels` to the label.
+    default : object
+        Label returned for keys missing from the table.
+
+    Attributes
+    ----------
+    rows : numpy.ndarray
+        Rows of `pixels`.
+    columns : numpy.ndarray
+        Columns of `pixels`.
+    pixels
+    table
+    default
+
+    """
+
+    def __init__(self, pixels, table, default=None):
+        self.pixels = [tuple(pixel) for pixel in pixels]
+        self.table = table
+        self.default = default
+        self.rows = numpy.array([row for row, _ in self.pixels], dtype=int)
+        self.columns = numpy.array([column for _, column in self.pixels], dtype=int)
+
+    @classmethod
+    def compile(cls, parts, labels, max_pixels=16, candidates=None):
+        """Compile a classifier from labeled parts.
+
+        Parameters
+        ----------
+        parts : numpy.ndarray
+            Parts of shape `(n_parts, height, width, 3)`.
+        labels : list[str]
+            Label of each part.
+        max_pixels : int
+            Maximum number of pixels to read.
+        candidates : list[tuple[int, int]]
+            Pixels to read from, see `select_pixels`.
+
+        Returns
+        -------
+        TableClassifier
+            Compiled classifier.
+
+        """
+        time_start = time.time()
+        pixels = select_pixels(parts, labels, max_pixels, candidates)
+        classifier = cls(pixels, dict())
+        votes = dict()
+        for key, label in zip(classifier.keys(parts[:, classifier.rows, classifier.columns]),
+                              labels):
+            votes.setdefault(key, dict())
+            votes[key][label] = votes[key].get(label, 0) + 1
+        for key, counts in votes.items():
+            classifier.table[key] = max(counts, key=counts.get)
+        LOGGER.info(
+            "Compiled a table of %d entries over %d pixels in %.1f seconds",
+            len(classifier.table),
+            len(pixels),
+            time.time() - time_start
+        )
+        return classifier
+
+    @staticmethod
+    def keys(pixels):
+        """Compute the table keys of gathered pixels.
+
+        Parameters
+        ----------
+        pixels : numpy.ndarray
+            Pixels of shape `(n_parts, n_pixels, 3)`.
+
+        Returns
+        -------
+        list[tuple[int]]
+            Key of each part.
+
+        """
+        return list(map(tuple, pack_colors(pixels).tolist()))
+
+    def lookup(self, pixels):
+        """Classify parts from their gathered pixels.
+
+        Parameters
+        ----------
+        pixels : numpy.ndarray
+            Pixels of shape `(n_parts, n_pixels, 3)`, read at `pixels`
+            within each part.
+
+        Returns
+        -------
+        list
+            Label of each part.
+
+        """
+        return [self.table.get(key, self.default) for key in self.keys(pixels)]
+
+    def __call__(self, part):
+        return self.lookup(part[self.rows, self.columns][numpy.newaxis])[0]
+
+    def decode(self, decoder):
+        """Convert the labels of the table.
+
+        Parameters
+        ----------
+        decoder : Callable[[str], object]
+            Conversion function, e.g. `hoplite.game.terrain.SurfaceElement.__getitem__`.
+
+        Returns
+        -------
+        TableClassifier
+            Classifier with the converted labels.
+
+        """
+        return TableClassifier(
+            self.pixels,
+            {key: decoder(label) for key, label in self.table.items()},
+            self.default
+        )
+
+    def digest(self):
+        """Hash the pixels and the table of the classifier, e.g. to tell apart
+        cached results obtained with different classifiers.
+
+        Returns
+        -------
+        str
+            Hexadecimal digest.
+
+        """
+        data = json.dumps({
+            "pixels": self.pixels,
+            "table": sorted([list(key), label_name(label)] for key, label in self.table.items()),
+            "default": label_name(self.default),
+        })
+        return hashlib.blake2b(data.encode("ascii"), digest_size=8).hexdigest()
+
+    def save(self, path):
+        """Write the classifier to a JSON file.
+
+        Parameters
+        ----------
+        path : str
+            Path to the output file.
+
+        """
+        with open(path, "w") as file:
+            json.dump({
+                "pixels": self.pixels,
+                "table": [[list(key), label] for key, label in self.table.items()],
+            }, file)
+
+    @classmethod
+    def load(cls, path, decoder=None):
+        """Read a classifier from a JSON file.
+
+        Parameters
+        ----------
+        path : str
+            Path to a file written by `TableClassifier.save`.
+        decoder : Callable[[str], object]
+            If not `None`, conversion function applied to the labels.
+
+        Returns
+        -------
+        TableClassifier
+            Loaded classifier.
+
+        """
+        with open(path, "r") as file:
+            data = json.load(file)
+        classifier = cls(data["pixels"], {tuple(key): label for key, label in data["table"]})
+        if decoder is not None:
+            return classifier.decode(decoder)
+        return classifier
+
+
+def regression(classifier, reference, parts, labels=None):
+    """Compare a compiled classifier against a hand-written one.
+
+    Parameters
+    ----------
+    classifier : TableClassifier
+        Compiled classifier, with string labels.
+    reference : Callable[[numpy.ndarray], object]
+        Hand-written classifier from `hoplite.vision.classifiers`.
+    parts : numpy.ndarray
+        Parts of shape `(n_parts, height, width, 3)`.
+    labels : list[str]
+        Groundtruth labels. If given, both classifiers accuracies are reported.
+
+    Returns
+    -------
+    list[tuple[int, str, str]]
+        Index, compiled label and hand-written label of parts where both
+        classifiers disagree.
+
+    """
+    time_start = time.time()
+    compiled = classifier.lookup(parts[:, classifier.rows, classifier.columns])
+    compiled_time = time.time() - time_start
+    time_start = time.time()
+    expected = [label_name(reference(part)) for part in parts]
+    reference_time = time.time() - time_start
+    mismatches = [
+        (index, predicted, truth)
+        for index, (predicted, truth) in enumerate(zip(compiled, expected))
+        if predicted != truth
+    ]
+    LOGGER.info(
+        "Compiled classifier agrees on %d/%d parts (%.1f ms vs %.1f ms by hand)",
+        len(parts) - len(mismatches),
+        len(parts),
+        1000 * compiled_time,
+        1000 * reference_time
+    )
+    if labels is not None:
+        for name, predictions in [("compiled", compiled), ("hand-written", expected)]:
+            LOGGER.info(
+                "Accuracy of the %s classifier: %.2f%%",
+                name,
+                100 * numpy.mean([a == b for a, b in zip(predictions, labels)])
+            )
+    return mismatches
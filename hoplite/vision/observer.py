@@ -3,18 +3,48 @@
 
 import os
 import time
+import pickle
+import hashlib
+import tempfile
 import logging
+import collections
 import numpy
 import matplotlib.image
 import hoplite.vision.classifiers
 import hoplite.utils
 import hoplite.game.terrain
 import hoplite.game.state
+import hoplite.game.status
 
 
 LOGGER = logging.getLogger(__name__)
 
 
+def row_bands(rows, gap=32):
+    """Group rows into contiguous bands.
+
+    Parameters
+    ----------
+    rows : Iterable[int]
+        Row indices.
+    gap : int
+        Bands separated by less than this number of rows are merged.
+
+    Returns
+    -------
+    list[tuple[int, int]]
+        Sorted (start, stop) ranges, with stop excluded, covering all rows.
+
+    """
+    bands = list()
+    for row in sorted(set(map(int, rows))):
+        if bands and row - bands[-1][1] < gap:
+            bands[-1][1] = row + 1
+        else:
+            bands.append([row, row + 1])
+    return [tuple(band) for band in bands]
+
+
 class ImagePreprocessor:  # pylint: disable=R0903
     """Image preprocessor interface.
     """
@@ -129,6 +159,27 @@ class Locator:  # pylint: disable=R0903
         element_x, element_y = self._locate(i, j)
         return self._extract(array, element_x, element_y)
 
+    def coordinates(self, i, j, pixels):
+        """Convert pixel coordinates within a part into image coordinates.
+
+        Parameters
+        ----------
+        i : int
+            ith-row of the part.
+        j : int
+            jth-row of the part.
+        pixels : list[tuple[int, int]]
+            (row, column) coordinates within the part.
+
+        Returns
+        -------
+        list[tuple[int, int]]
+            (row, column) coordinates within the whole image array.
+
+        """
+        element_x, element_y = self._locate(i, j)
+        return [(element_y + row, element_x + column) for row, column in pixels]
+
 
 class TopLeftLocator(Locator):  # pylint: disable=R0903
     """
@@ -165,69 +216,264 @@ class TerrainLocator(Locator):  # pylint: disable=R0903
 class PrayerLocator(Locator):
     """
     Locator for the prayers available at an altar (i.e. not greyed).
+    `i` refers to the screen row of the prayer panel header, as returned by
+    `PrayerLocator.find_rows`, and `j` is ignored.
 
     Attributes
     ----------
-    _last_i : int
-        Vertical index of lastly detected prayer.
-    _last_value : tuple[float, float, float]
-        Color of pixel at _last_i.
+    HEADER_COLOR : tuple[float, float, float]
+        Color of the top border of an available prayer panel.
+    SCAN_END : int
+        Row (excluded) where the vertical scan for prayer panels stops.
 
     """
 
-    def __init__(self, *args, **kwargs):
-        Locator.__init__(self, *args, **kwargs)
-        self._last_i = 450
-        self._last_value = None
+    HEADER_COLOR = (.3529412, .27058825, .16078432)
+    SCAN_END = 1600
 
-    def get_last_i(self):
-        """Getter for the `_last_i` attribute.
+    def _locate(self, i, j):
+        return self.anchor_x, i
+
+    def find_rows(self, array):
+        """Find the rows at which available prayer panels start. The column
+        at `anchor_x` is scanned from `anchor_y` to `SCAN_END`; a panel starts
+        at each row where the pixel color changes into the header color.
+
+        Parameters
+        ----------
+        array : numpy.ndarray
+            Screenshot array of shape `(1920, 1080, 3)`.
 
         Returns
         -------
-        int
-            Vertical index of lastly detected prayer.
+        numpy.ndarray
+            Sorted row indices of the prayer panels headers.
 
         """
-        return self._last_i
+        column = array[self.anchor_y:self.SCAN_END, self.anchor_x, :3]
+        changed = numpy.any(column[1:] != column[:-1], axis=1)
+        header = hoplite.vision.classifiers.are_close(column[1:], self.HEADER_COLOR)
+        return self.anchor_y + 1 + numpy.flatnonzero(changed & header)
 
-    def _locate(self, i, j):
-        return j, i
 
-    def get(self, array, i, j):
-        j_ = 40  # pylint: disable=C0103
-        for i_ in range(self._last_i, 1600):  # pylint: disable=C0103
-            if self._last_value is None:
-                self._last_value = array[i_, j_, :]
-            if (self._last_value == array[i_, j_, :]).all():
-                continue
-            self._last_value = array[i_, j_, :]
-            if hoplite.vision.classifiers.is_close(
-                    array[i_, j_, :],
-                    [.3529412, .27058825, .16078432]):
-                self._last_i = i_
-                return self._extract(array, *self._locate(i_, j_))
-        self._last_i = 450
-        self._last_value = None
+class ParseCache:
+    """Cache of parsing results, keyed by a hash of the probe pixels of the
+    parsed frame. Entries are kept in memory with a least recently used
+    eviction policy, and optionally written to disk. The on-disk tier can be
+    shared by several processes: files are written atomically, and unreadable
+    ones are treated as missing.
+
+    Parameters
+    ----------
+    capacity : int
+        Maximum number of entries kept in memory.
+    directory : str
+        Path to a folder for the on-disk tier. If `None`, entries are only
+        kept in memory.
+
+    Attributes
+    ----------
+    hits : int
+        Number of lookups found in memory.
+    disk_hits : int
+        Number of lookups found on disk only.
+    misses : int
+        Number of lookups not found.
+    capacity
+    directory
+    _entries : collections.OrderedDict
+        In-memory entries, from least to most recently used.
+
+    """
+
+    def __init__(self, capacity=256, directory=None):
+        self.capacity = capacity
+        self.directory = directory
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        if self.directory is not None and not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+
+    def __str__(self):
+        return "%d/%d hits (%.1f%%), %d from disk, %d entries in memory" % (
+            self.hits + self.disk_hits,
+            self.lookups(),
+            100 * self.hit_rate(),
+            self.disk_hits,
+            len(self._entries)
+        )
+
+    @staticmethod
+    def key(kind, probes):
+        """Compute the cache key of a frame.
+
+        Parameters
+        ----------
+        kind : str
+            Kind of parsing result, e.g. `"interface"`, `"game"` or `"altar"`.
+        probes : numpy.ndarray
+            Probe pixels of the frame read by that kind of parsing.
+
+        Returns
+        -------
+        str
+            Cache key.
+
+        """
+        digest = hashlib.blake2b(numpy.ascontiguousarray(probes).tobytes(), digest_size=16)
+        return "%s-%s" % (kind, digest.hexdigest())
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".pickle")
+
+    def _insert(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def get(self, key):
+        """Look for an entry in the cache.
+
+        Parameters
+        ----------
+        key : str
+            Cache key, as returned by `ParseCache.key`.
+
+        Returns
+        -------
+        object
+            Cached value, or `None` if it is missing.
+
+        """
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+        if self.directory is not None:
+            try:
+                with open(self._path(key), "rb") as file:
+                    value = pickle.load(file)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                pass
+            else:
+                self.disk_hits += 1
+                self._insert(key, value)
+                return value
+        self.misses += 1
         return None
 
+    def put(self, key, value):
+        """Add an entry to the cache.
 
-class ScreenParser:
+        Parameters
+        ----------
+        key : str
+            Cache key, as returned by `ParseCache.key`.
+        value : object
+            Parsing result to cache. Must be picklable if the on-disk tier
+            is enabled.
+
+        """
+        self._insert(key, value)
+        if self.directory is not None:
+            # Other processes may share the folder, so readers must never see
+            # a partially written file
+            descriptor, path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(descriptor, "wb") as file:
+                    pickle.dump(value, file)
+                os.replace(path, self._path(key))
+            except BaseException:
+                os.remove(path)
+                raise
+
+    def lookups(self):
+        """Count the lookups performed so far.
+
+        Returns
+        -------
+        int
+            Total number of lookups.
+
+        """
+        return self.hits + self.disk_hits + self.misses
+
+    def hit_rate(self):
+        """Compute the proportion of lookups that were found.
+
+        Returns
+        -------
+        float
+            Hit rate, between 0 and 1.
+
+        """
+        if self.lookups() == 0:
+            return 0.
+        return (self.hits + self.disk_hits) / self.lookups()
+
+
+class ScreenParser:  # pylint: disable=R0902
     """Wrapper for screenshot parsing tools.
 
+    A game screenshot is divided into regions: the 79 terrain tiles, in the
+    order of `hoplite.utils.SURFACE_COORDINATES`, followed by the HUD
+    elements listed in `HUD_ELEMENTS`. Each region is given the set of probe
+    pixels its classifiers read (see `hoplite.vision.classifiers.PROBES`, and
+    the pixels of the `terrain_table` for terrain tiles), so that a region
+    whose probe pixels did not change between two frames does not need to be
+    classified again.
+
     Parameters
     ----------
     save_parts : bool
         Whether to save extracted parts to disk.
+    cache : ParseCache
+        Cache for parsing results, so that identical frames are only
+        classified once. If `None`, every frame is classified.
+    terrain_table : hoplite.vision.compiler.TableClassifier
+        Compiled terrain classifier, with `hoplite.game.terrain.SurfaceElement`
+        labels. Tiles it does not recognize fall back to
+        `hoplite.vision.classifiers.terrain`. If `None`, only the latter is used.
 
     Attributes
     ----------
     locators : dict[str, Locator]
         Locators that will be used for the observation.
+    cache
+    terrain_table
+    HUD_ELEMENTS : tuple[str]
+        Names of the HUD regions, each parsed by the `_observe_{name}` method.
+    MAX_DIGITS : int
+        Maximum number of digits of a displayed integer.
+    MAX_HEARTS : int
+        Maximum number of hearts in the lifebar.
+    _probe_rows : numpy.ndarray
+        Rows of all the probe pixels.
+    _probe_columns : numpy.ndarray
+        Columns of all the probe pixels.
+    _probe_regions : numpy.ndarray
+        Index of the region each probe pixel belongs to.
+    _table_pixels : tuple[numpy.ndarray, numpy.ndarray]
+        Rows and columns, of shape `(79, n_pixels)`, of the pixels read by
+        the `terrain_table` in each terrain tile.
+    _table_digest : str
+        Digest of the `terrain_table`, added to the cache keys.
+    bands : dict[str, list[tuple[int, int]]]
+        Bands of rows read for detecting the interface (`"interface"`), and
+        for parsing a game (`"game"`) or an altar (`"altar"`), see `row_bands`.
 
     """
 
-    def __init__(self, save_parts=False):
+    HUD_ELEMENTS = ("depth", "energy", "cooldown", "hearts", "spear", "spree")
+    MAX_DIGITS = 3
+    MAX_HEARTS = 8
+
+    def __init__(self, save_parts=False, cache=None, terrain_table=None):
+        self.cache = cache
+        self.terrain_table = terrain_table
         self.locators = {
             "terrain": TerrainLocator((52, 52), (540, 903), 104, 112, save_parts=save_parts),
             "cooldown": TopLeftLocator((20, 28), (158, 1885), save_parts=save_parts),
@@ -241,6 +487,164 @@ class ScreenParser:
             "spree": TopLeftLocator((60, 72), (874, 1668), save_parts=save_parts),
             "prayer": PrayerLocator((900, 120), (40, 450), save_parts=save_parts),
         }
+        self._table_pixels = None
+        self._table_digest = None
+        if self.terrain_table is not None:
+            coordinates = numpy.array([
+                self.locators["terrain"].coordinates(pos.y, pos.x, self.terrain_table.pixels)
+                for pos in hoplite.utils.SURFACE_COORDINATES
+            ]).reshape(len(hoplite.utils.SURFACE_COORDINATES), -1, 2)
+            self._table_pixels = coordinates[:, :, 0], coordinates[:, :, 1]
+            self._table_digest = self.terrain_table.digest()
+        probes = self._region_probes()
+        self._probe_rows = numpy.array([row for pixels in probes for row, _ in pixels])
+        self._probe_columns = numpy.array([col for pixels in probes for _, col in pixels])
+        self._probe_regions = numpy.repeat(
+            numpy.arange(len(probes)),
+            [len(pixels) for pixels in probes]
+        )
+        altar_locator = self.locators["prayer"]
+        self.bands = {
+            "interface": row_bands(
+                row for row, _ in hoplite.vision.classifiers.PROBES["interface"]),
+            "game": row_bands(self._probe_rows),
+            "altar": [(altar_locator.anchor_y, altar_locator.SCAN_END + altar_locator.height)],
+        }
+
+    def _region_probes(self):
+        probes = hoplite.vision.classifiers.PROBES
+        regions = list()
+        for index, pos in enumerate(hoplite.utils.SURFACE_COORDINATES):
+            regions.append(self.locators["terrain"].coordinates(
+                pos.y, pos.x, probes["terrain"]))
+            # The compiled table reads its own pixels before falling back
+            if self._table_pixels is not None:
+                rows, columns = self._table_pixels
+                regions[-1] += list(zip(rows[index].tolist(), columns[index].tolist()))
+        hud = {name: list() for name in self.HUD_ELEMENTS}
+        # Integers are read up to the first non-digit character
+        for column in range(self.MAX_DIGITS + 1):
+            hud["depth"] += self.locators["depth"].coordinates(0, column, probes["font"])
+            for locator in ["energy_one", "energy_two", "energy_three"]:
+                hud["energy"] += self.locators[locator].coordinates(0, column, probes["font"])
+        hud["energy"] += self.locators["energy"].coordinates(0, 0, probes["energy"])
+        hud["cooldown"] += self.locators["cooldown"].coordinates(0, 0, probes["font"])
+        for column in range(self.MAX_HEARTS + 1):
+            hud["hearts"] += self.locators["hearts"].coordinates(0, column, probes["hearts"])
+        hud["spear"] += self.locators["spear"].coordinates(0, 0, probes["spear"])
+        for column in range(3):
+            hud["spree"] += self.locators["spree"].coordinates(0, column, probes["spree"])
+        regions += [hud[name] for name in self.HUD_ELEMENTS]
+        return regions
+
+    def cached(self, kind, probes, compute):
+        """Look for a parsing result in the cache, computing and caching it
+        if it is missing.
+
+        Parameters
+        ----------
+        kind : str
+            Kind of parsing result, see `ParseCache.key`. If a `terrain_table`
+            is used, its digest is added to the kind, so that results of
+            different classifiers are cached separately.
+        probes : numpy.ndarray
+            Probe pixels of the frame read by that kind of parsing.
+        compute : Callable[[], object]
+            Function computing the result on cache miss.
+
+        Returns
+        -------
+        object
+            Parsing result.
+
+        """
+        if self.cache is None:
+            return compute()
+        if self._table_digest is not None:
+            kind = "%s-%s" % (kind, self._table_digest)
+        key = self.cache.key(kind, probes)
+        value = self.cache.get(key)
+        if value is None:
+            value = compute()
+            self.cache.put(key, value)
+        LOGGER.debug("Parse cache: %s", self.cache)
+        return value
+
+    def sample_probes(self, array):
+        """Gather the probe pixels of all the regions of a game screenshot.
+
+        Parameters
+        ----------
+        array : numpy.ndarray
+            Screenshot array of shape `(1920, 1080, 3)`.
+
+        Returns
+        -------
+        numpy.ndarray
+            Probe pixels, of shape `(n_probes, 3)`.
+
+        """
+        return array[self._probe_rows, self._probe_columns, :3]
+
+    def sample_screen_probes(self, array):
+        """Gather the probe pixels of the interface and of all the regions of
+        a game screenshot.
+
+        Parameters
+        ----------
+        array : numpy.ndarray
+            Screenshot array of shape `(1920, 1080, 3)`.
+
+        Returns
+        -------
+        numpy.ndarray
+            Interface probe pixels followed by the ones of `sample_probes`,
+            of shape `(n_probes, 3)`.
+
+        """
+        return numpy.concatenate([
+            hoplite.vision.classifiers.interface_probes(array),
+            self.sample_probes(array)
+        ])
+
+    def probe_mask(self, regions):
+        """Select the probe pixels of some regions.
+
+        Parameters
+        ----------
+        regions : numpy.ndarray
+            Indices of regions (terrain tiles, then `HUD_ELEMENTS`).
+
+        Returns
+        -------
+        numpy.ndarray
+            Boolean mask over the probe pixels returned by `sample_probes`.
+
+        """
+        return numpy.isin(self._probe_regions, regions)
+
+    def changed_regions(self, prev_probes, next_probes):
+        """Compare the probe pixels of two frames.
+
+        Parameters
+        ----------
+        prev_probes : numpy.ndarray
+            Probe pixels of the previous frame, from `sample_probes`.
+        next_probes : numpy.ndarray
+            Probe pixels of the current frame, from `sample_probes`.
+
+        Returns
+        -------
+        numpy.ndarray
+            Boolean mask over regions (terrain tiles, then `HUD_ELEMENTS`),
+            `True` where at least one probe pixel changed.
+
+        """
+        changed = numpy.any(prev_probes != next_probes, axis=1)
+        return numpy.bincount(
+            self._probe_regions[changed],
+            minlength=len(hoplite.utils.SURFACE_COORDINATES) + len(self.HUD_ELEMENTS)
+        ) > 0
 
     def _observe_integer(self, array, locator):
         buffer = ""
@@ -323,17 +727,161 @@ class ScreenParser:
                      1000 * (time.time() - time_start))
         return spree
 
-    def _observe_terrain(self, array):
+    def _observe_terrain(self, array, previous=None, changed=None):
         time_start = time.time()
-        surface = list()
-        for pos in hoplite.utils.SURFACE_COORDINATES:
+        if previous is None:
+            surface = [None] * len(hoplite.utils.SURFACE_COORDINATES)
+            todo = numpy.arange(len(hoplite.utils.SURFACE_COORDINATES))
+        else:
+            surface = list(previous)
+            todo = numpy.flatnonzero(changed[:len(hoplite.utils.SURFACE_COORDINATES)])
+        if self.terrain_table is not None and todo.size > 0:
+            rows, columns = self._table_pixels
+            labels = self.terrain_table.lookup(array[rows[todo], columns[todo], :3])
+            for index, label in zip(todo, labels):
+                surface[index] = label
+            todo = [index for index, label in zip(todo, labels) if label is None]
+        for index in todo:
+            pos = hoplite.utils.SURFACE_COORDINATES[index]
             part = self.locators["terrain"].get(array, pos.y, pos.x)
-            label = hoplite.vision.classifiers.terrain(part)
-            surface.append(label)
-        terrain = hoplite.game.terrain.Terrain.from_list(surface)
+            surface[index] = hoplite.vision.classifiers.terrain(part)
         LOGGER.debug("Observed terrain in %.1f ms",
                      1000 * (time.time() - time_start))
-        return terrain
+        return surface
+
+    def observe_regions(self, array, previous=None, changed=None):
+        """Classify the regions of a screenshot of a game.
+
+        Parameters
+        ----------
+        array : numpy.ndarray
+            Screenshot array of shape `(1920, 1080, 3)`.
+        previous : dict
+            Regions observed in a previous frame, as returned by this method.
+            If `None`, every region is classified.
+        changed : numpy.ndarray
+            Mask returned by `changed_regions`. Only regions marked as changed
+            are classified, other ones are copied from `previous`.
+
+        Returns
+        -------
+        dict
+            Mapping from `"terrain"` to the list of observed
+            `hoplite.game.terrain.SurfaceElement`, and from each name in
+            `HUD_ELEMENTS` to its observed value.
+
+        """
+        previous_terrain = None if previous is None else previous["terrain"]
+        regions = {"terrain": self._observe_terrain(array, previous_terrain, changed)}
+        for index, name in enumerate(self.HUD_ELEMENTS, len(hoplite.utils.SURFACE_COORDINATES)):
+            if previous is not None and not changed[index]:
+                regions[name] = previous[name]
+            else:
+                regions[name] = getattr(self, "_observe_" + name)(array)
+        return regions
+
+    @staticmethod
+    def build_game(regions):
+        """Create a game state from observed regions.
+
+        Parameters
+        ----------
+        regions : dict
+            Observed regions, as returned by `observe_regions`.
+
+        Returns
+        -------
+        hoplite.game.state.GameState
+            Corresponding game state.
+
+        """
+        state = hoplite.game.state.GameState()
+        state.depth = regions["depth"]
+        state.terrain = hoplite.game.terrain.Terrain.from_list(regions["terrain"])
+        state.status.energy = regions["energy"]
+        state.status.cooldown = regions["cooldown"]
+        current_health, max_health = regions["hearts"]
+        state.status.health = current_health
+        # Attributes may be shared with copies of the status, so they are
+        # replaced rather than modified
+        attributes = hoplite.game.status.PlayerAttributes()
+        attributes.maximum_health = max_health
+        state.status.attributes = attributes
+        state.status.spear = regions["spear"]
+        state.status.spree = regions["spree"]
+        return state
+
+    @staticmethod
+    def expected_regions(state):
+        """Compute the regions a game state should be observed as, the inverse
+        of `build_game`.
+
+        Parameters
+        ----------
+        state : hoplite.game.state.GameState
+            Game state, e.g. predicted by `hoplite.game.moves.PlayerMove.apply`.
+
+        Returns
+        -------
+        dict
+            Regions, as returned by `observe_regions`.
+
+        """
+        return {
+            "terrain": state.terrain.to_list(),
+            "depth": state.depth,
+            "energy": state.status.energy,
+            "cooldown": state.status.cooldown,
+            "hearts": (state.status.health, state.status.attributes.maximum_health),
+            "spear": state.status.spear,
+            "spree": state.status.spree,
+        }
+
+    def region_differences(self, prev_regions, next_regions):
+        """Compare the values of the regions of two frames.
+
+        Parameters
+        ----------
+        prev_regions : dict
+            Regions of the previous frame, see `observe_regions`.
+        next_regions : dict
+            Regions of the current frame, see `observe_regions`.
+
+        Returns
+        -------
+        numpy.ndarray
+            Boolean mask over regions, as for `changed_regions`, `True` where
+            the values differ.
+
+        """
+        return numpy.array([
+            prev_tile != next_tile
+            for prev_tile, next_tile in zip(prev_regions["terrain"], next_regions["terrain"])
+        ] + [
+            prev_regions[name] != next_regions[name]
+            for name in self.HUD_ELEMENTS
+        ])
+
+    def observe_interface(self, array):
+        """Detect which interface is displayed on a screenshot.
+
+        Parameters
+        ----------
+        array : numpy.ndarray
+            Screenshot array of shape `(1920, 1080, 3)`.
+
+        Returns
+        -------
+        hoplite.game.state.Interface
+            Interface displayed on the screenshot.
+
+        """
+        probes = hoplite.vision.classifiers.interface_probes(array)
+        return self.cached(
+            "interface",
+            probes,
+            lambda: hoplite.vision.classifiers.interface_from_probes(probes)
+        )
 
     def observe_game(self, array):
         """Parse a screenshot of a game.
@@ -350,16 +898,11 @@ class ScreenParser:
 
         """
         time_start = time.time()
-        state = hoplite.game.state.GameState()
-        state.depth = self._observe_depth(array)
-        state.terrain = self._observe_terrain(array)
-        state.status.energy = self._observe_energy(array)
-        state.status.cooldown = self._observe_cooldown(array)
-        current_health, max_health = self._observe_hearts(array)
-        state.status.health = current_health
-        state.status.attributes.maximum_health = max_health
-        state.status.spear = self._observe_spear(array)
-        state.status.spree = self._observe_spree(array)
+        state = self.build_game(self.cached(
+            "game",
+            self.sample_probes(array),
+            lambda: self.observe_regions(array)
+        ))
         LOGGER.info(
             "Observed screenshot in %.3f seconds",
             time.time() - time_start
@@ -380,13 +923,28 @@ class ScreenParser:
             Parsed altar state.
 
         """
+        time_start = time.time()
+        locator = self.locators["prayer"]
+        rows = locator.find_rows(array)
+        probes = array[locator.anchor_y:locator.SCAN_END, locator.anchor_x, :3]
+        pixels = list()
+        for row in rows:
+            pixels += locator.coordinates(row, 0, hoplite.vision.classifiers.PROBES["prayer"])
+        if pixels:
+            panel_rows, panel_columns = zip(*pixels)
+            probes = numpy.concatenate([probes, array[panel_rows, panel_columns, :3]])
+
+        def observe_prayers():
+            prayers = dict()
+            for row in rows:
+                label = hoplite.vision.classifiers.prayer(locator.get(array, row, 0))
+                prayers[label] = int(row)
+            return prayers
+
         altar = hoplite.game.state.AltarState()
-        while True:
-            part = self.locators["prayer"].get(array, 0, 0)
-            if part is None:
-                break
-            label = hoplite.vision.classifiers.prayer(part)
-            altar.prayers[label] = self.locators["prayer"].get_last_i()
+        altar.prayers = dict(self.cached("altar", probes, observe_prayers))
+        LOGGER.debug("Observed altar in %.1f ms",
+                     1000 * (time.time() - time_start))
         return altar
 
     @staticmethod
@@ -415,6 +973,22 @@ class Observer:
     ----------
     monkey_runner : hoplite.monkey_runner.MonkeyRunnerInterface
         Interface controlling the game, to retrieve screenshots froms.
+    incremental : bool
+        Whether to only classify again the regions of the screen that changed
+        since the previously parsed game screenshot.
+    cache : ParseCache
+        Cache for parsing results, passed to the `ScreenParser`.
+    terrain_table : hoplite.vision.compiler.TableClassifier
+        Compiled terrain classifier, passed to the `ScreenParser`.
+    partial_capture : bool
+        Whether to only capture the rows of the screen needed for detecting
+        the interface, and then the ones needed for parsing it, using
+        `hoplite.ppadb_runner.PurePythonAdbInterface.snapshot_rows`. Saved
+        screenshots are then partially black.
+    stream : hoplite.streaming.FrameStream
+        If not `None`, started stream of frames from a persistent capture
+        session. Screenshots are then the latest frame of the stream, and
+        `partial_capture` is ignored.
 
     Attributes
     ----------
@@ -422,14 +996,46 @@ class Observer:
         Last screenshot taken of the screen. Should have shape `(1920, 1080, 3)`.
     parser : ScreenParser
         Parser for the screenshot.
+    interface : hoplite.game.state.Interface
+        Interface detected on the last screenshot.
     monkey_runner
+    incremental
+    partial_capture
+    stream
+    frame_index : int
+        Index, within `stream`, of the last screenshot.
+    _interface_probes : numpy.ndarray
+        Pixels read for detecting the interface of the last screenshot.
+    _last_probes : numpy.ndarray
+        Probe pixels of the previously parsed game screenshot.
+    _last_regions : dict
+        Regions observed in the previously parsed game screenshot.
+    _full_parse_time : float
+        Duration, in seconds, of the last full parsing, used as a reference
+        for the time saved by incremental parsing.
+    predictions_verified : int
+        Number of predicted states confirmed by the screenshot.
+    predictions_rejected : int
+        Number of predicted states contradicted by the screenshot.
 
     """
 
-    def __init__(self, monkey_runner):
+    def __init__(self, monkey_runner, incremental=True, cache=None, terrain_table=None,  # pylint: disable=R0913
+                 partial_capture=False, stream=None):
         self.monkey_runner = monkey_runner
+        self.partial_capture = partial_capture and stream is None
+        self.stream = stream
+        self.frame_index = None
         self.screenshot = None
-        self.parser = ScreenParser()
+        self.parser = ScreenParser(cache=cache, terrain_table=terrain_table)
+        self.interface = None
+        self._interface_probes = None
+        self.incremental = incremental
+        self._last_probes = None
+        self._last_regions = None
+        self._full_parse_time = None
+        self.predictions_verified = 0
+        self.predictions_rejected = 0
 
     def fetch_screenshot(self):
         """Take a screenshot and check the currently displayed interface.
@@ -440,23 +1046,120 @@ class Observer:
             Interface recognized by the game.
 
         """
-        self.screenshot = self.parser.read_stream(
-            self.monkey_runner.snapshot(as_stream=True))
-        return hoplite.vision.classifiers.interface(self.screenshot)
+        if self.stream is not None:
+            self.frame_index, self.screenshot = self.stream.latest()
+        elif self.partial_capture:
+            self.screenshot = self.monkey_runner.snapshot_rows(self.parser.bands["interface"])
+        else:
+            self.screenshot = self.parser.read_stream(
+                self.monkey_runner.snapshot(as_stream=True))
+        probes = hoplite.vision.classifiers.interface_probes(self.screenshot)
+        if not self.same_interface(probes):
+            self.interface = self.parser.observe_interface(self.screenshot)
+        self._interface_probes = probes
+        if self.partial_capture:
+            if self.interface == hoplite.game.state.Interface.PLAYING:
+                self.screenshot = self.monkey_runner.snapshot_rows(self.parser.bands["game"])
+            elif self.interface == hoplite.game.state.Interface.ALTAR:
+                self.screenshot = self.monkey_runner.snapshot_rows(self.parser.bands["altar"])
+        return self.interface
+
+    def sample_screen(self):
+        """Capture the probe pixels of the interface and of the game regions,
+        as cheaply as the capture method allows.
+
+        Returns
+        -------
+        numpy.ndarray
+            Probe pixels, of shape `(n_probes, 3)`.
 
-    def save_screenshot(self, filename):
+        """
+        if self.stream is not None:
+            self.frame_index, array = self.stream.latest(newer_than=self.frame_index or 0)
+        elif self.partial_capture:
+            array = self.monkey_runner.snapshot_rows(
+                self.parser.bands["interface"] + self.parser.bands["game"])
+        else:
+            array = self.parser.read_stream(self.monkey_runner.snapshot(as_stream=True))
+        return self.parser.sample_screen_probes(array)
+
+    def wait_stable(self, frames=3, timeout=1., minimum=.1):
+        """Wait for the screen to stop changing, e.g. after an action.
+
+        Parameters
+        ----------
+        frames : int
+            Number of consecutive identical samples required.
+        timeout : float
+            Maximum waiting time, in seconds.
+        minimum : float
+            Minimum waiting time, in seconds, to let the game react to the
+            action before sampling.
+
+        Returns
+        -------
+        tuple[float, bool]
+            Waiting time in seconds, and whether the screen was stable.
+
+        """
+        time_start = time.time()
+        time.sleep(minimum)
+        previous, count = None, 0
+        while time.time() - time_start < timeout:
+            probes = self.sample_screen()
+            if previous is not None and numpy.array_equal(probes, previous):
+                count += 1
+                if count + 1 >= frames:
+                    return time.time() - time_start, True
+            else:
+                count = 0
+            previous = probes
+        return time.time() - time_start, False
+
+    def same_interface(self, probes):
+        """Check whether the interface pixels are the same as on the previous
+        screenshot, in which case the interface is the same as well.
+
+        Parameters
+        ----------
+        probes : numpy.ndarray
+            Pixels returned by `hoplite.vision.classifiers.interface_probes`.
+
+        Returns
+        -------
+        bool
+            `True` if the interface did not change.
+
+        """
+        return self._interface_probes is not None\
+            and numpy.array_equal(probes, self._interface_probes)
+
+    def save_screenshot(self, filename, screenshot=None):
         """Save the last screenshot as a PNG file.
 
         Parameters
         ----------
         filename : str
             Path the the file to write the image to.
+        screenshot : numpy.ndarray
+            Screenshot to save instead of the last one, e.g. an earlier one
+            kept by a `hoplite.controller.Recorder`.
 
         """
-        matplotlib.image.imsave(filename, self.screenshot)
+        matplotlib.image.imsave(filename, self.screenshot if screenshot is None else screenshot)
 
-    def parse_game(self):
-        """Parse the current screenshot looking for the game interface.
+    def parse_game(self, expected=None):
+        """Parse the current screenshot looking for the game interface. If
+        `incremental` is set, only the regions whose probe pixels changed
+        since the previous call are classified again.
+
+        Parameters
+        ----------
+        expected : hoplite.game.state.GameState
+            Predicted state of the game. If given, only the regions the
+            prediction changes are classified, and the probe pixels of the
+            other ones are checked to be unchanged (see `verify`). The screenshot is fully
+            parsed if the prediction turns out wrong.
 
         Returns
         -------
@@ -464,7 +1167,83 @@ class Observer:
             Current parsed game state.
 
         """
-        return self.parser.observe_game(self.screenshot)
+        probes = self.parser.sample_probes(self.screenshot)
+        regions = None
+        if expected is not None and self._last_regions is not None:
+            regions = self.verify(probes, expected)
+        if regions is None:
+            regions = self.parser.cached("game", probes, lambda: self._observe_regions(probes))
+        if self.parser.cache is not None:
+            LOGGER.info("Parse cache: %s", self.parser.cache)
+        self._last_probes = probes
+        self._last_regions = regions
+        return self.parser.build_game(regions)
+
+    def verify(self, probes, expected):
+        """Check the current screenshot against a predicted state. All the
+        probe pixels of the regions the prediction leaves unchanged must be
+        identical to the previous ones, so that a wrong prediction never
+        becomes the reference of incremental parsing.
+
+        Parameters
+        ----------
+        probes : numpy.ndarray
+            Probe pixels of the current screenshot, from
+            `ScreenParser.sample_probes`.
+        expected : hoplite.game.state.GameState
+            Predicted state of the game.
+
+        Returns
+        -------
+        dict
+            Observed regions if the prediction is correct, `None` otherwise.
+
+        """
+        time_start = time.time()
+        expected_regions = self.parser.expected_regions(expected)
+        last_regions = self.parser.expected_regions(self.parser.build_game(self._last_regions))
+        predicted = self.parser.region_differences(last_regions, expected_regions)
+        mask = self.parser.probe_mask(numpy.flatnonzero(~predicted))
+        regions = None
+        if numpy.array_equal(probes[mask], self._last_probes[mask]):
+            observed = self.parser.observe_regions(self.screenshot, last_regions, predicted)
+            normalized = self.parser.expected_regions(self.parser.build_game(observed))
+            if not self.parser.region_differences(normalized, expected_regions).any():
+                regions = observed
+        if regions is None:
+            self.predictions_rejected += 1
+        else:
+            self.predictions_verified += 1
+        LOGGER.info(
+            "Prediction %s in %.1f ms, checking %d changed regions (accuracy %d/%d)",
+            "rejected" if regions is None else "verified",
+            1000 * (time.time() - time_start),
+            numpy.count_nonzero(predicted),
+            self.predictions_verified,
+            self.predictions_verified + self.predictions_rejected
+        )
+        return regions
+
+    def _observe_regions(self, probes):
+        time_start = time.time()
+        # Without a reference duration, e.g. when the previous regions came
+        # from the disk cache, the screenshot is fully parsed to measure it
+        if not self.incremental or self._last_regions is None or self._full_parse_time is None:
+            regions = self.parser.observe_regions(self.screenshot)
+            self._full_parse_time = time.time() - time_start
+            LOGGER.info("Parsed all regions in %.1f ms", 1000 * self._full_parse_time)
+            return regions
+        changed = self.parser.changed_regions(self._last_probes, probes)
+        regions = self.parser.observe_regions(self.screenshot, self._last_regions, changed)
+        elapsed = time.time() - time_start
+        LOGGER.info(
+            "Re-parsed %d/%d regions in %.1f ms, saving %.1f ms",
+            numpy.count_nonzero(changed),
+            changed.size,
+            1000 * elapsed,
+            1000 * (self._full_parse_time - elapsed)
+        )
+        return regions
 
     def parse_altar(self):
         """Parse the current screenshot looking for the altar interface.
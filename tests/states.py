@@ -0,0 +1,31 @@
+"""Game state strings shared by the tests.
+"""
+
+
+def terrain(tiles):
+    """Write a terrain string of ground tiles, except for some tiles.
+
+    Parameters
+    ----------
+    tiles : dict[int, str]
+        Encoded surface elements, by index in
+        `hoplite.utils.SURFACE_COORDINATES`.
+
+    Returns
+    -------
+    str
+        Terrain string.
+
+    """
+    surface = ["0"] * 79
+    for index, char in tiles.items():
+        surface[index] = char
+    return "".join(surface)
+
+
+STATES = [
+    "1;%s;0/100/1/3/0/-" % terrain({0: "a", 78: "b", 10: "2", 20: "3", 30: "1"}),
+    "12;%s;3/40/0/5/2/7,4,1,1" % terrain(
+        {5: "a", 70: "b", 11: "4", 12: "5", 13: "6", 14: "7", 40: "9", 50: "8", 60: "c"}),
+    "16;%s;0/0/1/8/12/0,2,3" % terrain({39: "a", 78: "b", 1: "e", 2: "f", 3: "d"}),
+]
@@ -0,0 +1,39 @@
+"""Tests for the brain service shared by several controllers.
+"""
+
+import concurrent.futures
+import numpy
+import pytest
+import hoplite.brain
+import hoplite.brain_service
+import hoplite.game.state
+from .states import STATES
+
+
+@pytest.fixture(scope="module")
+def service():
+    service = hoplite.brain_service.BrainService(timeout=30.)
+    service.start()
+    yield service
+    service.stop()
+
+
+def test_service_matches_local_search(service):
+    rng = numpy.random.default_rng(0)
+    game_states = [hoplite.game.state.GameState.from_string(string) for string in STATES]
+    game_states += [hoplite.brain_service.random_state(rng) for _ in range(9)]
+    local = hoplite.brain.Brain()
+    expected = [local.search_excluding(game_state, set()) for game_state in game_states]
+    remote = hoplite.brain.Brain(service=service)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        moves = list(executor.map(remote.search, game_states))
+    assert moves == expected
+    assert service.metrics()["requests"] >= len(game_states)
+
+
+def test_service_errors_reach_the_caller(service):
+    game_state = hoplite.game.state.GameState.from_string(STATES[0])
+    future = service.submit(game_state, set(game_state.possible_moves()))
+    with pytest.raises(ValueError):
+        future.result(service.timeout)
+    assert service.submit(game_state, set()).result(service.timeout) is not None
@@ -0,0 +1,71 @@
+"""Tests for the incremental accuracy report.
+"""
+
+import os
+import json
+import pytest
+import hoplite.checker
+import hoplite.game.moves
+import hoplite.game.state
+import hoplite.utils
+from .states import terrain
+
+
+@pytest.fixture
+def recordings(tmp_path):
+    state = hoplite.game.state.GameState.from_string(
+        "1;%s;0/100/1/3/0/-" % terrain({40: "a", 78: "b"}))
+    move = hoplite.game.moves.WalkMove(state.terrain.player + hoplite.utils.HEXAGONAL_DIRECTIONS[0])
+    paths = list()
+    for name, next_state in [("good", move.apply(state)), ("bad", state)]:
+        path = os.path.join(tmp_path, name)
+        os.mkdir(path)
+        with open(os.path.join(path, "game.log"), "w") as file:
+            file.write("000\tmove\t%r\t%r\n" % (state, move))
+            file.write("001\tmove\t%r\t%r\n" % (next_state, move))
+        paths.append(path)
+    return paths
+
+
+def read_mismatches(directory):
+    with open(os.path.join(directory, hoplite.checker.Report.MISMATCHES_FILENAME)) as file:
+        return [json.loads(line) for line in file]
+
+
+def test_report_resumes(tmp_path, recordings):
+    directory = os.path.join(tmp_path, "report")
+    report = hoplite.checker.Report(directory)
+    pending = report.pending(recordings)
+    assert [path for path, _ in pending] == recordings
+    for path, digest in pending:
+        report.add(hoplite.checker.check_recording(path), digest)
+    report.save()
+    report = hoplite.checker.Report(directory)
+    assert report.pending(recordings) == []
+    assert report.summary().predictions == 2
+    assert report.summary().errors == 1
+    mismatches = read_mismatches(directory)
+    assert [record["recording"] for record in mismatches] == [recordings[1]]
+    assert mismatches[0]["field"] == "Player position"
+    with open(os.path.join(directory, hoplite.checker.Report.SUMMARY_FILENAME)) as file:
+        assert json.load(file)["errors"] == 1
+
+
+def test_report_discards_interrupted_runs(tmp_path, recordings):
+    directory = os.path.join(tmp_path, "report")
+    report = hoplite.checker.Report(directory)
+    for path, digest in report.pending(recordings):
+        report.add(hoplite.checker.check_recording(path), digest)
+    with open(os.path.join(directory, hoplite.checker.Report.MISMATCHES_FILENAME), "a") as file:
+        file.write(json.dumps({"recording": "other", "hash": "0" * 32, "field": "Status"}) + "\n")
+        file.write(json.dumps({"recording": "legacy", "field": "Status"}) + "\n")
+        file.write("{\"recording\": \"trunc")
+    with open(os.path.join(directory, hoplite.checker.Report.INDEX_FILENAME), "a") as file:
+        file.write("{\"hash\": \"%s\", \"pa" % ("1" * 32))
+    report = hoplite.checker.Report(directory)
+    assert len(report.index) == 2
+    assert report.pending(recordings) == []
+    assert [record["recording"] for record in read_mismatches(directory)] == [
+        recordings[1], "legacy"]
+    report.add(hoplite.checker.CheckResult("other"), "2" * 32)
+    assert len(hoplite.checker.Report(directory).index) == 3
@@ -0,0 +1,63 @@
+"""Tests for the bulk conversion of game state strings.
+"""
+
+import numpy
+import pytest
+import hoplite.game.codec
+import hoplite.game.state
+import hoplite.game.terrain
+from .states import STATES
+
+
+def test_round_trip():
+    arrays = hoplite.game.codec.decode_states(STATES)
+    assert len(arrays) == 3
+    assert arrays.depth.tolist() == [1, 12, 16]
+    assert arrays.field("health").tolist() == [3, 5, 8]
+    assert arrays.field("energy").tolist() == [100, 40, 0]
+    assert arrays.terrain[0, 0] == hoplite.game.terrain.SurfaceElement.PLAYER.value
+    assert hoplite.game.codec.encode_states(arrays) == STATES
+    assert hoplite.game.codec.encode_states(arrays, [2, 0]) == [STATES[2], STATES[0]]
+
+
+def test_states_match_from_string():
+    arrays = hoplite.game.codec.decode_states(STATES)
+    for index, string in enumerate(STATES):
+        assert arrays.state(index) == hoplite.game.state.GameState.from_string(string)
+
+
+def test_prayer_masks():
+    arrays = hoplite.game.codec.decode_states(STATES)
+    assert arrays.prayers.tolist() == [0, 0b10010010, 0b1101]
+    arrays.prayer_fields = None
+    assert hoplite.game.codec.encode_states(arrays, [1])[0].endswith("/1,4,7")
+    for field in ["-", "0", "1,4,7", "0,2,3,12"]:
+        assert hoplite.game.codec.mask_prayers(hoplite.game.codec.prayer_mask(field)) == field
+
+
+def test_empty():
+    arrays = hoplite.game.codec.decode_states([])
+    assert len(arrays) == 0
+    assert hoplite.game.codec.encode_states(arrays) == []
+
+
+@pytest.mark.parametrize("string", [
+    STATES[0].replace("0/100/", "-1/100/"),
+    STATES[0].replace("/100/", "/123456/"),
+    STATES[0].replace("/100/", "//"),
+    STATES[0].replace("/100/", "/1a0/"),
+    STATES[0].replace("1;", ";", 1),
+    STATES[0].replace(";0", ";", 1),
+    STATES[0].replace(";0", ";g", 1),
+    STATES[0].replace("/-", ""),
+])
+def test_malformed(string):
+    with pytest.raises(ValueError):
+        hoplite.game.codec.decode_states([STATES[1], string])
+
+
+def test_parse_integers():
+    buffer = numpy.frombuffer(b"7/12/00345/", dtype=numpy.uint8)
+    values = hoplite.game.codec._parse_integers(  # pylint: disable=W0212
+        buffer, numpy.array([0, 2, 5]), numpy.array([1, 4, 10]))
+    assert values.tolist() == [7, 12, 345]
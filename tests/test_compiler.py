@@ -0,0 +1,89 @@
+"""Tests for the compiled table-driven classifiers.
+"""
+
+import numpy
+import pytest
+import hoplite.game.terrain
+import hoplite.vision.compiler
+import hoplite.vision.observer
+
+
+def labeled_parts(count=200, seed=0):
+    """Generate parts whose label only depends on two of their pixels.
+    """
+    rng = numpy.random.default_rng(seed)
+    parts = rng.integers(0, 256, (count, 12, 10, 3)) / 255
+    marks = rng.integers(0, 3, (count, 2))
+    parts[:, 2, 7] = marks[:, :1] / 2
+    parts[:, 9, 1] = marks[:, 1:] / 2
+    labels = ["label%d" % (3 * first + second) for first, second in marks]
+    return parts, labels
+
+
+def test_compiled_table_reproduces_labels():
+    parts, labels = labeled_parts()
+    classifier = hoplite.vision.compiler.TableClassifier.compile(parts, labels)
+    assert len(classifier.pixels) <= 2
+    assert classifier.lookup(parts[:, classifier.rows, classifier.columns]) == labels
+    assert [classifier(part) for part in parts] == labels
+
+
+def test_candidates_restrict_selected_pixels():
+    parts, labels = labeled_parts()
+    candidates = [(0, 0), (9, 1), (2, 7), (5, 5)]
+    pixels = hoplite.vision.compiler.select_pixels(parts, labels, candidates=candidates)
+    assert set(pixels) <= set(candidates)
+    parts[:, 0, 0] = .5
+    assert hoplite.vision.compiler.select_pixels(parts, labels, candidates=[(0, 0)]) == []
+
+
+def test_regression_against_reference():
+    parts, labels = labeled_parts()
+    classifier = hoplite.vision.compiler.TableClassifier.compile(parts, labels)
+    assert hoplite.vision.compiler.regression(classifier, classifier, parts, labels) == []
+    mismatches = hoplite.vision.compiler.regression(classifier, lambda part: "label0", parts)
+    assert len(mismatches) == sum(label != "label0" for label in labels)
+
+
+def test_save_and_load_keep_the_digest(tmp_path):
+    parts, labels = labeled_parts()
+    classifier = hoplite.vision.compiler.TableClassifier.compile(parts, labels)
+    path = str(tmp_path / "table.json")
+    classifier.save(path)
+    loaded = hoplite.vision.compiler.TableClassifier.load(path)
+    assert loaded.digest() == classifier.digest()
+    assert loaded.lookup(parts[:, loaded.rows, loaded.columns]) == labels
+    other = hoplite.vision.compiler.TableClassifier.compile(*labeled_parts(seed=1))
+    assert other.digest() != classifier.digest()
+
+
+@pytest.fixture(name="frame", scope="module")
+def fixture_frame():
+    return numpy.random.default_rng(0).random((1920, 1080, 3)).astype(numpy.float32)
+
+
+def test_unknown_tiles_fall_back_to_hand_written_classifier(frame):
+    table = hoplite.vision.compiler.TableClassifier([(3, 4), (30, 30)], dict())
+    reference = hoplite.vision.observer.ScreenParser()
+    parser = hoplite.vision.observer.ScreenParser(terrain_table=table)
+    assert parser.observe_regions(frame) == reference.observe_regions(frame)
+
+
+def test_table_pixels_are_probed(frame):
+    table = hoplite.vision.compiler.TableClassifier([(3, 4), (30, 30)], dict())
+    parser = hoplite.vision.observer.ScreenParser(terrain_table=table)
+    rows, columns = parser._table_pixels  # pylint: disable=W0212
+    changed_frame = frame.copy()
+    changed_frame[rows[5, 0], columns[5, 0]] += .5
+    changed = parser.changed_regions(
+        parser.sample_probes(frame), parser.sample_probes(changed_frame))
+    assert numpy.flatnonzero(changed).tolist() == [5]
+
+
+def test_cache_keys_depend_on_the_table(frame):
+    cache = hoplite.vision.observer.ParseCache()
+    table = hoplite.vision.compiler.TableClassifier(
+        [(3, 4)], dict(), hoplite.game.terrain.SurfaceElement.GROUND)
+    hoplite.vision.observer.ScreenParser(cache=cache).observe_game(frame)
+    hoplite.vision.observer.ScreenParser(cache=cache, terrain_table=table).observe_game(frame)
+    assert cache.hits == 0
@@ -0,0 +1,75 @@
+"""Tests for the columnar export of recorded moves.
+"""
+
+import os
+import numpy
+import pytest
+import hoplite.dataset
+import hoplite.game.codec
+from .states import STATES
+
+
+def write_log(folder, lines):
+    os.mkdir(folder)
+    with open(os.path.join(folder, "game.log"), "w") as file:
+        file.writelines("\t".join(fields) + "\n" for fields in lines)
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    paths = [os.path.join(tmp_path, name) for name in ["001", "002"]]
+    write_log(paths[0], [
+        ("001", "move", STATES[0], "walk/1,-2"),
+        ("002", "move", STATES[1], "leap/-3,0"),
+        ("003", "altar", "1,4", "1"),
+        ("004", "move", STATES[2], "idle/0,0"),
+    ])
+    write_log(paths[1], [
+        ("007", "move", STATES[1], "throw/2,3"),
+        ("008", "move", STATES[0], "bash/0,-1"),
+    ])
+    directory = os.path.join(tmp_path, "dataset")
+    assert hoplite.dataset.export(paths, directory) == 5
+    return paths, directory
+
+
+def test_export_columns(dataset):
+    paths, directory = dataset
+    columns = hoplite.dataset.load(directory)
+    assert hoplite.dataset.load_recordings(directory) == paths
+    assert columns["recording"].tolist() == [0, 0, 0, 1, 1]
+    assert columns["turn"].tolist() == [1, 2, 4, 7, 8]
+    assert columns["has_next"].tolist() == [True, False, False, True, False]
+    assert [hoplite.dataset.MOVE_TYPES[move] for move in columns["move"]] == [
+        "walk", "leap", "idle", "throw", "bash"]
+    assert columns["move_target"].tolist() == [[1, -2], [-3, 0], [0, 0], [2, 3], [0, -1]]
+    states = hoplite.game.codec.decode_states([STATES[i] for i in [0, 1, 2, 1, 0]])
+    numpy.testing.assert_array_equal(columns["terrain"], states.terrain)
+    numpy.testing.assert_array_equal(columns["depth"], states.depth)
+    numpy.testing.assert_array_equal(columns["health"], states.field("health"))
+    numpy.testing.assert_array_equal(columns["prayers"], states.prayers)
+
+
+def test_next_columns_are_masked(dataset):
+    _, directory = dataset
+    columns = hoplite.dataset.load(directory)
+    has_next = numpy.asarray(columns["has_next"])
+    following = hoplite.game.codec.decode_states([STATES[1], STATES[0]])
+    numpy.testing.assert_array_equal(columns["next_terrain"][has_next], following.terrain)
+    numpy.testing.assert_array_equal(columns["next_depth"][has_next], following.depth)
+    numpy.testing.assert_array_equal(columns["next_prayers"][has_next], following.prayers)
+    for name in ["next_terrain", "next_depth", "next_energy", "next_prayers"]:
+        assert not numpy.any(columns[name][~has_next])
+
+
+def test_load_is_read_only(dataset):
+    _, directory = dataset
+    for column in hoplite.dataset.load(directory).values():
+        assert isinstance(column, numpy.memmap)
+        assert not column.flags.writeable
+
+
+def test_parse_move():
+    assert hoplite.dataset.parse_move("walk/1,-2") == (1, 1, -2)
+    assert hoplite.dataset.parse_move("idle") == (
+        6, hoplite.dataset.NO_TARGET, hoplite.dataset.NO_TARGET)
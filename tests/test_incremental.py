@@ -0,0 +1,52 @@
+"""Tests for the incremental parsing of game screenshots.
+"""
+
+import numpy
+import pytest
+import hoplite.utils
+import hoplite.vision.observer
+
+
+@pytest.fixture(name="parser", scope="module")
+def fixture_parser():
+    return hoplite.vision.observer.ScreenParser()
+
+
+def random_frame(seed):
+    return numpy.random.default_rng(seed).random((1920, 1080, 3)).astype(numpy.float32)
+
+
+def blank_tiles(array, parser, indices):
+    """Paint some terrain tiles of a screenshot in black.
+    """
+    array = array.copy()
+    locator = parser.locators["terrain"]
+    for index in indices:
+        pos = hoplite.utils.SURFACE_COORDINATES[index]
+        locator.get(array, pos.y, pos.x)[...] = 0
+    return array
+
+
+def test_unchanged_frame_has_no_changed_region(parser):
+    probes = parser.sample_probes(random_frame(0))
+    assert not parser.changed_regions(probes, probes.copy()).any()
+
+
+def test_changed_regions_are_detected(parser):
+    prev_array = random_frame(0)
+    next_array = blank_tiles(prev_array, parser, [3, 40, 78])
+    changed = parser.changed_regions(
+        parser.sample_probes(prev_array), parser.sample_probes(next_array))
+    assert numpy.flatnonzero(changed).tolist() == [3, 40, 78]
+
+
+@pytest.mark.parametrize("indices", [[], [0], [12, 13, 14], list(range(0, 79, 7))])
+def test_incremental_parse_matches_full_parse(parser, indices):
+    prev_array = random_frame(1)
+    next_array = blank_tiles(prev_array, parser, indices)
+    next_array[1885:1913, 544:584] = 1  # Energy digits
+    previous = parser.observe_regions(prev_array)
+    changed = parser.changed_regions(
+        parser.sample_probes(prev_array), parser.sample_probes(next_array))
+    incremental = parser.observe_regions(next_array, previous, changed)
+    assert incremental == parser.observe_regions(next_array)
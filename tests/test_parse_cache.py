@@ -0,0 +1,80 @@
+"""Tests for the cache of parsing results.
+"""
+
+import os
+import numpy
+import hoplite.vision.observer
+
+
+def test_key_depends_on_kind_and_probes():
+    probes = numpy.zeros((4, 3))
+    key = hoplite.vision.observer.ParseCache.key("game", probes)
+    assert key == hoplite.vision.observer.ParseCache.key("game", probes.copy())
+    assert key != hoplite.vision.observer.ParseCache.key("altar", probes)
+    probes[0, 0] = 1
+    assert key != hoplite.vision.observer.ParseCache.key("game", probes)
+
+
+def test_memory_round_trip():
+    cache = hoplite.vision.observer.ParseCache()
+    assert cache.get("a") is None
+    cache.put("a", {"depth": 1})
+    assert cache.get("a") == {"depth": 1}
+    assert (cache.hits, cache.disk_hits, cache.misses) == (1, 0, 1)
+    assert cache.hit_rate() == .5
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = hoplite.vision.observer.ParseCache(capacity=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_disk_tier_is_shared(tmp_path):
+    writer = hoplite.vision.observer.ParseCache(directory=str(tmp_path))
+    writer.put("game-0", [1, 2, 3])
+    reader = hoplite.vision.observer.ParseCache(directory=str(tmp_path))
+    assert reader.get("game-0") == [1, 2, 3]
+    assert reader.disk_hits == 1
+    assert reader.get("game-0") == [1, 2, 3]
+    assert reader.hits == 1
+    assert os.listdir(str(tmp_path)) == ["game-0.pickle"]
+
+
+def test_unreadable_entry_is_a_miss(tmp_path):
+    cache = hoplite.vision.observer.ParseCache(directory=str(tmp_path))
+    cache.put("game-0", list(range(100)))
+    path = os.path.join(str(tmp_path), "game-0.pickle")
+    with open(path, "rb") as file:
+        data = file.read()
+    for corrupted in [data[:len(data) // 2], b"", b"garbage"]:
+        with open(path, "wb") as file:
+            file.write(corrupted)
+        reader = hoplite.vision.observer.ParseCache(directory=str(tmp_path))
+        assert reader.get("game-0") is None
+        assert reader.misses == 1
+
+
+def test_disk_hit_then_incremental_parse(tmp_path):
+    # A new process whose first frame is found on disk has no reference
+    # duration of a full parse
+    rng = numpy.random.default_rng(0)
+    frames = [rng.random((1920, 1080, 3)).astype(numpy.float32) for _ in range(2)]
+    frames[1][:, :540] = frames[0][:, :540]
+    first = hoplite.vision.observer.Observer(
+        None, cache=hoplite.vision.observer.ParseCache(directory=str(tmp_path)))
+    first.screenshot = frames[0]
+    first.parse_game()
+    second = hoplite.vision.observer.Observer(
+        None, cache=hoplite.vision.observer.ParseCache(directory=str(tmp_path)))
+    states = list()
+    for frame in frames:
+        second.screenshot = frame
+        states.append(repr(second.parse_game()))
+    assert second.parser.cache.disk_hits == 1
+    assert states[1] == repr(second.parser.build_game(second.parser.observe_regions(frames[1])))
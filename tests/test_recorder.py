@@ -0,0 +1,70 @@
+"""Tests for the background writing of recordings.
+"""
+
+import os
+import time
+import numpy
+import hoplite.controller
+import hoplite.game.state
+import hoplite.game.status
+import hoplite.recording
+
+
+class StubObserver:  # pylint: disable=R0903
+    """Observer saving screenshots as NumPy files, possibly slowly.
+    """
+
+    def __init__(self, delay=0.):
+        self.screenshot = None
+        self.delay = delay
+
+    def save_screenshot(self, filename, screenshot=None):
+        time.sleep(self.delay)
+        numpy.save(filename + ".npy", screenshot)
+
+
+def record_altars(recorder, observer, turns):
+    altar = hoplite.game.state.AltarState()
+    altar.prayers[hoplite.game.status.Prayer.FORTITUDE] = 0
+    recorder.start()
+    for turn in range(turns):
+        observer.screenshot = numpy.full((4, 4, 3), turn, dtype=numpy.float32)
+        recorder.record_altar(turn, altar, hoplite.game.status.Prayer.FORTITUDE)
+    recorder.stop()
+    return os.path.join(hoplite.controller.Recorder.DIRECTORY, recorder.folder)
+
+
+def test_records_are_written_in_order(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    observer = StubObserver()
+    folder = record_altars(hoplite.controller.Recorder(observer), observer, 5)
+    lines = hoplite.recording.read_lines(folder)
+    assert [int(line.split("\t")[0]) for line in lines] == list(range(5))
+    assert all(line.rstrip().split("\t")[1:] == ["altar", "1", "1"] for line in lines)
+    for turn in range(5):
+        assert numpy.load(os.path.join(folder, "%03d.png.npy" % turn))[0, 0, 0] == turn
+
+
+def test_late_writer_drops_screenshots_but_no_line(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    observer = StubObserver(delay=.02)
+    recorder = hoplite.controller.Recorder(observer, capacity=1)
+    folder = record_altars(recorder, observer, 10)
+    assert len(hoplite.recording.read_lines(folder)) == 10
+    assert recorder.dropped > 0
+    screenshots = [filename for filename in os.listdir(folder) if filename.endswith(".npy")]
+    assert len(screenshots) == 10 - recorder.dropped
+
+
+def test_binary_records(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    observer = StubObserver()
+    recorder = hoplite.controller.Recorder(observer, binary=True)
+    recorder.start()
+    altar = hoplite.game.state.AltarState()
+    for turn in range(3):
+        recorder.record_altar(turn, altar, hoplite.game.status.Prayer.FORTITUDE)
+    recorder.stop()
+    folder = os.path.join(hoplite.controller.Recorder.DIRECTORY, recorder.folder)
+    assert sorted(os.listdir(folder)) == ["game.bin", "game.idx"]
+    assert len(hoplite.recording.read_lines(folder)) == 3
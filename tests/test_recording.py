@@ -0,0 +1,166 @@
+"""Tests for the binary recording container.
+"""
+
+import os
+import numpy
+import pytest
+import matplotlib.image
+import hoplite.recording
+
+
+SHAPE = (12, 10, 3)
+
+
+def random_frames(count, seed=0):
+    rng = numpy.random.default_rng(seed)
+    return [rng.random(SHAPE).astype(numpy.float32) for _ in range(count)]
+
+
+def write(folder, frames, mode=hoplite.recording.FrameMode.FULL, **kwargs):
+    writer = hoplite.recording.RecordingWriter(folder, mode, kwargs.pop("shape", SHAPE), **kwargs)
+    for turn, frame in enumerate(frames):
+        writer.append(turn, "move\t%d" % turn, frame)
+    writer.close()
+
+
+def test_full_frames_round_trip(tmp_path):
+    frames = random_frames(4)
+    frames[2] = None
+    write(tmp_path, frames)
+    reader = hoplite.recording.RecordingReader(tmp_path)
+    assert len(reader) == 4
+    assert reader.lines() == ["%03d\tmove\t%d\n" % (turn, turn) for turn in range(4)]
+    assert reader.position(3) == 3
+    assert reader.frame(2) is None
+    for turn in [0, 1, 3]:
+        expected = hoplite.recording.to_pixels(frames[turn]) / 255
+        numpy.testing.assert_allclose(reader.screenshot(turn), expected, atol=1e-6)
+    with pytest.raises(KeyError):
+        reader.position(4)
+    reader.close()
+
+
+def test_repeated_turns(tmp_path):
+    writer = hoplite.recording.RecordingWriter(tmp_path, hoplite.recording.FrameMode.NONE)
+    for turn, text in [(1, "a"), (2, "b"), (1, "c")]:
+        writer.append(turn, text)
+    writer.close()
+    reader = hoplite.recording.RecordingReader(tmp_path)
+    assert [reader.position(turn) for turn in [1, 2]] == [2, 1]
+    reader.close()
+
+
+def test_iter_lines_closes_reader(tmp_path, monkeypatch):
+    write(tmp_path, random_frames(3), hoplite.recording.FrameMode.NONE)
+    closed = list()
+    close = hoplite.recording.RecordingReader.close
+    monkeypatch.setattr(
+        hoplite.recording.RecordingReader, "close",
+        lambda reader: closed.append(close(reader)))
+    lines = hoplite.recording.iter_lines(tmp_path)
+    assert next(lines).startswith("000\t")
+    lines.close()
+    assert len(closed) == 1
+
+
+def test_no_frames(tmp_path):
+    write(tmp_path, random_frames(2), hoplite.recording.FrameMode.NONE)
+    reader = hoplite.recording.load(tmp_path)
+    assert reader.frame(0) is None
+    assert len(reader.lines()) == 2
+    reader.close()
+
+
+def test_probe_frames(tmp_path):
+    frames = random_frames(2)
+    write(tmp_path, frames, hoplite.recording.FrameMode.PROBES, shape=(5, 3),
+          sampler=lambda screenshot: screenshot[0, :5])
+    reader = hoplite.recording.RecordingReader(tmp_path)
+    assert reader.shape == (5, 3)
+    expected = hoplite.recording.to_pixels(frames[1][0, :5]) / 255
+    numpy.testing.assert_allclose(reader.frame(1), expected, atol=1e-6)
+    with pytest.raises(ValueError):
+        reader.screenshot(1)
+    reader.close()
+
+
+def test_empty_container(tmp_path):
+    write(tmp_path, [])
+    assert hoplite.recording.read_lines(tmp_path) == []
+
+
+def test_convert_folder_layout(tmp_path):
+    frames = random_frames(3)
+    with open(os.path.join(tmp_path, hoplite.recording.LOG_FILENAME), "w") as file:
+        for turn, frame in enumerate(frames):
+            file.write("%03d\tmove\t%d\n" % (turn, turn))
+            if turn != 1:
+                matplotlib.image.imsave(os.path.join(tmp_path, "%03d.png" % turn), frame)
+    original = hoplite.recording.load(tmp_path)
+    expected = [original.screenshot(turn) for turn in range(3)]
+    lines = original.lines()
+    assert expected[1] is None
+    hoplite.recording.convert(tmp_path, shape=SHAPE)
+    reader = hoplite.recording.load(tmp_path)
+    assert isinstance(reader, hoplite.recording.RecordingReader)
+    assert reader.lines() == lines
+    assert list(hoplite.recording.iter_lines(tmp_path)) == lines
+    assert reader.frame(1) is None
+    for turn in [0, 2]:
+        numpy.testing.assert_allclose(reader.frame(turn), expected[turn], atol=1e-6)
+    reader.close()
+
+
+def test_find_recordings(tmp_path):
+    for name in ["001", "002"]:
+        os.mkdir(os.path.join(tmp_path, name))
+        write(os.path.join(tmp_path, name), [])
+    os.mkdir(os.path.join(tmp_path, "empty"))
+    assert hoplite.recording.find_recordings(str(tmp_path)) == [
+        os.path.join(tmp_path, "001"),
+        os.path.join(tmp_path, "002"),
+    ]
+
+
+@pytest.mark.parametrize("shape,block_shape", [
+    ((12, 10, 3), (4, 5)),
+    ((13, 11, 3), (4, 5)),
+    ((7, 3, 3), (64, 60)),
+])
+def test_delta_round_trip(shape, block_shape):
+    rng = numpy.random.default_rng(1)
+    previous = rng.integers(0, 256, shape, dtype=numpy.uint8)
+    pixels = previous.copy()
+    pixels[0, 0] = 255 - pixels[0, 0]
+    pixels[-1, -1, 1] = 255 - pixels[-1, -1, 1]
+    data = hoplite.recording.encode_delta(previous, pixels, block_shape)
+    rebuilt = previous.copy()
+    hoplite.recording.apply_delta(rebuilt, data)
+    numpy.testing.assert_array_equal(rebuilt, pixels)
+
+
+def test_unchanged_delta_is_empty():
+    pixels = numpy.zeros(SHAPE, dtype=numpy.uint8)
+    data = hoplite.recording.encode_delta(pixels, pixels.copy(), (4, 5))
+    rebuilt = numpy.ones(SHAPE, dtype=numpy.uint8)
+    hoplite.recording.apply_delta(rebuilt, data)
+    numpy.testing.assert_array_equal(rebuilt, 1)
+
+
+def test_delta_frames_in_any_order(tmp_path):
+    frames = random_frames(1)
+    for _ in range(7):
+        frame = frames[-1].copy()
+        frame[numpy.random.default_rng(len(frames)).integers(0, SHAPE[0]), :] = .5
+        frames.append(frame)
+    frames[4] = None
+    write(tmp_path, frames, hoplite.recording.FrameMode.DELTA, keyframe_interval=3)
+    reader = hoplite.recording.RecordingReader(tmp_path)
+    reader.cache_size = 1
+    for turn in numpy.random.default_rng(2).permutation(len(frames)):
+        if frames[turn] is None:
+            assert reader.frame(turn) is None
+            continue
+        expected = hoplite.recording.to_pixels(frames[turn]) / 255
+        numpy.testing.assert_allclose(reader.screenshot(turn), expected, atol=1e-6)
+    reader.close()
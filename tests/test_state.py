@@ -0,0 +1,41 @@
+"""Tests for the packed form of game states.
+"""
+
+import pytest
+import hoplite.game.state
+import hoplite.game.status
+import hoplite.game.terrain
+from .states import STATES
+
+
+@pytest.mark.parametrize("string", STATES)
+def test_state_round_trip(string):
+    state = hoplite.game.state.GameState.from_string(string)
+    data = state.to_bytes()
+    copy = hoplite.game.state.GameState.from_bytes(data)
+    assert repr(copy) == string
+    assert copy == state
+    assert copy.status.attributes.__dict__ == state.status.attributes.__dict__
+
+
+def test_state_size():
+    sizes = [len(hoplite.game.state.GameState.from_string(string).to_bytes())
+             for string in STATES]
+    assert sizes == [50, 55, 50]
+
+
+@pytest.mark.parametrize("prayers", ["-", "0", "1,4,7", "7,4,1,1", "3,3", "12,0"])
+def test_status_prayer_order(prayers):
+    string = "2/50/1/4/3/%s" % prayers
+    status = hoplite.game.status.Status.from_string(string)
+    copy = hoplite.game.status.Status.from_bytes(status.to_bytes())
+    assert repr(copy) == string
+    assert copy.prayers.values == status.prayers.values
+
+
+def test_terrain_round_trip():
+    for string in STATES:
+        surface = string.split(";")[1]
+        packed = hoplite.game.terrain.Terrain.from_string(surface).to_bytes()
+        assert len(packed) == 40
+        assert repr(hoplite.game.terrain.Terrain.from_bytes(packed)) == surface
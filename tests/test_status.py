@@ -0,0 +1,116 @@
+"""Tests for the player status and its prayers.
+"""
+
+import pytest
+from hoplite.game.status import Prayer, PrayerSet, Status
+
+
+def legacy_add_prayer(status, prayer, online):  # pylint: disable=R0912
+    """Reference implementation, applying the effects of a prayer one at a
+    time to mutable attributes.
+    """
+    attributes = status.attributes
+    if prayer == Prayer.DIVINE_RESTORATION and online:
+        status.health = attributes.maximum_health
+    elif prayer == Prayer.FORTITUDE:
+        status.health += online
+        attributes.maximum_health += 1
+    elif prayer == Prayer.BLOODLUST:
+        status.health -= online
+        attributes.maximum_health -= 1
+    elif prayer == Prayer.MIGHTY_BASH:
+        attributes.knockback_distance += 1
+    elif prayer == Prayer.QUICK_BASH:
+        attributes.cooldown -= 1
+    elif prayer == Prayer.GREATER_THROW:
+        attributes.throw_distance += 1
+    elif prayer == Prayer.GREATER_THROW_II:
+        attributes.throw_distance += 1
+        status.health -= online
+        attributes.maximum_health -= 1
+    elif prayer == Prayer.GREATER_ENERGY:
+        attributes.maximum_energy += 20
+        status.energy += 20 * online
+    elif prayer == Prayer.GREATER_ENERGY_II:
+        attributes.maximum_energy += 15
+        status.energy += 15 * online
+        status.health -= online
+        attributes.maximum_health -= 1
+    elif prayer == Prayer.WINGED_SANDALS:
+        attributes.leap_distance += 1
+        status.health -= online
+        attributes.maximum_health -= 1
+    elif prayer in (Prayer.SURGE, Prayer.REGENERATION):
+        status.health -= online
+        attributes.maximum_health -= 1
+    elif prayer == Prayer.STAGGERING_LEAP:
+        status.health -= 2 * online
+        attributes.maximum_health -= 2
+
+
+@pytest.mark.parametrize("online", [True, False])
+@pytest.mark.parametrize("prayer", list(Prayer))
+def test_prayer_effects(prayer, online):
+    for previous in [[], [Prayer.FORTITUDE, Prayer.GREATER_ENERGY, Prayer.FORTITUDE]]:
+        status = Status.from_string("0/80/1/2/0/-")
+        expected = Status.from_string("0/80/1/2/0/-")
+        for earlier in previous:
+            status.add_prayer(earlier)
+            legacy_add_prayer(expected, earlier, True)
+        status.add_prayer(prayer, online)
+        legacy_add_prayer(expected, prayer, online)
+        assert status.attributes.__dict__ == expected.attributes.__dict__
+        assert (status.health, status.energy) == (expected.health, expected.energy)
+        assert list(status.prayers) == previous + [prayer]
+
+
+def test_equality_follows_representation():
+    strings = [
+        "0/100/1/3/0/1,4",
+        "0/100/1/3/0/4,1",
+        "0/100/1/3/0/1,4,4",
+        "0/100/1/3/0/1,4,1",
+    ]
+    statuses = [Status.from_string(string) for string in strings]
+    for i, status in enumerate(statuses):
+        assert status == Status.from_string(strings[i])
+        assert hash(status) == hash(Status.from_string(strings[i]))
+        for j, other in enumerate(statuses):
+            assert (status == other) == (i == j)
+    assert PrayerSet([1, 4]).mask == PrayerSet([4, 1, 4]).mask
+    assert PrayerSet([1, 4]).multiset == PrayerSet([4, 1]).multiset
+    assert PrayerSet([1, 4]) != PrayerSet([4, 1])
+
+
+def test_copy_is_independent():
+    status = Status.from_string("0/100/1/3/0/1")
+    attributes = status.attributes.__dict__.copy()
+    copy = status.copy()
+    copy.add_prayer(Prayer.MIGHTY_BASH)
+    copy.add_prayer(Prayer.FORTITUDE)
+    assert repr(status) == "0/100/1/3/0/1"
+    assert status.attributes.__dict__ == attributes
+    assert Prayer.MIGHTY_BASH not in status.prayers
+    assert Prayer.MIGHTY_BASH in copy.prayers
+    assert copy.attributes.maximum_health == attributes["maximum_health"] + 1
+
+
+def test_set_prayers_keeps_observed_attributes():
+    status = Status()
+    status.attributes.maximum_health = 6
+    status.set_prayers(PrayerSet([Prayer.MIGHTY_BASH.value]))
+    assert status.attributes.maximum_health == 6
+    assert status.attributes.knockback_distance == 2
+    status.set_prayers(PrayerSet([Prayer.FORTITUDE.value]))
+    assert status.attributes.maximum_health == 7
+    assert status.attributes.knockback_distance == 1
+    status.set_prayers(PrayerSet())
+    assert status.attributes.maximum_health == 6
+
+
+def test_status_update_adds_prayers():
+    status = Status.from_string("0/100/1/3/0/1")
+    status.update(Status.from_string("2/60/0/4/1/3"))
+    assert repr(status) == "2/60/0/4/1/1,3"
+    assert status.attributes.maximum_health == 4
+    assert status.attributes.knockback_distance == 2
@@ -0,0 +1,65 @@
+"""Tests for the touch injection of the pure Python adb interface, against a
+fake adb server.
+"""
+
+import time
+import pytest
+import hoplite.actuator
+import hoplite.fake_adb
+import hoplite.ppadb_runner
+
+
+@pytest.fixture
+def server():
+    server = hoplite.fake_adb.FakeAdbServer(latency=0, tap_cost=0, event_cost=0)
+    server.start()
+    yield server
+    server.stop()
+
+
+def connect(server, persistent_touch=False):
+    interface = hoplite.ppadb_runner.PurePythonAdbInterface(
+        server.serial, server.port, persistent_touch)
+    interface.open()
+    return interface
+
+
+def taps(server):
+    return [(touch_x, touch_y) for _, touch_x, touch_y in server.taps]
+
+
+def test_find_touch_device(server):
+    interface = connect(server)
+    width, height = server.SCREEN_SIZE
+    assert interface.find_touch_device() == (
+        server.TOUCH_DEVICE, (0, width - 1, 0, height - 1), (width, height))
+
+
+def test_persistent_touches(server):
+    interface = connect(server, persistent_touch=True)
+    interface.touch(540, 903)
+    interface.touch_many([(180, 1820), (0, 0), (1079, 1919)], delay=.001)
+    assert taps(server) == [(540, 903), (180, 1820), (0, 0), (1079, 1919)]
+    assert not any("input tap" in service for service in server.services)
+    assert interface.reconnections == 0
+    interface.close()
+
+
+def test_reconnect_after_drop(server):
+    interface = connect(server, persistent_touch=True)
+    interface.touch(100, 200)
+    server.drop_sessions()
+    deadline = time.time() + 1
+    while interface._touch_session is not None and time.time() < deadline:  # pylint: disable=W0212
+        time.sleep(.01)
+    interface.touch(300, 400)
+    assert taps(server) == [(100, 200), (300, 400)]
+    assert interface.reconnections == 1
+    interface.close()
+
+
+def test_batched_input_taps(server):
+    actuator = hoplite.actuator.Actuator(connect(server), batch=True)
+    actuator.touch((540, 1820), (540, 903))
+    assert taps(server) == [(540, 1820), (540, 903)]
+    assert "shell:input tap 540 1820 && input tap 540 903" in server.services